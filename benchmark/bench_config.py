@@ -0,0 +1,99 @@
+"""
+Mide el camino de evaluación de Strategy y controla que no toque el disco.
+
+Cuenta los eventos de auditoría de Python (open, os.*, socket.*, subprocess.*) que ocurren
+mientras se evalúan los vencimientos, y compara contra leer config.json en cada evaluación.
+
+Uso (desde la raíz del repo):
+    python -m benchmark.bench_config
+"""
+import json
+import sys
+import timeit
+from collections import Counter
+
+from benchmark.synthetic import synthetic_market
+from src.model.config import get_config_service
+from src.model.rate_calculator import ImplicitRateCalculator
+from src.model.strategy import Strategy
+
+SYSCALL_EVENTS = ("open", "os.", "socket.", "subprocess.", "shutil.")
+
+
+class FakeInstrumentHandler:
+    def __init__(self, futures_by_ticker):
+        self._futures_by_ticker = futures_by_ticker
+
+    def rofex_instruments_by_ticker(self):
+        return self._futures_by_ticker
+
+
+class FakeDataUpdate:
+    def update_boolean(self):
+        # Siempre hay data nueva, así la evaluación no llega a mandar ordenes
+        return True
+
+
+class Maturities:
+    def __init__(self, tradeable_check):
+        self._tradeable_check = tradeable_check
+
+    def tradeable_maturities(self):
+        return sorted(set(self._tradeable_check.tradeable_ticker_maturity().values()))
+
+
+def main():
+    spot_api, futures_api, tradeable_check = synthetic_market(25, 4)
+    calculator = ImplicitRateCalculator(futures_api, spot_api, tradeable_check)
+    calculator.update_rates()
+    futures_by_ticker = {
+        future.ticker: future
+        for futures in tradeable_check.tradeable_pyrofex_future_underlier_ticker().values()
+        for future in futures
+    }
+    config_service = get_config_service()
+    strategy = Strategy(
+        FakeInstrumentHandler(futures_by_ticker),
+        calculator,
+        futures_api,
+        spot_api,
+        FakeDataUpdate(),
+        Maturities(tradeable_check),
+        require_same_snapshot=False,
+        config_service=config_service,
+    )
+
+    events = Counter()
+    counting = [False]
+
+    def audit(event, args):
+        if counting[0] and event.startswith(SYSCALL_EVENTS):
+            events[event] += 1
+
+    sys.addaudithook(audit)
+
+    number = 2000
+    counting[0] = True
+    in_memory = min(timeit.repeat(strategy.start_trades, number=number, repeat=3))
+    counting[0] = False
+    print(f"Evaluación con config en memoria: {in_memory / number * 1e6:.1f} us")
+    print(
+        f"Eventos de sistema durante la evaluación: {sum(events.values())} {dict(events)}"
+    )
+
+    def read_config_from_disk():
+        with open(config_service._path) as f:
+            json.load(f)
+
+    from_disk = min(
+        timeit.repeat(read_config_from_disk, number=number * 4, repeat=3)
+    ) / (number * 4)
+    n_maturities = len(Maturities(tradeable_check).tradeable_maturities())
+    print(
+        f"Leer config.json por vencimiento agregaría: {from_disk * 1e6:.1f} us "
+        f"x {n_maturities} vencimientos"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Microbenchmarks de los caminos críticos del bot sobre universos sintéticos
+(N subyacentes x M vencimientos):
+
+    - Arranque: catálogo de instrumentos desde la API (en frío) y desde el cache (reinicio),
+      y armado de InstrumentHandler + TradeableCheck con el catálogo compartido
+    - InstrumentHandler._parse_rofex
+    - PyRofexApi._market_data_handler, de a un mensaje y con conflación (ráfaga + snapshot)
+    - PyRofexApi.asks() / bids()
+    - ImplicitRateCalculator.update_rates (todo el universo y un solo tick)
+    - Strategy.start_trades
+    - OpportunityScanner: un tick (recálculo de tasas + actualización) y las 5 mejores
+    - PositionEngine: control de límites de un arbitraje (reserve + release) con posiciones
+      abiertas en todos los contratos
+    - Display.print_implicit_rates
+
+Los resultados se guardan en JSON y se pueden comparar contra una corrida anterior.
+
+Uso (desde la raíz del repo):
+    python -m benchmark.bench_hot_paths --output resultados.json
+    python -m benchmark.bench_hot_paths --compare baseline.json --tolerance 0.25
+"""
+import argparse
+import contextlib
+import datetime as dt
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+
+from benchmark.synthetic import (
+    UNIVERSES,
+    FakeSpotApi,
+    patched_api_wrapper,
+    synthetic_catalog,
+    synthetic_spot_prices,
+    synthetic_ticks,
+    underlier_tickers,
+)
+from src.model.config import get_config_service
+from src.model.display import Display
+from src.model.instrument_catalog import InstrumentCatalog
+from src.model.instrument_handler import InstrumentHandler
+from src.model.market_apis import PyRofexApi
+from src.model.opportunity_scanner import OpportunityScanner
+from src.model.order_dispatcher import OrderLeg
+from src.model.position_engine import PositionEngine, RiskLimits
+from src.model.rate_calculator import ImplicitRateCalculator
+from src.model.strategy import Strategy
+from src.model.tradeable_check import TradeableCheck
+
+N_TICKS = 2000
+REPEAT = 5
+
+
+class FakeDataUpdate:
+    def update_boolean(self):
+        # Siempre hay data nueva, así la evaluación no llega a mandar ordenes
+        return True
+
+
+def measure(function, repeat=REPEAT):
+    """Segundos por llamada, el mínimo de repeat corridas de al menos 0.2 s cada una"""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number, number
+
+
+def bench_universe(n_underliers, n_maturities, repeat=REPEAT):
+    """Devuelve {nombre del benchmark: (segundos por llamada, llamadas por corrida)}"""
+    results = {}
+    tickers = underlier_tickers(n_underliers)
+    detailed_instruments = synthetic_catalog(n_underliers, n_maturities)
+    spot_prices = synthetic_spot_prices(n_underliers)
+    devnull = open(os.devnull, "w")
+    cache_directory = tempfile.TemporaryDirectory()
+    with patched_api_wrapper(
+        detailed_instruments
+    ), devnull, cache_directory, contextlib.redirect_stdout(devnull):
+        cache_path = os.path.join(cache_directory.name, "instruments_cache.json")
+
+        def catalog_from_api():
+            catalog = InstrumentCatalog(cache_path)
+            catalog.invalidate()
+            catalog.instruments()
+
+        def catalog_from_cache():
+            InstrumentCatalog(cache_path).instruments()
+
+        results["startup.catalog_api"] = measure(catalog_from_api, repeat)
+        results["startup.catalog_cache"] = measure(catalog_from_cache, repeat)
+        # Sin archivo de cache, el catálogo queda solo en memoria
+        catalog = InstrumentCatalog(path=None)
+        catalog.instruments()
+        results["startup.handlers"] = measure(
+            lambda: (
+                InstrumentHandler(tickers, catalog),
+                TradeableCheck(tickers, catalog),
+            ),
+            repeat,
+        )
+        handler = InstrumentHandler(tickers, catalog)
+
+        results["instrument_handler.parse_rofex"] = measure(
+            handler._parse_rofex, repeat
+        )
+
+        tradeable_check = TradeableCheck(tickers, catalog)
+        pyrofex_api = PyRofexApi(tradeable_check, subscribe_to_order_report=False)
+        ticks = synthetic_ticks(
+            tradeable_check.tradeable_rofex_futures(), spot_prices, N_TICKS
+        )
+        for message in ticks:
+            pyrofex_api._market_data_handler(message)
+
+        def market_data_handler():
+            for message in ticks:
+                pyrofex_api._market_data_handler(message)
+
+        seconds, number = measure(market_data_handler, repeat)
+        results["pyrofex_api.market_data_handler"] = (seconds / len(ticks), number)
+        conflating_api = PyRofexApi(
+            tradeable_check, subscribe_to_order_report=False, conflate=True
+        )
+
+        def conflated_burst():
+            for message in ticks:
+                conflating_api._market_data_handler(message)
+            conflating_api.snapshot()
+
+        seconds, number = measure(conflated_burst, repeat)
+        results["pyrofex_api.market_data_handler.conflated"] = (
+            seconds / len(ticks),
+            number,
+        )
+        results["pyrofex_api.asks_bids"] = measure(
+            lambda: (pyrofex_api.asks(), pyrofex_api.bids()), repeat
+        )
+
+        spot_api = FakeSpotApi(spot_prices)
+        calculator = ImplicitRateCalculator(pyrofex_api, spot_api, tradeable_check)
+        calculator.update_rates()
+
+        def full_update():
+            # Simula un cambio de día: se recalcula todo el universo
+            calculator._full_update = True
+            calculator.update_rates()
+
+        results["rate_calculator.update_rates.full"] = measure(full_update, repeat)
+        one_tick = iter(ticks * (1 + 10**7 // len(ticks)))
+
+        def single_tick_update():
+            pyrofex_api._market_data_handler(next(one_tick))
+            calculator.update_rates()
+
+        results["rate_calculator.update_rates.tick"] = measure(
+            single_tick_update, repeat
+        )
+
+        strategy = Strategy(
+            tradeable_check,
+            calculator,
+            pyrofex_api,
+            spot_api,
+            FakeDataUpdate(),
+            tradeable_check,
+            require_same_snapshot=False,
+            config_service=get_config_service(),
+        )
+        results["strategy.start_trades"] = measure(strategy.start_trades, repeat)
+
+        scanner = OpportunityScanner(max_opportunities=5, cross_maturity=True)
+        scanner.update(calculator.rates_snapshot())
+
+        def scanner_tick():
+            pyrofex_api._market_data_handler(next(one_tick))
+            calculator.update_rates()
+            scanner.update(calculator.rates_snapshot())
+            scanner.top()
+
+        results["opportunity_scanner.tick_top5"] = measure(scanner_tick, repeat)
+
+        futures = tradeable_check.tradeable_rofex_futures()
+        position_engine = PositionEngine(
+            tradeable_check.rofex_instruments_by_ticker(),
+            tradeable_check.tradeable_ticker_maturity(),
+            limits=RiskLimits(10**6, 10**12, 10**12, 10**15),
+        )
+        for future in futures:
+            position_engine.apply_fill(future.ticker, "BUY", 1, 100.0)
+        legs = [
+            OrderLeg(futures[0].ticker, "BUY", 10, 100.0),
+            OrderLeg(futures[-1].ticker, "SELL", 10, 100.0),
+        ]
+        results["position_engine.reserve_release"] = measure(
+            lambda: position_engine.release(position_engine.reserve(legs)), repeat
+        )
+
+        display = Display(calculator)
+        results["display.print_implicit_rates"] = measure(
+            display.print_implicit_rates, repeat
+        )
+    return results
+
+
+def run(universes, repeat=REPEAT):
+    results = {}
+    for n_contracts in universes:
+        n_underliers, n_maturities = UNIVERSES[n_contracts]
+        for name, (seconds, number) in bench_universe(
+            n_underliers, n_maturities, repeat
+        ).items():
+            results[f"{name}[{n_contracts}]"] = {"seconds": seconds, "number": number}
+            print(f"{name + f'[{n_contracts}]':<48} {seconds * 1e6:>12.2f} us")
+    return {
+        "created": dt.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """
+    Compara contra un baseline. Devuelve los benchmarks que tardan más de
+    (1 + tolerance) veces lo que tardaban en el baseline.
+    """
+    regressions = []
+    print(f"\n{'benchmark':<48} {'baseline':>12} {'actual':>12} {'ratio':>7}")
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["seconds"]
+        ratio = result["seconds"] / before if before else float("inf")
+        regression = ratio > 1 + tolerance
+        if regression:
+            regressions.append(name)
+        print(
+            f"{name:<48} {before * 1e6:>10.2f}us {result['seconds'] * 1e6:>10.2f}us "
+            f"{ratio:>7.2f}{'  REGRESION' if regression else ''}"
+        )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--universes",
+        nargs="+",
+        type=int,
+        default=list(UNIVERSES),
+        choices=list(UNIVERSES),
+        help="cantidad de contratos de cada universo",
+    )
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--output", help="archivo JSON donde guardar los resultados")
+    parser.add_argument("--compare", help="archivo JSON de baseline a comparar")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="aumento relativo tolerado antes de marcar una regresión",
+    )
+    args = parser.parse_args(argv)
+
+    current = run(args.universes, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regresiones: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""
+Compara el motor de tasas con diccionarios contra el motor con arrays de NumPy.
+
+Uso (desde la raíz del repo):
+    python -m benchmark.bench_rate_engines
+"""
+import timeit
+
+from benchmark.synthetic import UNIVERSES, synthetic_market
+from src.model.market_apis import OrderBook
+from src.model.rate_calculator import ImplicitRateCalculator
+from src.model.array_rate_calculator import ArrayImplicitRateCalculator
+
+
+def bench_engine(engine, n_underliers, n_maturities, number):
+    spot_api, futures_api, tradeable_check = synthetic_market(
+        n_underliers, n_maturities
+    )
+    calculator = engine(futures_api, spot_api, tradeable_check)
+    calculator.update_rates()
+    tickers = list(futures_api.book_bids.keys())
+
+    def full_tick():
+        # Simula un cambio de día: se recalcula todo el universo
+        calculator._full_update = True
+        calculator.update_rates()
+
+    def single_tick():
+        ticker = tickers[0]
+        futures_api.book_bids[ticker] = OrderBook(
+            futures_api.book_bids[ticker].price, 11
+        )
+        futures_api.updated.add(ticker)
+        calculator.update_rates()
+
+    return (
+        min(timeit.repeat(full_tick, number=number, repeat=3)) / number,
+        min(timeit.repeat(single_tick, number=number, repeat=3)) / number,
+    )
+
+
+def main():
+    engines = {"dict": ImplicitRateCalculator, "array": ArrayImplicitRateCalculator}
+    print(f"{'contratos':>10} {'motor':>6} {'todo (us)':>12} {'1 tick (us)':>12}")
+    for n_contracts, (n_underliers, n_maturities) in UNIVERSES.items():
+        number = max(10, 20000 // n_contracts)
+        for name, engine in engines.items():
+            full, single = bench_engine(engine, n_underliers, n_maturities, number)
+            print(
+                f"{n_contracts:>10} {name:>6} {full * 1e6:>12.1f} {single * 1e6:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
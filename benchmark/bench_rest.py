@@ -0,0 +1,171 @@
+"""
+Compara el envío de ordenes por REST de pyRofex (requests.get sin sesión, una conexión nueva
+por orden) contra RofexRestClient (sesión con pool de conexiones keep-alive), contra un
+servidor HTTP local que imita los endpoints de Rofex.
+
+--connect-delay simula en ms el costo de abrir una conexión (handshake TCP/TLS con el
+exchange), que en localhost y sin TLS es casi nulo. --delay simula en ms lo que tarda el
+exchange en contestar cada orden.
+
+Uso (desde la raíz del repo):
+    python -m benchmark.bench_rest --orders 500 --threads 1 8 --connect-delay 0 5
+"""
+import argparse
+import copy
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pyRofex
+from pyRofex.components import globals as rofex_globals
+
+from src.model.rest_client import RofexRestClient
+
+ENVIRONMENT = pyRofex.Environment.REMARKET
+
+
+class MockRofexHandler(BaseHTTPRequestHandler):
+    """Contesta auth/getToken, las ordenes nuevas y los segmentos como Rofex"""
+
+    # HTTP/1.1 para que el cliente pueda mantener la conexión abierta
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers y cuerpo salen en escrituras separadas, sin esto Nagle y el ACK demorado
+        # agregan ~40 ms a cada respuesta sobre una conexión reutilizada
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.connections += 1
+        time.sleep(self.server.connect_delay)
+
+    def do_POST(self):
+        self._reply({"status": "OK"}, {"X-Auth-Token": "token"})
+
+    def do_GET(self):
+        if self.headers.get("X-Auth-Token") != "token":
+            self._reply({"status": "ERROR"}, status=401)
+            return
+        time.sleep(self.server.delay)
+        if self.path.startswith("/rest/order/newSingleOrder"):
+            with self.server.lock:
+                self.server.orders += 1
+                client_id = str(self.server.orders)
+            self._reply(
+                {
+                    "status": "OK",
+                    "order": {"clientId": client_id, "proprietary": "PBCP"},
+                }
+            )
+        else:
+            self._reply({"status": "OK", "segments": []})
+
+    def _reply(self, body, headers=None, status=200):
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class MockRofexServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, delay=0.0, connect_delay=0.0):
+        super().__init__(("127.0.0.1", 0), MockRofexHandler)
+        self.delay = delay
+        self.connect_delay = connect_delay
+        self.connections = 0
+        self.orders = 0
+        self.lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+def send_orders(send_order, orders, threads):
+    """Manda orders ordenes límite desde threads hilos, devuelve ordenes por segundo"""
+
+    def send(i):
+        return send_order(
+            "DLR/MAR23", 1, pyRofex.OrderType.LIMIT, pyRofex.Side.BUY, price=100.0 + i
+        )
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(send, range(orders)))
+    return orders / (time.perf_counter() - start)
+
+
+def bench_pyrofex(server, orders, threads):
+    # pyRofex lee la url del entorno global, se apunta al servidor y después se restaura
+    environment_config = copy.deepcopy(rofex_globals.environment_config[ENVIRONMENT])
+    rofex_globals.environment_config[ENVIRONMENT]["url"] = server.url()
+    try:
+        pyRofex.initialize("user", "password", "account", ENVIRONMENT)
+        return send_orders(pyRofex.send_order, orders, threads)
+    finally:
+        rofex_globals.environment_config[ENVIRONMENT].clear()
+        rofex_globals.environment_config[ENVIRONMENT].update(environment_config)
+
+
+def bench_pooled(server, orders, threads):
+    client = RofexRestClient(
+        "user",
+        "password",
+        "account",
+        ENVIRONMENT,
+        pool_size=threads,
+        base_url=server.url(),
+    )
+    client.warm_up()
+    try:
+        return send_orders(client.send_order, orders, threads)
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--delay", type=float, default=0.0, help="ms por orden")
+    parser.add_argument(
+        "--connect-delay", type=float, nargs="+", default=[0.0, 5.0], help="ms"
+    )
+    args = parser.parse_args()
+    benches = {"pyRofex": bench_pyrofex, "pool": bench_pooled}
+    print(
+        f"{'conexión (ms)':>13} {'hilos':>6} {'cliente':>8} {'ordenes/s':>10}"
+        f" {'conexiones':>11}"
+    )
+    for connect_delay in args.connect_delay:
+        for threads in args.threads:
+            for name, bench in benches.items():
+                server = MockRofexServer(args.delay / 1000, connect_delay / 1000)
+                try:
+                    rate = bench(server, args.orders, threads)
+                finally:
+                    server.close()
+                print(
+                    f"{connect_delay:>13.1f} {threads:>6} {name:>8} {rate:>10.0f}"
+                    f" {server.connections:>11}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Universos sintéticos para los benchmarks: catálogos de instrumentos con el formato de
+get_detailed_instruments, mensajes de market data como los del websocket y fakes de las APIs.
+"""
+import datetime as dt
+import random
+from contextlib import contextmanager
+from unittest import mock
+
+import src.model.api_wrapper as wrapper
+from src.model.instrument_handler import FutureContract
+from src.model.market_apis import BookSnapshot, OrderBook
+
+MONTHS = [
+    "ENE",
+    "FEB",
+    "MAR",
+    "ABR",
+    "MAY",
+    "JUN",
+    "JUL",
+    "AGO",
+    "SEP",
+    "OCT",
+    "NOV",
+    "DIC",
+]
+
+# Cantidad de contratos -> (subyacentes, vencimientos)
+UNIVERSES = {10: (5, 2), 100: (25, 4), 1000: (125, 8)}
+
+
+def underlier_tickers(n_underliers):
+    return [f"U{u:03d}" for u in range(n_underliers)]
+
+
+def maturity_label(m):
+    return f"{MONTHS[m % 12]}{23 + m // 12}"
+
+
+class FakeSpotApi:
+    def __init__(self, prices):
+        self.prices = prices
+        self.updated = set()
+
+    def last_prices(self):
+        return self.prices
+
+    def price(self, ticker):
+        return self.prices.get(ticker, 0.0)
+
+    def last_received(self):
+        return 0
+
+    def pop_updated(self):
+        updated, self.updated = self.updated, set()
+        return updated
+
+
+class FakeFuturesApi:
+    def __init__(self, bids, asks):
+        self.book_bids = bids
+        self.book_asks = asks
+        self.updated = set()
+
+    def snapshot(self):
+        return BookSnapshot(self.book_bids, self.book_asks, 0)
+
+    def bids(self):
+        return self.book_bids
+
+    def asks(self):
+        return self.book_asks
+
+    def pop_updated(self):
+        updated, self.updated = self.updated, set()
+        return updated
+
+
+class FakeTradeableCheck:
+    def __init__(self, futures_by_underlier, ticker_maturity):
+        self._futures_by_underlier = futures_by_underlier
+        self._ticker_maturity = ticker_maturity
+
+    def tradeable_pyrofex_future_underlier_ticker(self):
+        return self._futures_by_underlier
+
+    def tradeable_ticker_maturity(self):
+        return self._ticker_maturity
+
+
+class FakeAPIWrapper:
+    """Reemplaza a APIWrapper: devuelve el catálogo sintético y no abre conexiones"""
+
+    def __init__(self, catalog):
+        self._catalog = catalog
+
+    def get_detailed_instruments(self):
+        return self._catalog
+
+    def init_websocket_connection(self, *args, **kwargs):
+        pass
+
+    def market_data_subscription(self, *args, **kwargs):
+        pass
+
+    def order_report_subscription(self, *args, **kwargs):
+        pass
+
+    def close_websocket_connection_safely(self):
+        pass
+
+
+@contextmanager
+def patched_api_wrapper(catalog):
+    """Mientras dura el contexto, APIWrapper() devuelve un FakeAPIWrapper con catalog"""
+    with mock.patch.object(wrapper, "APIWrapper", lambda: FakeAPIWrapper(catalog)):
+        yield
+
+
+def synthetic_catalog(n_underliers, n_maturities, n_other=None, seed=0):
+    """
+    Catálogo con n_underliers x n_maturities futuros, más n_other instrumentos que no
+    corresponden a ningún subyacente (por defecto tantos como futuros), como en el real.
+    """
+    rnd = random.Random(seed)
+    today = dt.datetime.now()
+    instruments = []
+    for underlier in underlier_tickers(n_underliers):
+        for m in range(n_maturities):
+            maturity_date = today + dt.timedelta(days=30 * (m + 1))
+            instruments.append(
+                {
+                    "instrumentId": {
+                        "marketId": "ROFX",
+                        "symbol": f"{underlier}/{maturity_label(m)}",
+                    },
+                    "maturityDate": f"{maturity_date:%Y%m%d}",
+                    "contractMultiplier": 100.0,
+                }
+            )
+    if n_other is None:
+        n_other = len(instruments)
+    for i in range(n_other):
+        instruments.append(
+            {
+                "instrumentId": {
+                    "marketId": "ROFX",
+                    "symbol": f"MERV - XMEV - X{i:04d} - 48hs",
+                },
+                "maturityDate": f"{today:%Y%m%d}",
+                "contractMultiplier": 1.0,
+            }
+        )
+    rnd.shuffle(instruments)
+    return {"status": "OK", "instruments": instruments}
+
+
+def synthetic_spot_prices(n_underliers, seed=0):
+    rnd = random.Random(seed)
+    return {
+        underlier: rnd.uniform(50, 500) for underlier in underlier_tickers(n_underliers)
+    }
+
+
+def _levels(rnd, mid, depth, direction):
+    return [
+        {
+            "price": round(mid * (1 + direction * 0.001 * (level + 1)), 3),
+            "size": rnd.randint(1, 50),
+        }
+        for level in range(depth)
+    ]
+
+
+def market_data_message(ticker, bids, offers):
+    """Mensaje de market data con el formato del websocket de Rofex"""
+    return {
+        "type": "Md",
+        "timestamp": 0,
+        "instrumentId": {"marketId": "ROFX", "symbol": ticker},
+        "marketData": {"BI": bids, "OF": offers},
+    }
+
+
+def synthetic_ticks(futures, spot_prices, n_ticks, depth=1, seed=0):
+    """
+    Mensajes de market data para los futuros (FutureContract): primero uno por futuro para
+    llenar el libro y después n_ticks sobre futuros al azar, alrededor de un precio teórico.
+    """
+    rnd = random.Random(seed)
+
+    def tick(future):
+        days = max(future.time_to_expire(), 1)
+        mid = spot_prices[future.underlier_ticker] * (1 + 0.4 * days / 365)
+        mid *= rnd.uniform(0.98, 1.02)
+        return market_data_message(
+            future.ticker, _levels(rnd, mid, depth, -1), _levels(rnd, mid, depth, 1)
+        )
+
+    return [tick(future) for future in futures] + [
+        tick(rnd.choice(futures)) for _ in range(n_ticks)
+    ]
+
+
+def synthetic_market(n_underliers, n_maturities, seed=0):
+    """APIs y TradeableCheck falsos con las puntas ya cargadas"""
+    rnd = random.Random(seed)
+    today = dt.datetime.now()
+    futures_by_underlier = {}
+    ticker_maturity = {}
+    prices, bids, asks = {}, {}, {}
+    for underlier in underlier_tickers(n_underliers):
+        prices[underlier] = rnd.uniform(50, 500)
+        futures_by_underlier[underlier] = []
+        for m in range(n_maturities):
+            maturity = maturity_label(m)
+            ticker = f"{underlier}/{maturity}"
+            maturity_date = today + dt.timedelta(days=30 * (m + 1))
+            futures_by_underlier[underlier].append(
+                FutureContract(ticker, underlier, maturity_date, 100.0)
+            )
+            ticker_maturity[ticker] = maturity
+            mid = prices[underlier] * (1 + 0.4 * (m + 1) / 12) * rnd.uniform(0.98, 1.02)
+            bids[ticker] = OrderBook(mid * 0.999, 10)
+            asks[ticker] = OrderBook(mid * 1.001, 10)
+    return (
+        FakeSpotApi(prices),
+        FakeFuturesApi(bids, asks),
+        FakeTradeableCheck(futures_by_underlier, ticker_maturity),
+    )
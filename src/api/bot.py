@@ -1,11 +1,18 @@
 from src.model import tradingbot as bot
+from src.model.config import get_config_service
 
 
 def main():
 
-    underlier_update_frecuency = 0.5
-    tickers = ["PAMP", "YPFD", "GGAL", "DLR"]
-    bot.TradingBot(tickers, underlier_update_frecuency).start()
+    config_service = get_config_service()
+    # Recarga la configuración en memoria cuando cambia el archivo o llega un SIGHUP
+    config_service.start_watching()
+    config_service.reload_on_signal()
+    underlier_update_frecuency = config_service.get("UNDERLIER_UPDATE_FRECUENCY", 0.5)
+    tickers = config_service.get("TICKERS", ["PAMP", "YPFD", "GGAL", "DLR"])
+    bot.TradingBot(
+        tickers, underlier_update_frecuency, config_service=config_service
+    ).start()
 
 
 if __name__ == "__main__":
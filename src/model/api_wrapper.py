@@ -1,5 +1,9 @@
-import json
 import pyRofex
+from pyRofex.components import globals as rofex_globals
+
+from src.model.async_logger import get_logger
+from src.model.config import get_config_service
+from src.model.rest_client import rest_client_pool_from_config
 
 
 class Singleton(type):
@@ -14,28 +18,93 @@ class Singleton(type):
 class APIWrapper(metaclass=Singleton):
     """
     Para asegurar que solo una instancia de PyRofex sea creada.
+    Las llamadas REST (ordenes, estado de ordenes y catálogo) salen por un pool de sesiones
+    keep-alive propio (REST_POOLED_SESSIONS, activado por defecto), el resto va a pyRofex.
     """
 
-    with open(
-        "C:/Users/54112/source/repos/Arbitraje-de-Tasas/src/conf/config.json"
-    ) as f:
-        config = json.load(f)
-
     def __init__(
         self,
-        user=config["USER"],
-        password=config["PASS"],
-        account=config["ACCOUNT"],
-        environment=pyRofex.Environment.REMARKET,
+        user=None,
+        password=None,
+        account=None,
+        environment=None,
+        config_service=None,
+        token=None,
     ):
-        self._environment = environment
-        pyRofex.initialize(
+        # Las credenciales se leen de la configuración en memoria, no al importar el módulo
+        config_service = config_service or get_config_service()
+        user = user or config_service["USER"]
+        password = password or config_service["PASS"]
+        account = account or config_service["ACCOUNT"]
+        self._environment = environment or config_service.environment()
+        credentials = dict(
             user=user, password=password, account=account, environment=self._environment
         )
+        if token is not None:
+            # Con token (por ejemplo el del feed en un worker) no se vuelve a autenticar
+            credentials["active_token"] = token
+        pyRofex.initialize(**credentials)
+        self._rest = None
+        if config_service.get("REST_POOLED_SESSIONS", True):
+            self._rest = rest_client_pool_from_config(
+                config_service,
+                self._environment,
+                user=user,
+                password=password,
+                account=account,
+                token=self.token(),
+            )
+            # Abre las conexiones antes de la primera orden
+            warmed_up = self._rest.warm_up()
+            get_logger().info("%s conexiones REST precalentadas", warmed_up)
 
     def __getattr__(self, attribute):
         return getattr(pyRofex, attribute)
 
+    def token(self):
+        """Token de autenticación vigente de pyRofex"""
+        return rofex_globals.environment_config[self._environment]["token"]
+
+    def rest(self):
+        """Pool de clientes REST, None si se usa el cliente REST de pyRofex"""
+        return self._rest
+
+    def next_account(self):
+        """
+        Cuenta del próximo trade, en round-robin entre las del pool REST. None (la cuenta
+        por defecto de pyRofex) si se usa el cliente REST de pyRofex.
+        """
+        if self._rest is None:
+            return None
+        return self._rest.next_account()
+
+    def send_order(self, *args, **kwargs):
+        if self._rest is None:
+            return pyRofex.send_order(*args, **kwargs)
+        return self._rest.send_order(*args, **kwargs)
+
+    def get_order_status(self, *args, **kwargs):
+        if self._rest is None:
+            return pyRofex.get_order_status(*args, **kwargs)
+        return self._rest.get_order_status(*args, **kwargs)
+
+    def cancel_order(self, *args, **kwargs):
+        if self._rest is None:
+            return pyRofex.cancel_order(*args, **kwargs)
+        return self._rest.cancel_order(*args, **kwargs)
+
+    def order_report_subscription(self, *args, **kwargs):
+        """Sin argumentos se suscribe a los reportes de todas las cuentas del pool REST"""
+        if self._rest is None or args or kwargs:
+            return pyRofex.order_report_subscription(*args, **kwargs)
+        for account in self._rest.accounts():
+            pyRofex.order_report_subscription(account=account)
+
+    def get_detailed_instruments(self):
+        if self._rest is None:
+            return pyRofex.get_detailed_instruments()
+        return self._rest.get_detailed_instruments()
+
     def close_websocket_connection_safely(self):
         try:
             pyRofex.close_websocket_connection(self._environment)
@@ -44,3 +113,5 @@ class APIWrapper(metaclass=Singleton):
 
     def __del__(self):
         self.close_websocket_connection_safely()
+        if getattr(self, "_rest", None) is not None:
+            self._rest.close()
@@ -0,0 +1,248 @@
+from types import MappingProxyType
+
+import numpy as np
+
+import src.model.clock as clock
+from src.model.latency import RECEIVE_TO_RATES, timestamp
+from src.model.market_apis import EMPTY_BOOK_SNAPSHOT
+from src.model.rate_calculator import EMPTY_RATES_SNAPSHOT, RatesSnapshot
+
+
+class ArrayImplicitRateCalculator:
+    """
+    Calcula la tasa implicita sobre arrays de NumPy.
+    Misma interfaz que ImplicitRateCalculator, pero los precios, spots y días al vencimiento
+    viven en arrays preasignados indexados por un id entero de contrato, y las tasas de todo
+    el universo se calculan en una sola expresión vectorizada.
+    """
+
+    DAYS_IN_A_YEAR = 365
+
+    def __init__(
+        self,
+        pyrofex_api,
+        spot_source,
+        tradeable_check,
+        latency_tracer=None,
+        clock_service=None,
+    ):
+        underliers_futures = tradeable_check.tradeable_pyrofex_future_underlier_ticker()
+        tickers_maturities = tradeable_check.tradeable_ticker_maturity()
+        self._pyrofex_api = pyrofex_api
+        self._spot_source = spot_source
+
+        # Los contratos se ordenan por vencimiento, así cada vencimiento es un segmento contiguo
+        self._futures = sorted(
+            (future for futures in underliers_futures.values() for future in futures),
+            key=lambda future: (tickers_maturities[future.ticker], future.ticker),
+        )
+        self._tickers = [future.ticker for future in self._futures]
+        self._contract_id = {ticker: i for i, ticker in enumerate(self._tickers)}
+        self._maturities = []
+        segment_starts = []
+        for i, ticker in enumerate(self._tickers):
+            if (
+                not self._maturities
+                or self._maturities[-1] != tickers_maturities[ticker]
+            ):
+                self._maturities.append(tickers_maturities[ticker])
+                segment_starts.append(i)
+        self._segments = list(
+            zip(
+                self._maturities,
+                segment_starts,
+                segment_starts[1:] + [len(self._tickers)],
+            )
+        )
+
+        self._underliers = sorted(
+            set(future.underlier_ticker for future in self._futures)
+        )
+        self._underlier_id = {ticker: i for i, ticker in enumerate(self._underliers)}
+        self._contract_underlier = np.array(
+            [self._underlier_id[future.underlier_ticker] for future in self._futures],
+            dtype=np.intp,
+        )
+
+        n_contracts = len(self._futures)
+        self._bids = np.full(n_contracts, np.nan)
+        self._asks = np.full(n_contracts, np.nan)
+        self._spots = np.full(len(self._underliers), np.nan)
+        self._exponents = np.full(n_contracts, np.nan)
+        # Ids de los contratos vencidos
+        self._retired = set()
+        self._buy_rates = np.full(n_contracts, np.nan)
+        self._sell_rates = np.full(n_contracts, np.nan)
+        self._max_buy_rate = {}
+        self._min_sell_rate = {}
+        self._full_update = True
+        # Los exponentes se rearman con cada cambio de día del ClockService
+        self._clock_service = clock_service or clock.ClockService()
+        self._clock_service.register(self._futures)
+        self._clock_service.add_rollover_listener(self._on_rollover)
+        self._days_in_year = self._clock_service.days_in_year()
+        self._book_snapshot = EMPTY_BOOK_SNAPSHOT
+        self._latency_tracer = latency_tracer
+        self._rates_timestamp = 0
+        # (tasas colocadoras, tasas tomadoras, versión): se reemplaza de una sola vez, así
+        # otro hilo puede armar la foto de las tasas sin locks
+        self._published_rates = (self._buy_rates, self._sell_rates, 0)
+        self._rates_snapshot = EMPTY_RATES_SNAPSHOT
+
+    def buy_rate(self):
+        return self._rates_by_maturity(self._buy_rates)
+
+    def sell_rate(self):
+        return self._rates_by_maturity(self._sell_rates)
+
+    def book_snapshot(self):
+        return self._book_snapshot
+
+    def rates_snapshot(self):
+        """
+        Foto inmutable de las tasas. Se arma recién cuando alguien la pide (en el hilo de
+        quien la pide), a partir de los últimos arrays publicados.
+        """
+        buy_rates, sell_rates, version = self._published_rates
+        snapshot = self._rates_snapshot
+        if snapshot.version != version:
+            snapshot = RatesSnapshot(
+                self._read_only(self._rates_by_maturity(buy_rates)),
+                self._read_only(self._rates_by_maturity(sell_rates)),
+                version,
+            )
+            self._rates_snapshot = snapshot
+        return snapshot
+
+    @staticmethod
+    def _read_only(rates_by_maturity):
+        return MappingProxyType(
+            {
+                tradeable_maturity: MappingProxyType(rates)
+                for tradeable_maturity, rates in rates_by_maturity.items()
+            }
+        )
+
+    def rates_timestamp(self):
+        """Timestamp monótono (latency.timestamp) del último recálculo de tasas"""
+        return self._rates_timestamp
+
+    def max_buy_rate(self, tradeable_maturity):
+        return self._max_buy_rate[tradeable_maturity]
+
+    def min_sell_rate(self, tradeable_maturity):
+        return self._min_sell_rate[tradeable_maturity]
+
+    def ready(self):
+        return bool(self._max_buy_rate) and bool(self._min_sell_rate)
+
+    def maturiry_ready_to_trade(self, tradeable_maturity):
+        return (
+            tradeable_maturity in self._max_buy_rate
+            and tradeable_maturity in self._min_sell_rate
+        )
+
+    def _rates_by_maturity(self, rates):
+        rates_by_maturity = {}
+        for tradeable_maturity, start, end in self._segments:
+            values = {
+                self._tickers[i]: float(rates[i])
+                for i in range(start, end)
+                if not np.isnan(rates[i])
+            }
+            if values:
+                rates_by_maturity[tradeable_maturity] = values
+        return rates_by_maturity
+
+    def _load_market_data(
+        self, last_price_underlier, bids, asks, updated_underliers, updated_futures
+    ):
+        """
+        Copia la data de mercado a los arrays.
+        Solo escribe lo que cambió, salvo el primer cálculo del día que refresca todo.
+        """
+        if self._full_update:
+            self._full_update = False
+            updated_underliers = last_price_underlier.keys()
+            updated_futures = self._tickers
+        for ticker in updated_underliers:
+            if ticker in self._underlier_id and ticker in last_price_underlier:
+                self._spots[self._underlier_id[ticker]] = last_price_underlier[ticker]
+        for ticker in updated_futures:
+            contract_id = self._contract_id.get(ticker)
+            if contract_id is None or contract_id in self._retired:
+                continue
+            # Una punta que desapareció (por ejemplo al reconectar) queda en NaN
+            self._bids[contract_id] = bids[ticker].price if ticker in bids else np.nan
+            self._asks[contract_id] = asks[ticker].price if ticker in asks else np.nan
+
+    def _on_rollover(self, day, expired):
+        """
+        Día nuevo: rearma los exponentes desde el cache del ClockService. Los contratos
+        vencidos quedan con exponente y puntas en NaN, fuera de las tasas y de las mejores tasas.
+        """
+        self._full_update = True
+        for future in expired:
+            self._retired.add(self._contract_id[future.ticker])
+        self._exponents = np.array(
+            [
+                np.nan if i in self._retired else self._clock_service.exponent(future)
+                for i, future in enumerate(self._futures)
+            ],
+            dtype=float,
+        )
+        retired = list(self._retired)
+        self._bids[retired] = np.nan
+        self._asks[retired] = np.nan
+
+    def update_rates(self):
+        """
+        Actualiza las tasas de todo el universo y la mejor tasa de cada vencimiento.
+        """
+        self._clock_service.check_rollover()
+        # Como en ImplicitRateCalculator: primero los marcados y después los precios
+        updated_underliers = self._spot_source.pop_updated()
+        updated_futures = self._pyrofex_api.pop_updated()
+        last_price_underlier = self._spot_source.last_prices()
+        self._book_snapshot = self._pyrofex_api.snapshot()
+        self._load_market_data(
+            last_price_underlier,
+            self._book_snapshot.bids,
+            self._book_snapshot.asks,
+            updated_underliers,
+            updated_futures,
+        )
+        spots = self._spots[self._contract_underlier]
+        # TNA = ((1 + Tasa de cambio)^(1/DIAS_DEL_AÑO) - 1))*DIAS_DEL_AÑO
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self._buy_rates = (
+                (self._bids / spots) ** self._exponents - 1
+            ) * self._days_in_year
+            self._sell_rates = (
+                (self._asks / spots) ** self._exponents - 1
+            ) * self._days_in_year
+        self._max_buy_rate = self._best_by_segment(self._buy_rates, np.argmax, -np.inf)
+        self._min_sell_rate = self._best_by_segment(self._sell_rates, np.argmin, np.inf)
+        self._published_rates = (
+            self._buy_rates,
+            self._sell_rates,
+            self._published_rates[2] + 1,
+        )
+        self._rates_timestamp = timestamp()
+        if self._latency_tracer is not None:
+            received = max(
+                self._book_snapshot.received, self._spot_source.last_received()
+            )
+            self._latency_tracer.record(
+                RECEIVE_TO_RATES, received, self._rates_timestamp
+            )
+
+    def _best_by_segment(self, rates, arg_best, missing):
+        """Busca la mejor tasa de cada vencimiento con argmax/argmin sobre su segmento"""
+        rates = np.where(np.isnan(rates), missing, rates)
+        best = {}
+        for tradeable_maturity, start, end in self._segments:
+            i = start + int(arg_best(rates[start:end]))
+            if rates[i] != missing:
+                best[tradeable_maturity] = (self._tickers[i], float(rates[i]))
+        return best
@@ -0,0 +1,194 @@
+import json
+import queue
+import sys
+import threading
+import time
+import traceback
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+LEVELS = {name: level for level, name in LEVEL_NAMES.items()}
+
+# Entradas de la cola que no son mensajes de texto
+_TRADE = "TRADE"
+_FLUSH = "FLUSH"
+
+
+class AsyncLogger:
+    """
+    Logger que no bloquea a quien loguea: los mensajes se encolan en una cola acotada y un
+    hilo aparte los formatea y los escribe. Los mensajes por debajo del nivel se descartan
+    antes de encolar, sin formatear nada. Si la cola está llena el mensaje se descarta y se
+    cuenta en dropped(), nunca se frena al feed de market data.
+    Los trades se escriben además como una línea JSON por trade en trades_path. Son el
+    registro de lo que se mandó, nunca se descartan: con la cola llena se espera lugar.
+    """
+
+    def __init__(self, level=INFO, max_queue=10000, output=None, trades_path=None):
+        self._level = level
+        self._queue = queue.Queue(maxsize=max_queue)
+        # Si no se indica se usa el sys.stdout del momento de escribir
+        self._output = output
+        self._trades_path = trades_path
+        self._trades_file = None
+        self._dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._writing_thread = None
+        self._lock = threading.Lock()
+
+    def level(self):
+        return self._level
+
+    def set_level(self, level):
+        self._level = LEVELS[level.upper()] if isinstance(level, str) else level
+
+    def output(self):
+        """Salida de texto configurada, None si es el sys.stdout del momento"""
+        return self._output
+
+    def set_output(self, output):
+        self._output = output
+
+    def set_trades_path(self, trades_path):
+        self._trades_path = trades_path
+        # El hilo que escribe cierra el archivo anterior y abre el nuevo con el próximo trade
+        self._queue.put((_FLUSH, None, None, None))
+
+    def is_enabled_for(self, level):
+        return level >= self._level
+
+    def dropped(self):
+        return self._dropped
+
+    def _put(self, entry):
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            # Se loguea desde muchos hilos, el contador necesita lock
+            with self._dropped_lock:
+                self._dropped += 1
+
+    def log(self, level, message, *args, exc_info=None):
+        """message se formatea con message % args recién en el hilo que escribe"""
+        if level < self._level:
+            return
+        self._put((level, time.time(), (message, args), exc_info))
+
+    def debug(self, message, *args):
+        self.log(DEBUG, message, *args)
+
+    def info(self, message, *args):
+        self.log(INFO, message, *args)
+
+    def warning(self, message, *args):
+        self.log(WARNING, message, *args)
+
+    def error(self, message, *args):
+        self.log(ERROR, message, *args)
+
+    def exception(self, message, *args):
+        """Como error, con el traceback de la excepción que se está manejando"""
+        self.log(ERROR, message, *args, exc_info=sys.exc_info())
+
+    def trade(self, record, formatter=None):
+        """
+        Registra un trade (dict) como línea JSON. Si INFO está habilitado también se escribe
+        formatter(record) en la salida de texto. Si la cola está llena espera, se llama desde
+        el hilo de seguimiento de las ordenes y no desde el camino crítico.
+        """
+        self._queue.put((_TRADE, time.time(), record, formatter))
+
+    def start(self):
+        with self._lock:
+            if self._writing_thread is not None:
+                return
+            self._writing_thread = threading.Thread(
+                target=self._write, name="logger", daemon=True
+            )
+            self._writing_thread.start()
+
+    def flush(self, timeout=None):
+        """Espera que se escriba todo lo encolado hasta ahora"""
+        if self._writing_thread is None:
+            return
+        done = threading.Event()
+        self._queue.put((_FLUSH, None, done, None))
+        done.wait(timeout)
+
+    def stop(self):
+        if self._writing_thread is None:
+            return
+        self._queue.put(None)
+        self._writing_thread.join()
+        self._writing_thread = None
+
+    def _write(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            try:
+                self._write_entry(*entry)
+            except Exception:
+                # Un mensaje mal formado no puede frenar al logger
+                traceback.print_exc()
+        self._close_trades_file()
+        self._stream().flush()
+
+    def _stream(self):
+        return self._output or sys.stdout
+
+    def _write_entry(self, kind, timestamp, payload, extra):
+        if kind == _FLUSH:
+            self._close_trades_file()
+            self._stream().flush()
+            if payload is not None:
+                payload.set()
+            return
+        if kind == _TRADE:
+            self._write_trade(timestamp, payload, extra)
+            return
+        message, args = payload
+        text = message % args if args else message
+        if extra is not None:
+            text += "\n" + "".join(traceback.format_exception(*extra)).rstrip()
+        self._stream().write(
+            f"{time.strftime('%H:%M:%S', time.localtime(timestamp))}"
+            f".{int(timestamp % 1 * 1000):03d} {LEVEL_NAMES[kind]:<7} {text}\n"
+        )
+        if self._queue.empty():
+            self._stream().flush()
+
+    def _write_trade(self, timestamp, record, formatter):
+        if self._trades_path is not None:
+            if self._trades_file is None:
+                self._trades_file = open(self._trades_path, "a")
+            self._trades_file.write(
+                json.dumps({"timestamp": timestamp, **record}, default=str) + "\n"
+            )
+            self._trades_file.flush()
+        if formatter is not None and self.is_enabled_for(INFO):
+            self._stream().write(formatter(record) + "\n")
+            self._stream().flush()
+
+    def _close_trades_file(self):
+        if self._trades_file is not None:
+            self._trades_file.close()
+            self._trades_file = None
+
+
+_logger = None
+_logger_lock = threading.Lock()
+
+
+def get_logger():
+    """Logger compartido por todo el bot, el hilo que escribe arranca con el primer uso"""
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            _logger = AsyncLogger()
+            _logger.start()
+        return _logger
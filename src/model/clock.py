@@ -0,0 +1,194 @@
+import datetime as dt
+
+import numpy as np
+
+import src.model.expired as exp
+
+
+class SystemClock:
+    """
+    Reloj del sistema
+    """
+
+    def now(self):
+        return dt.datetime.now()
+
+    def today(self):
+        return self.now().date()
+
+
+class FrozenClock(SystemClock):
+    """
+    Reloj que solo avanza cuando se le indica, se usa en los replays.
+    """
+
+    def __init__(self, now):
+        self._now = now
+
+    def now(self):
+        return self._now
+
+    def set(self, now):
+        self._now = now
+
+    def advance(self, delta):
+        self._now += delta
+
+
+_clock = SystemClock()
+
+
+def now():
+    return _clock.now()
+
+
+def today():
+    return _clock.today()
+
+
+def clock():
+    return _clock
+
+
+def set_clock(new_clock):
+    """Reemplaza el reloj global y devuelve el anterior"""
+    global _clock
+    previous_clock, _clock = _clock, new_clock
+    return previous_clock
+
+
+class TradingCalendar:
+    """
+    Cuenta los días al vencimiento. Por defecto son días corridos, con business_days se
+    cuentan solo los días hábiles (sin fines de semana ni los feriados de holidays).
+    days_in_year es la base con la que se anualizan las tasas.
+    """
+
+    def __init__(self, holidays=(), business_days=False, days_in_year=365):
+        self._holidays = np.array(
+            sorted(_as_date(holiday) for holiday in holidays), dtype="datetime64[D]"
+        )
+        self._business_days = business_days
+        self._days_in_year = days_in_year
+
+    def days_in_year(self):
+        return self._days_in_year
+
+    def days_between(self, start, end):
+        """Días entre dos fechas, start incluido y end excluido"""
+        if not self._business_days:
+            return (end - start).days
+        if end <= start:
+            return -int(np.busday_count(end, start, holidays=self._holidays))
+        return int(np.busday_count(start, end, holidays=self._holidays))
+
+
+def _as_date(value):
+    if isinstance(value, dt.datetime):
+        return value.date()
+    if isinstance(value, dt.date):
+        return value
+    return dt.date.fromisoformat(value)
+
+
+class ClockService:
+    """
+    Días al vencimiento y exponentes (1 / días) de los contratos, calculados una sola vez
+    por contrato y por día. La primera consulta de cada día (check_rollover) rearma los
+    caches, retira los contratos vencidos y avisa a los listeners con
+    listener(día, contratos retirados), antes de que nadie calcule una tasa con ellos.
+    Lee la fecha del reloj global, así en los replays sigue al FrozenClock. Un contrato
+    vence cuando llega su fecha, los días del calendario solo definen el exponente.
+    """
+
+    def __init__(self, calendar=None):
+        self._calendar = calendar or TradingCalendar()
+        self._day = None
+        # {ticker: contrato} de los contratos vigentes que se siguen
+        self._futures = {}
+        # {ticker: días al vencimiento} y {ticker: 1 / días} del día actual
+        self._days = {}
+        self._exponents = {}
+        self._rollover_listeners = []
+
+    def calendar(self):
+        return self._calendar
+
+    def days_in_year(self):
+        return self._calendar.days_in_year()
+
+    def day(self):
+        """Día de los caches actuales"""
+        return self._day
+
+    def register(self, futures):
+        """Agrega contratos a seguir, los vencidos se retiran en el próximo check_rollover"""
+        for future in futures:
+            self._futures[future.ticker] = future
+        # Los caches se rearman con la próxima consulta
+        self._day = None
+
+    def add_rollover_listener(self, listener):
+        self._rollover_listeners.append(listener)
+
+    def check_rollover(self):
+        """Si cambió el día rearma los caches y avisa a los listeners. Devuelve si cambió"""
+        day = today()
+        if day == self._day:
+            return False
+        self._roll(day)
+        return True
+
+    def _roll(self, day):
+        self._day = day
+        self._days = {}
+        self._exponents = {}
+        expired = []
+        for ticker, future in list(self._futures.items()):
+            days = self._cache(future, day)
+            if days <= 0:
+                expired.append(future)
+                del self._futures[ticker]
+        for listener in self._rollover_listeners:
+            listener(day, tuple(expired))
+
+    def _cache(self, future, day):
+        maturity_date = future.maturity_date.date()
+        days = self._calendar.days_between(day, maturity_date)
+        # El vencimiento se decide por la fecha: un fin de semana un contrato que vence el
+        # lunes tiene 0 días hábiles pero sigue vigente, y se cuenta como un día
+        if days <= 0 and maturity_date > day:
+            days = 1
+        self._days[future.ticker] = days
+        self._exponents[future.ticker] = 1 / days if days > 0 else None
+        return days
+
+    def days_to_expiry(self, future):
+        """Días al vencimiento del contrato, del cache del día"""
+        days = self._days.get(future.ticker)
+        if days is None:
+            days = self._cache(future, self._day or today())
+        return days
+
+    def is_expired(self, future):
+        return self.days_to_expiry(future) <= 0
+
+    def exponent(self, future):
+        """1 / días al vencimiento, ExpiredInstrument si el contrato ya venció"""
+        exponent = self._exponents.get(future.ticker)
+        if exponent is None:
+            if self.days_to_expiry(future) <= 0:
+                raise exp.ExpiredInstrument(future)
+            exponent = self._exponents[future.ticker]
+        return exponent
+
+
+def clock_service_from_config(config_service):
+    """ClockService con el calendario de la configuración"""
+    return ClockService(
+        TradingCalendar(
+            config_service.get("HOLIDAYS", []),
+            business_days=config_service.get("BUSINESS_DAYS", False),
+            days_in_year=config_service.get("DAYS_YEAR", 365),
+        )
+    )
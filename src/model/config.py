@@ -0,0 +1,133 @@
+import json
+import os
+import signal
+import threading
+from types import MappingProxyType
+
+import pyRofex
+
+from src.model.async_logger import get_logger
+
+DEFAULT_CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "conf", "config.json"
+)
+
+# Claves obligatorias y su tipo
+REQUIRED_KEYS = {
+    "USER": str,
+    "PASS": str,
+    "ACCOUNT": str,
+    "ENVIRONMENT": str,
+    "COST": (int, float),
+}
+
+
+class InvalidConfig(Exception):
+    def __init__(self, path, reason):
+        super().__init__(f"Configuración inválida en {path}: {reason}")
+
+
+class ConfigService:
+    """
+    Carga la configuración una sola vez y la mantiene en memoria.
+    Un hilo aparte mira la fecha de modificación del archivo (o se puede recargar con una
+    señal) y reemplaza la configuración entera de forma atómica, los lectores nunca leen disco.
+    """
+
+    def __init__(self, path=None, watch_interval=1.0):
+        self._path = path or os.environ.get("TASABOT_CONFIG", DEFAULT_CONFIG_PATH)
+        self._watch_interval = watch_interval
+        self._mtime = os.stat(self._path).st_mtime
+        self._config = self._load()
+        self._watching_thread = None
+        self._stop_watching = threading.Event()
+        self._logger = get_logger()
+
+    def __getitem__(self, key):
+        return self._config[key]
+
+    def get(self, key, default=None):
+        return self._config.get(key, default)
+
+    def config(self):
+        """Devuelve la configuración actual, es de solo lectura"""
+        return self._config
+
+    def environment(self):
+        return pyRofex.Environment[self._config["ENVIRONMENT"]]
+
+    def _load(self):
+        with open(self._path) as f:
+            try:
+                config = json.load(f)
+            except json.JSONDecodeError as e:
+                raise InvalidConfig(self._path, e)
+        for key, key_type in REQUIRED_KEYS.items():
+            if key not in config:
+                raise InvalidConfig(self._path, f"falta la clave {key}")
+            if not isinstance(config[key], key_type):
+                raise InvalidConfig(self._path, f"tipo inválido para {key}")
+        if config["ENVIRONMENT"] not in pyRofex.Environment.__members__:
+            raise InvalidConfig(
+                self._path, f"ambiente desconocido {config['ENVIRONMENT']}"
+            )
+        return MappingProxyType(config)
+
+    def reload(self):
+        """Vuelve a leer el archivo, si es inválido se mantiene la configuración anterior"""
+        try:
+            self._mtime = os.stat(self._path).st_mtime
+            self._config = self._load()
+            self._logger.info("Configuración recargada desde %s", self._path)
+            return True
+        except (OSError, InvalidConfig):
+            self._logger.exception(
+                "No se pudo recargar la configuración, se mantiene la anterior"
+            )
+            return False
+
+    def check_for_changes(self):
+        """Recarga la configuración si el archivo cambió"""
+        try:
+            mtime = os.stat(self._path).st_mtime
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        return self.reload()
+
+    def _watch(self):
+        while not self._stop_watching.wait(self._watch_interval):
+            self.check_for_changes()
+
+    def start_watching(self):
+        """Crea un hilo aparte que recarga la configuración cuando cambia el archivo"""
+        if self._watching_thread is not None:
+            return
+        self._stop_watching.clear()
+        self._watching_thread = threading.Thread(target=self._watch, daemon=True)
+        self._watching_thread.start()
+
+    def stop_watching(self):
+        self._stop_watching.set()
+        if self._watching_thread is not None:
+            self._watching_thread.join()
+            self._watching_thread = None
+
+    def reload_on_signal(self, signum=getattr(signal, "SIGHUP", None)):
+        """Recarga la configuración al recibir la señal (solo desde el hilo principal)"""
+        if signum is not None:
+            signal.signal(signum, lambda *_: self.reload())
+
+
+_config_service = None
+_config_service_lock = threading.Lock()
+
+
+def get_config_service():
+    """Devuelve el servicio de configuración compartido, lo crea la primera vez"""
+    global _config_service
+    with _config_service_lock:
+        if _config_service is None:
+            _config_service = ConfigService()
+        return _config_service
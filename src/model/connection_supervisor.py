@@ -0,0 +1,177 @@
+import random
+import time
+
+from src.model.async_logger import get_logger
+
+
+class ConnectionSupervisor:
+    """
+    Dueño de la conexión de una API de market data (PyRofexApi o una fuente spot).
+    Cuando la conexión se cae (los handlers de error llaman a stop) descarta las puntas viejas
+    y reconecta con backoff exponencial con jitter: la primera espera es de initial_backoff
+    segundos y cada intento fallido la multiplica hasta max_backoff. Al reconectar la API
+    vuelve a suscribir la market data, las suscripciones extra y los reportes de ordenes.
+    Si la conexión se mantiene stable_after segundos el backoff vuelve a empezar.
+    Lo llama el loop de trading con poll(), no tiene hilo propio.
+    """
+
+    def __init__(
+        self,
+        api,
+        name,
+        initial_backoff=0.5,
+        max_backoff=30.0,
+        multiplier=2.0,
+        jitter=0.5,
+        stable_after=30.0,
+        wait_for_data=True,
+        time_function=time.monotonic,
+        random_generator=None,
+    ):
+        self._api = api
+        self._name = name
+        self._initial_backoff = initial_backoff
+        self._max_backoff = max_backoff
+        self._multiplier = multiplier
+        # Fracción de la espera que se sortea, así varias conexiones no reconectan juntas
+        self._jitter = jitter
+        self._stable_after = stable_after
+        # Si es True el corte termina cuando llega data nueva, si no al reconectar
+        self._wait_for_data = wait_for_data
+        self._time = time_function
+        self._random = random_generator or random.Random()
+        self._down = False
+        self._attempt = 0
+        self._next_attempt = None
+        self._connected_at = None
+        self._received_at_connect = 0
+        self._gap_start = None
+        self._disconnects = 0
+        self._connections = 0
+        self._failed_attempts = 0
+        self._gaps = []
+        self._logger = get_logger()
+
+    def start(self):
+        """Primera conexión, si falla se reintenta con backoff desde poll"""
+        self._connect(self._time())
+        if not self._down:
+            self._attempt = 0
+
+    def backoff(self, attempt):
+        """Espera antes del intento número attempt (desde 0), con jitter"""
+        delay = min(
+            self._max_backoff, self._initial_backoff * self._multiplier**attempt
+        )
+        return delay * (1.0 - self._jitter * self._random.random())
+
+    def poll(self):
+        """Revisa la conexión y reconecta si ya pasó la espera. Devuelve si está conectada"""
+        now = self._time()
+        if self._api.start_request():
+            if self._gap_start is not None and (
+                not self._wait_for_data
+                or self._api.last_received() != self._received_at_connect
+            ):
+                self._close_gap(now)
+            if self._attempt and now - self._connected_at >= self._stable_after:
+                self._attempt = 0
+            return True
+        if not self._down:
+            self._on_disconnect(now)
+        if now >= self._next_attempt:
+            self._connect(now)
+        return self._api.start_request()
+
+    def time_to_next_attempt(self):
+        """Segundos hasta el próximo intento, None si está conectada"""
+        if not self._down:
+            return None
+        return max(0.0, self._next_attempt - self._time())
+
+    def _on_disconnect(self, now):
+        self._down = True
+        self._disconnects += 1
+        if self._gap_start is None:
+            self._gap_start = now
+        # Las puntas dejan de valer hasta que llegue la foto nueva después de reconectar
+        invalidated = self._api.invalidate_market_data()
+        self._next_attempt = now + self.backoff(self._attempt)
+        self._logger.warning(
+            "Conexión de %s caída, %s instrumentos invalidados. Reconexión en %.2f s",
+            self._name,
+            invalidated,
+            self._next_attempt - now,
+        )
+
+    def _connect(self, now):
+        self._attempt += 1
+        received = self._api.last_received()
+        try:
+            self._api.request_market_data()
+        except Exception:
+            self._failed_attempts += 1
+            self._logger.exception(
+                "No se pudo conectar %s (intento %s)...", self._name, self._attempt
+            )
+            self._api.stop()
+            self._down = True
+            if self._gap_start is None:
+                self._gap_start = now
+            self._next_attempt = now + self.backoff(self._attempt)
+            return
+        self._down = False
+        self._connections += 1
+        self._connected_at = now
+        self._received_at_connect = received
+
+    def _close_gap(self, now):
+        gap = now - self._gap_start
+        self._gaps.append(gap)
+        self._gap_start = None
+        self._logger.info(
+            "%s reconectado después de %.3f s (%s intentos)",
+            self._name,
+            gap,
+            self._attempt,
+        )
+
+    def name(self):
+        return self._name
+
+    def connected(self):
+        return not self._down and self._api.start_request()
+
+    def disconnects(self):
+        return self._disconnects
+
+    def reconnects(self):
+        """Conexiones exitosas sin contar la primera"""
+        return max(0, self._connections - 1)
+
+    def failed_attempts(self):
+        return self._failed_attempts
+
+    def gaps(self):
+        """Duración en segundos de cada corte, de la caída a la primera data nueva"""
+        return list(self._gaps)
+
+    def report(self):
+        return {
+            "disconnects": self._disconnects,
+            "reconnects": self.reconnects(),
+            "failed_attempts": self._failed_attempts,
+            "max_gap": max(self._gaps, default=0.0),
+            "total_gap": sum(self._gaps),
+        }
+
+
+def connection_supervisor_from_config(api, name, config_service, wait_for_data=True):
+    """ConnectionSupervisor con RECONNECT_INITIAL_BACKOFF y RECONNECT_MAX_BACKOFF"""
+    return ConnectionSupervisor(
+        api,
+        name,
+        initial_backoff=config_service.get("RECONNECT_INITIAL_BACKOFF", 0.5),
+        max_backoff=config_service.get("RECONNECT_MAX_BACKOFF", 30.0),
+        wait_for_data=wait_for_data,
+    )
@@ -0,0 +1,97 @@
+from collections import namedtuple
+
+import numpy as np
+
+import src.model.clock as clock
+
+# Resultado del recorrido del libro: monto en pesos del spot a operar, precio límite de cada
+# futuro (el peor nivel que hay que tocar) y la tasa implícita del precio promedio ponderado.
+DepthSize = namedtuple("DepthSize", "amount buy_price sell_price buy_rate sell_rate")
+
+
+class DepthSizer:
+    """
+    Recorre la profundidad de los libros para encontrar el mayor monto a operar cuya
+    diferencia de tasas (calculadas con el precio promedio ponderado por volumen) supera el costo.
+    """
+
+    DAYS_IN_A_YEAR = 365
+
+    def __init__(self, clock_service=None):
+        # Exponentes (1 / días al vencimiento) cacheados por día
+        self._clock_service = clock_service or clock.ClockService()
+        self._days_in_year = self._clock_service.days_in_year()
+
+    def _implicit_rate(self, maturity_price, current_price, exponent):
+        return ((maturity_price / current_price) ** exponent - 1) * self._days_in_year
+
+    @staticmethod
+    def _cumulative(levels):
+        """Cantidad y costo acumulados de los niveles, arrancando en cero"""
+        cumulative_size = np.concatenate(([0.0], np.cumsum(levels.sizes)))
+        cumulative_cost = np.concatenate(
+            ([0.0], np.cumsum(levels.prices * levels.sizes))
+        )
+        return cumulative_size, cumulative_cost
+
+    def size(
+        self,
+        ask_levels,
+        bid_levels,
+        buy_future,
+        sell_future,
+        underlier_sell_price,
+        underlier_buy_price,
+        cost,
+    ):
+        """
+        ask_levels: niveles de venta del futuro que se compra (tasa tomadora).
+        bid_levels: niveles de compra del futuro que se vende (tasa colocadora).
+        Devuelve un DepthSize, o None si ni siquiera el primer nivel supera el costo.
+        """
+        # Pesos de spot por contrato de cada futuro
+        buy_notional = buy_future.future_contract_size * underlier_sell_price
+        sell_notional = sell_future.future_contract_size * underlier_buy_price
+        buy_size, buy_cost = self._cumulative(ask_levels)
+        sell_size, sell_cost = self._cumulative(bid_levels)
+
+        # Los candidatos son los montos donde se termina un nivel de cualquiera de los dos libros
+        max_amount = min(buy_size[-1] * buy_notional, sell_size[-1] * sell_notional)
+        amounts = np.concatenate(
+            (buy_size[1:] * buy_notional, sell_size[1:] * sell_notional)
+        )
+        amounts = np.unique(amounts[(amounts > 0) & (amounts <= max_amount)])
+        if not amounts.size:
+            return None
+
+        buy_quantity = amounts / buy_notional
+        sell_quantity = amounts / sell_notional
+        buy_vwap = np.interp(buy_quantity, buy_size, buy_cost) / buy_quantity
+        sell_vwap = np.interp(sell_quantity, sell_size, sell_cost) / sell_quantity
+        self._clock_service.check_rollover()
+        sell_rates = self._implicit_rate(
+            buy_vwap, underlier_sell_price, self._clock_service.exponent(buy_future)
+        )
+        buy_rates = self._implicit_rate(
+            sell_vwap, underlier_buy_price, self._clock_service.exponent(sell_future)
+        )
+        # La diferencia de tasas solo baja a medida que se recorre el libro
+        profitable = np.flatnonzero(buy_rates - sell_rates > cost)
+        if not profitable.size:
+            return None
+        best = profitable[-1]
+        # Precio límite: el último nivel que hace falta tocar en cada libro
+        buy_level = min(
+            np.searchsorted(buy_size, buy_quantity[best] - 1e-9), len(ask_levels.prices)
+        )
+        sell_level = min(
+            np.searchsorted(sell_size, sell_quantity[best] - 1e-9),
+            len(bid_levels.prices),
+        )
+        return DepthSize(
+            amounts[best],
+            ask_levels.prices[buy_level - 1].item(),
+            bid_levels.prices[sell_level - 1].item(),
+            buy_rates[best].item(),
+            sell_rates[best].item(),
+        )
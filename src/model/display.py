@@ -1,20 +1,90 @@
+import sys
+import threading
+import time
+
 from tabulate import tabulate
 
+from src.model.async_logger import get_logger
+
+# Secuencias ANSI para mover el cursor y borrar
+CURSOR_UP = "\x1b[{}A"
+CURSOR_DOWN = "\x1b[{}B"
+CURSOR_COLUMN = "\x1b[{}G"
+CLEAR_TO_END_OF_LINE = "\x1b[K"
+
+
+class ForeignOutput:
+    """
+    Salida del logger mientras la Display está en pantalla. Escribe en la misma terminal,
+    sin cortar un redibujo a la mitad, y avisa a la Display que el cursor se movió.
+    """
+
+    def __init__(self, display, stream):
+        self._display = display
+        self._stream = stream
+
+    def write(self, text):
+        with self._display._write_lock:
+            self._stream.write(text)
+            self._display._foreign_output = True
+
+    def flush(self):
+        with self._display._write_lock:
+            self._stream.flush()
+
 
 class Display:
     """
-    Muestra las tasas implicitas
+    Muestra las tasas implicitas.
+    Corre en su propio hilo (start/stop) a lo sumo max_refresh_rate veces por segundo, lee la
+    foto inmutable de las tasas del calculador y solo reescribe con secuencias ANSI los
+    pedazos de la tabla que cambiaron, sin frenar al loop de trading. Mientras corre, lo
+    que escribe el logger pasa por un ForeignOutput y la tabla se vuelve a imprimir entera
+    debajo, porque los cambios se dibujan relativos al cursor.
     """
 
     EMPTY_ROW_STR = "*" * 12 + " -> " + "*" * 10
 
-    def __init__(self, implicit_rate_calculator):
+    def __init__(
+        self,
+        implicit_rate_calculator,
+        max_refresh_rate=4.0,
+        full_redraw_interval=5.0,
+        output=None,
+        use_ansi=None,
+    ):
         self._implicit_rate_calculator = implicit_rate_calculator
+        self._refresh_interval = 1.0 / max_refresh_rate
+        # Cada tanto se reimprime toda la tabla, por si otro hilo escribió en la terminal
+        self._full_redraw_interval = full_redraw_interval
+        self._output = output
+        self._use_ansi = use_ansi
+        self._lines = []
+        self._version = None
+        self._last_full_redraw = 0.0
+        self._stop_event = threading.Event()
+        self._display_thread = None
+        self._redraws = 0
+        # Serializa las escrituras de la tabla y las del logger
+        self._write_lock = threading.Lock()
+        # Si otro hilo escribió en la terminal desde el último redibujo
+        self._foreign_output = False
+        self._logger_output = None
+        self._logger = get_logger()
 
-    def print_implicit_rates(self):
-        # Obitiene las tasas implicitas
-        buy_rate = self._implicit_rate_calculator.buy_rate()
-        sell_rate = self._implicit_rate_calculator.sell_rate()
+    def _stream(self):
+        return self._output or sys.stdout
+
+    def _ansi(self):
+        if self._use_ansi is None:
+            return self._stream().isatty()
+        return self._use_ansi
+
+    def redraws(self):
+        return self._redraws
+
+    def table_lines(self, buy_rate, sell_rate):
+        """Arma la tabla de tasas, una columna por vencimiento"""
         buy_rate_print = {
             tradeable_maturity: sorted(
                 [(ticker, rate) for ticker, rate in values.items()], key=lambda x: x[1]
@@ -29,20 +99,20 @@ class Display:
         }
 
         # Llenar las filas vacias con valores
-        tradeable_maturitys = set(buy_rate.keys()).union(set(sell_rate.keys()))
-        max_buyer_entries = max(len(entries) for entries in buy_rate_print.values())
-        max_seller_entries = max(len(entries) for entries in buy_rate_print.values())
+        tradeable_maturitys = sorted(set(buy_rate.keys()).union(set(sell_rate.keys())))
+        max_buyer_entries = max(
+            (len(entries) for entries in buy_rate_print.values()), default=0
+        )
+        max_seller_entries = max(
+            (len(entries) for entries in sell_rate_print.values()), default=0
+        )
         rates_to_print = {}
         for tradeable_maturity in tradeable_maturitys:
-            buyer_values = buy_rate_print.get(
-                tradeable_maturity, [self.EMPTY_ROW_STR] * max_buyer_entries
-            )
+            buyer_values = buy_rate_print.get(tradeable_maturity, [])
             rates_to_print[tradeable_maturity] = [self.EMPTY_ROW_STR] * (
                 max_buyer_entries - len(buyer_values)
             ) + [f"{value[0]:<12} -> {value[1]:10.6f}" for value in buyer_values]
-            seller_values = sell_rate_print.get(
-                tradeable_maturity, [self.EMPTY_ROW_STR] * max_seller_entries
-            )
+            seller_values = sell_rate_print.get(tradeable_maturity, [])
             rates_to_print[tradeable_maturity] += ["+" * 26]
             rates_to_print[tradeable_maturity] += [
                 f"{value[0]:<12} -> {value[1]:10.6f}" for value in seller_values
@@ -50,4 +120,109 @@ class Display:
         table_str = "Tasas Actualizadas:\n" + tabulate(
             rates_to_print, headers="keys", stralign="center", tablefmt="psql"
         )
-        print(table_str, flush=True)
+        return table_str.split("\n")
+
+    def print_implicit_rates(self):
+        """Imprime la tabla completa en el hilo que llama"""
+        rates_snapshot = self._implicit_rate_calculator.rates_snapshot()
+        lines = self.table_lines(rates_snapshot.buy_rates, rates_snapshot.sell_rates)
+        print("\n".join(lines), file=self._stream(), flush=True)
+
+    def refresh(self):
+        """
+        Redibuja la tabla si las tasas cambiaron desde la última vez, o entera si otro hilo
+        escribió en la terminal
+        """
+        rates_snapshot = self._implicit_rate_calculator.rates_snapshot()
+        if not rates_snapshot.buy_rates or (
+            rates_snapshot.version == self._version and not self._foreign_output
+        ):
+            return False
+        self._version = rates_snapshot.version
+        lines = self.table_lines(rates_snapshot.buy_rates, rates_snapshot.sell_rates)
+        now = time.monotonic()
+        with self._write_lock:
+            if (
+                not self._ansi()
+                or self._foreign_output
+                or len(lines) != len(self._lines)
+                or now - self._last_full_redraw > self._full_redraw_interval
+            ):
+                text = "\n".join(lines) + "\n"
+                self._last_full_redraw = now
+            else:
+                text = self._diff(self._lines, lines)
+            self._foreign_output = False
+            self._lines = lines
+            stream = self._stream()
+            stream.write(text)
+            stream.flush()
+        self._redraws += 1
+        return True
+
+    @staticmethod
+    def _diff(old_lines, new_lines):
+        """
+        Secuencias ANSI que reescriben solo el tramo que cambió de cada línea.
+        El cursor queda debajo de la tabla, como después de imprimirla entera.
+        """
+        n_lines = len(new_lines)
+        parts = []
+        for i, (old, new) in enumerate(zip(old_lines, new_lines)):
+            if old == new:
+                continue
+            start = 0
+            while start < min(len(old), len(new)) and old[start] == new[start]:
+                start += 1
+            end_old, end_new = len(old), len(new)
+            while (
+                end_old > start
+                and end_new > start
+                and old[end_old - 1] == new[end_new - 1]
+            ):
+                end_old -= 1
+                end_new -= 1
+            up = n_lines - i
+            parts.append(CURSOR_UP.format(up) + CURSOR_COLUMN.format(start + 1))
+            if len(new) != len(old):
+                parts.append(new[start:] + CLEAR_TO_END_OF_LINE)
+            else:
+                parts.append(new[start:end_new])
+            parts.append(CURSOR_DOWN.format(up) + "\r")
+        return "".join(parts)
+
+    def start(self):
+        if self._display_thread is not None:
+            return
+        if self._ansi():
+            # El logger escribe en la misma terminal, a través de la Display
+            self._logger_output = self._logger.output()
+            self._logger.set_output(
+                ForeignOutput(self, self._logger_output or self._stream())
+            )
+        self._stop_event.clear()
+        self._display_thread = threading.Thread(
+            target=self._run, name="display", daemon=True
+        )
+        self._display_thread.start()
+
+    def stop(self):
+        if self._display_thread is None:
+            return
+        self._stop_event.set()
+        self._display_thread.join()
+        self._display_thread = None
+        if isinstance(self._logger.output(), ForeignOutput):
+            self._logger.set_output(self._logger_output)
+            self._logger_output = None
+
+    def _run(self):
+        while not self._stop_event.wait(self._refresh_interval):
+            try:
+                self.refresh()
+            except Exception:
+                # La pantalla nunca frena al bot, se vuelve a dibujar entera
+                self._lines = []
+                self._logger.exception(
+                    "Excepción mientras se muestran las tasas implícitas..."
+                )
@@ -0,0 +1,97 @@
+import threading
+
+
+class ConflatingSlots:
+    """
+    Un slot fijo por instrumento entre el hilo del websocket y el loop de trading.
+    put escribe el último mensaje de un instrumento en su slot (el último gana) y lo marca
+    sucio; drain devuelve de una vez los instrumentos sucios con su último mensaje. Así una
+    ráfaga de mensajes de un mismo instrumento cuesta un solo procesamiento y el trabajo
+    pendiente nunca es mayor que la cantidad de instrumentos.
+    Con merge, un valor nuevo se combina con el pendiente (merge(pendiente, nuevo)) en
+    lugar de reemplazarlo.
+    """
+
+    def __init__(self, keys=(), merge=None):
+        self._index = {}
+        self._keys = []
+        self._slots = []
+        # Índices de los slots sucios, en el orden en que se ensuciaron
+        self._dirty = []
+        self._received = 0
+        self._conflated = 0
+        self._drains = 0
+        self._max_batch = 0
+        self._merge = merge
+        self._lock = threading.Lock()
+        for key in keys:
+            self._add(key)
+
+    def _add(self, key):
+        self._index[key] = len(self._keys)
+        self._keys.append(key)
+        self._slots.append(None)
+        return self._index[key]
+
+    def put(self, key, value):
+        """
+        Reemplaza (o combina con merge) el valor pendiente de key, devuelve True si había
+        uno sin procesar
+        """
+        with self._lock:
+            i = self._index.get(key)
+            if i is None:
+                i = self._add(key)
+            self._received += 1
+            pending = self._slots[i]
+            conflated = pending is not None
+            if conflated:
+                self._conflated += 1
+                if self._merge is not None:
+                    value = self._merge(pending, value)
+            else:
+                self._dirty.append(i)
+            self._slots[i] = value
+        return conflated
+
+    def pending(self):
+        return bool(self._dirty)
+
+    def drain(self):
+        """Saca los slots sucios, devuelve [(key, último valor)]"""
+        with self._lock:
+            if not self._dirty:
+                return []
+            dirty, self._dirty = self._dirty, []
+            slots = self._slots
+            batch = [(self._keys[i], slots[i]) for i in dirty]
+            for i in dirty:
+                slots[i] = None
+        self._drains += 1
+        self._max_batch = max(self._max_batch, len(batch))
+        return batch
+
+    def clear(self):
+        """Descarta lo pendiente sin procesarlo"""
+        with self._lock:
+            for i in self._dirty:
+                self._slots[i] = None
+            self._dirty = []
+
+    def received(self):
+        return self._received
+
+    def conflated(self):
+        """Mensajes pisados por uno más nuevo del mismo instrumento antes de procesarse"""
+        return self._conflated
+
+    def drains(self):
+        return self._drains
+
+    def report(self):
+        return {
+            "received": self._received,
+            "conflated": self._conflated,
+            "drains": self._drains,
+            "max_batch": self._max_batch,
+        }
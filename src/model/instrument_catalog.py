@@ -0,0 +1,187 @@
+import datetime as dt
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+from dateutil.parser import parse
+
+import src.model.api_wrapper as wrapper
+import src.model.clock as clock
+from src.model.async_logger import get_logger
+from src.model.config import get_config_service
+
+# Instrumento del catálogo de Rofex, con solo los campos que usa el bot
+CatalogInstrument = namedtuple(
+    "CatalogInstrument", "symbol maturity_date contract_multiplier"
+)
+
+DEFAULT_CACHE_PATH = "instruments_cache.json"
+DEFAULT_TTL = 12 * 60 * 60
+
+CACHE_VERSION = 1
+
+
+class InstrumentCatalog:
+    """
+    Catálogo de instrumentos de Rofex compartido por InstrumentHandler y TradeableCheck.
+    Se descarga una sola vez con get_detailed_instruments y se guarda parseado en un archivo
+    local. Mientras el archivo tenga menos de ttl segundos, sea del mismo entorno y no tenga
+    contratos vencidos, los reinicios lo leen de ahí sin llamar a la API REST.
+    """
+
+    def __init__(
+        self,
+        path=DEFAULT_CACHE_PATH,
+        ttl=DEFAULT_TTL,
+        environment=None,
+        instruments=None,
+    ):
+        # Con path None no se usa archivo, solo la copia en memoria
+        self._path = path
+        self._ttl = ttl
+        self._environment = str(environment) if environment is not None else None
+        # Con instruments se usa un catálogo ya cargado (por ejemplo el del feed en un
+        # worker) sin leer el archivo ni llamar a la API
+        self._instruments = list(instruments) if instruments is not None else None
+        self._source = "memory" if instruments is not None else None
+        self._load_seconds = 0.0
+        self._lock = threading.Lock()
+        self._logger = get_logger()
+
+    def instruments(self):
+        """Lista de CatalogInstrument, se carga la primera vez que se pide"""
+        with self._lock:
+            if self._instruments is None:
+                start = time.perf_counter()
+                self._instruments = self._read_cache()
+                self._source = "cache"
+                if self._instruments is None:
+                    self._instruments = self._fetch()
+                    self._source = "api"
+                    self._write_cache(self._instruments)
+                self._load_seconds = time.perf_counter() - start
+                self._logger.info(
+                    "Catálogo de instrumentos: %s instrumentos desde %s en %.3f s",
+                    len(self._instruments),
+                    self._source,
+                    self._load_seconds,
+                )
+            return self._instruments
+
+    def source(self):
+        """De dónde salió el catálogo: "cache", "api", "memory" o None si no se cargó"""
+        return self._source
+
+    def load_seconds(self):
+        return self._load_seconds
+
+    def invalidate(self):
+        """Descarta la copia en memoria y el archivo, la próxima lectura va a la API"""
+        with self._lock:
+            self._instruments = None
+            self._source = None
+            if self._path is not None and os.path.exists(self._path):
+                os.remove(self._path)
+
+    def _fetch(self):
+        response = wrapper.APIWrapper().get_detailed_instruments()
+        return [
+            CatalogInstrument(
+                instrument["instrumentId"]["symbol"],
+                _parse_date(instrument.get("maturityDate")),
+                instrument.get("contractMultiplier", 1.0),
+            )
+            for instrument in response["instruments"]
+        ]
+
+    def _expired(self, instruments, fetched_day):
+        """Si venció algún contrato que estaba vigente cuando se descargó el catálogo"""
+        today = clock.today()
+        return any(
+            instrument.maturity_date is not None
+            and fetched_day <= instrument.maturity_date.date() < today
+            for instrument in instruments
+        )
+
+    def _read_cache(self):
+        """Devuelve los instrumentos del archivo o None si no existe o ya no sirve"""
+        if self._path is None or not os.path.exists(self._path):
+            return None
+        try:
+            with open(self._path) as f:
+                cache = json.load(f)
+            if (
+                cache.get("version") != CACHE_VERSION
+                or cache.get("environment") != self._environment
+                or time.time() - cache["fetched_at"] > self._ttl
+            ):
+                return None
+            fetched_day = dt.date.fromisoformat(cache["fetched_day"])
+            instruments = [
+                CatalogInstrument(
+                    symbol,
+                    dt.datetime.fromisoformat(maturity_date) if maturity_date else None,
+                    contract_multiplier,
+                )
+                for symbol, maturity_date, contract_multiplier in cache["instruments"]
+            ]
+        except (ValueError, KeyError, TypeError):
+            self._logger.warning("Cache de instrumentos inválido: %s", self._path)
+            return None
+        if self._expired(instruments, fetched_day):
+            return None
+        return instruments
+
+    def _write_cache(self, instruments):
+        if self._path is None:
+            return
+        cache = {
+            "version": CACHE_VERSION,
+            "environment": self._environment,
+            "fetched_at": time.time(),
+            "fetched_day": clock.today().isoformat(),
+            "instruments": [
+                [
+                    instrument.symbol,
+                    instrument.maturity_date.isoformat()
+                    if instrument.maturity_date is not None
+                    else None,
+                    instrument.contract_multiplier,
+                ]
+                for instrument in instruments
+            ],
+        }
+        # Se escribe a un temporal y se reemplaza, así un corte no deja el archivo a medias
+        temporary_path = f"{self._path}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(cache, f)
+        os.replace(temporary_path, self._path)
+
+
+def _parse_date(value):
+    """Las fechas de Rofex vienen como AAAAMMDD, el parser genérico queda para el resto"""
+    if not value:
+        return None
+    if len(value) == 8 and value.isdigit():
+        return dt.datetime(int(value[:4]), int(value[4:6]), int(value[6:]))
+    return parse(value)
+
+
+_instrument_catalog = None
+_instrument_catalog_lock = threading.Lock()
+
+
+def get_instrument_catalog():
+    """Devuelve el catálogo compartido, lo crea la primera vez con la configuración"""
+    global _instrument_catalog
+    with _instrument_catalog_lock:
+        if _instrument_catalog is None:
+            config_service = get_config_service()
+            _instrument_catalog = InstrumentCatalog(
+                config_service.get("CATALOG_CACHE", DEFAULT_CACHE_PATH),
+                config_service.get("CATALOG_TTL", DEFAULT_TTL),
+                config_service.environment(),
+            )
+        return _instrument_catalog
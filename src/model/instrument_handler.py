@@ -1,9 +1,9 @@
 import re
-import datetime as dt
-from dateutil.parser import parse
 from collections import defaultdict
+from types import MappingProxyType
+import src.model.clock as clock
 import src.model.expired as exp
-import src.model.api_wrapper as wrapper
+from src.model.instrument_catalog import get_instrument_catalog
 
 
 class FutureContract:
@@ -40,7 +40,7 @@ class FutureContract:
         """
         Cuenta los días hasta el vencimiento del contrato.
         """
-        start_date = start_date or dt.datetime.now()
+        start_date = start_date or clock.now()
         delta = self._maturity_date.date() - start_date.date()
         if delta.days + 1 <= 0:
             raise exp.ExpiredInstrument(self)
@@ -51,19 +51,20 @@ class InstrumentHandler:
     """
     Obtiene el nombre de los tickers y obitiene los transforma tal que el nuevo formato sea compatible con
     yfinance y pyRofex.
+    Los índices de futuros se arman una sola vez y son de solo lectura (MappingProxyType y
+    tuplas), así se comparten sin copiarlos.
     """
 
-    def __init__(self, tickers):
+    def __init__(self, tickers, instrument_catalog=None):
         self._tickers = tickers
-        self._pyrofex_future_underlier = defaultdict(list)
-        self._pyrofex_future_maturity = defaultdict(list)
+        # El catálogo de Rofex se descarga una sola vez y lo comparten todos los handlers
+        self._instrument_catalog = instrument_catalog or get_instrument_catalog()
         self._convert_to_yfinance_ticker = {
             ticker: self.convertion(ticker) for ticker in tickers
         }
         self._reorder_yfinance_tickers = {
             v: k for k, v in self._convert_to_yfinance_ticker.items()
         }
-        self._rofex_instruments_by_ticker = {}
         self._parse_rofex()
 
     @staticmethod
@@ -72,6 +73,9 @@ class InstrumentHandler:
             return "ARS=X"
         return ticker + ".BA"
 
+    def instrument_catalog(self):
+        return self._instrument_catalog
+
     def futures_ticker(self):
         return list(self._rofex_instruments_by_ticker.keys())
 
@@ -83,31 +87,61 @@ class InstrumentHandler:
         return self._reorder_yfinance_tickers
 
     def rofex_instruments_by_underlier(self):
-        return copy.deepcopy(self._pyrofex_future_underlier)
+        return self._pyrofex_future_underlier
 
     def rofex_instruments_by_maturity(self):
-        return copy.deepcopy(self._pyrofex_future_maturity)
+        return self._pyrofex_future_maturity
 
     def rofex_instruments_by_ticker(self):
-        return self._rofex_instruments_by_ticker.copy()
+        return self._rofex_instruments_by_ticker
+
+    @staticmethod
+    def underlier_pattern(tickers):
+        """
+        Un solo patrón para todos los tickers, que matchea el comienzo del símbolo.
+        Los tickers más largos van primero, así "YPFD/..." es de YPFD y no de YPF.
+        """
+        if not tickers:
+            # Un patrón que nunca matchea
+            return re.compile("(?!)")
+        return re.compile(
+            "|".join(
+                re.escape(ticker) for ticker in sorted(tickers, key=len, reverse=True)
+            )
+        )
 
     def _parse_rofex(self):
         """
-        Parsea los instrumentos de rofex y los guarda en un diccionario.
+        Parsea los instrumentos de rofex en una sola pasada y arma los índices.
         """
-        futures_regex = {ticker: re.compile(ticker) for ticker in self._tickers}
-        pyrofex_instruments = wrapper.APIWrapper().get_detailed_instruments()
-        for instrument in pyrofex_instruments["instruments"]:
-            for ticker, regexp in futures_regex.items():
-                if regexp.match(instrument["instrumentId"]["symbol"]):
-                    rofex_ticker = instrument["instrumentId"]["symbol"]
-                    maturity_date = parse(instrument["maturityDate"])
-                    future_contract_size = instrument["contractMultiplier"]
-                    future = FutureContract(
-                        rofex_ticker, ticker, maturity_date, future_contract_size
-                    )
-                    self._pyrofex_future_underlier[ticker].append(future)
-                    self._pyrofex_future_maturity[
-                        rofex_ticker.replace(ticker, "")
-                    ].append(future)
-                    self._rofex_instruments_by_ticker[rofex_ticker] = future
+        pyrofex_future_underlier = defaultdict(list)
+        pyrofex_future_maturity = defaultdict(list)
+        rofex_instruments_by_ticker = {}
+        match_underlier = self.underlier_pattern(self._tickers).match
+        for instrument in self._instrument_catalog.instruments():
+            match = match_underlier(instrument.symbol)
+            if match is None:
+                continue
+            ticker = match.group()
+            rofex_ticker = instrument.symbol
+            future = FutureContract(
+                rofex_ticker,
+                ticker,
+                instrument.maturity_date,
+                instrument.contract_multiplier,
+            )
+            pyrofex_future_underlier[ticker].append(future)
+            pyrofex_future_maturity[rofex_ticker[len(ticker) :]].append(future)
+            rofex_instruments_by_ticker[rofex_ticker] = future
+        self._pyrofex_future_underlier = _freeze(pyrofex_future_underlier)
+        self._pyrofex_future_maturity = _freeze(pyrofex_future_maturity)
+        self._rofex_instruments_by_ticker = MappingProxyType(
+            rofex_instruments_by_ticker
+        )
+
+
+def _freeze(futures_by_key):
+    """{clave: [futuros]} -> mapping de solo lectura {clave: (futuros)}"""
+    return MappingProxyType(
+        {key: tuple(futures) for key, futures in futures_by_key.items()}
+    )
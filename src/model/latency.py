@@ -0,0 +1,162 @@
+import threading
+import time
+
+# Etapas del camino tick-to-trade
+RECEIVE_TO_RATES = "recepción->tasas"
+RATES_TO_DECISION = "tasas->decisión"
+DECISION_TO_SEND = "decisión->envío"
+SEND_TO_ACK = "envío->ack"
+STAGES = (RECEIVE_TO_RATES, RATES_TO_DECISION, DECISION_TO_SEND, SEND_TO_ACK)
+
+PERCENTILES = (50.0, 99.0, 99.9)
+
+
+def timestamp():
+    """Timestamp monótono en nanosegundos, el que se usa en todas las etapas"""
+    return time.perf_counter_ns()
+
+
+class LatencyHistogram:
+    """
+    Histograma log-lineal estilo HDR de latencias en nanosegundos.
+    Los valores menores a 2^SUB_BUCKET_BITS se guardan exactos y los mayores en
+    sub-buckets de cada potencia de dos, con un error relativo menor a 1/2^(SUB_BUCKET_BITS-1).
+    Registrar un valor es O(1) y no aloca memoria.
+    """
+
+    SUB_BUCKET_BITS = 7
+    # Hasta 2^40 ns (~18 minutos), los valores mayores se guardan en el último bucket
+    MAX_BITS = 40
+
+    def __init__(self):
+        self._sub_buckets = 1 << self.SUB_BUCKET_BITS
+        self._half = self._sub_buckets >> 1
+        self._n_buckets = (
+            self._sub_buckets + (self.MAX_BITS - self.SUB_BUCKET_BITS) * self._half
+        )
+        self._counts = [0] * self._n_buckets
+        self._count = 0
+        self._max = 0
+        self._lock = threading.Lock()
+
+    def _index(self, value):
+        if value < self._sub_buckets:
+            return value
+        shift = value.bit_length() - self.SUB_BUCKET_BITS
+        index = (
+            self._sub_buckets + (shift - 1) * self._half + (value >> shift) - self._half
+        )
+        return min(index, self._n_buckets - 1)
+
+    def _value(self, index):
+        """Valor medio del bucket"""
+        if index < self._sub_buckets:
+            return index
+        shift, sub_bucket = divmod(index - self._sub_buckets, self._half)
+        shift += 1
+        return ((sub_bucket + self._half) << shift) + (1 << (shift - 1))
+
+    def record(self, nanoseconds):
+        nanoseconds = max(int(nanoseconds), 0)
+        index = self._index(nanoseconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            if nanoseconds > self._max:
+                self._max = nanoseconds
+
+    def count(self):
+        return self._count
+
+    def max(self):
+        return self._max
+
+    def percentile(self, percentile):
+        """Latencia en nanosegundos por debajo de la cual está el percentile % de los valores"""
+        with self._lock:
+            counts, count, maximum = list(self._counts), self._count, self._max
+        if not count:
+            return 0
+        rank = max(1, int(count * percentile / 100.0 + 0.5))
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(self._value(index), maximum)
+        return maximum
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * self._n_buckets
+            self._count = 0
+            self._max = 0
+
+
+class LatencyTracer:
+    """
+    Registra la latencia de cada etapa del camino tick-to-trade en un histograma por etapa y
+    cada report_interval segundos imprime p50/p99/p99.9 del intervalo desde un hilo aparte.
+    """
+
+    def __init__(self, report_interval=10.0, output=print):
+        self._report_interval = report_interval
+        self._output = output
+        self._histograms = {stage: LatencyHistogram() for stage in STAGES}
+        self._stop_event = threading.Event()
+        self._reporting_thread = None
+
+    def histogram(self, stage):
+        return self._histograms[stage]
+
+    def record(self, stage, start, end=None):
+        """Registra end - start (timestamps de timestamp()), si start es 0 no hay dato"""
+        if not start:
+            return
+        self._histograms[stage].record((end or timestamp()) - start)
+
+    def report(self):
+        """{etapa: (cantidad, p50, p99, p99.9, máximo)} en microsegundos"""
+        return {
+            stage: (
+                histogram.count(),
+                *(histogram.percentile(p) / 1e3 for p in PERCENTILES),
+                histogram.max() / 1e3,
+            )
+            for stage, histogram in self._histograms.items()
+        }
+
+    def format_report(self):
+        lines = [
+            f"{'Latencias (us)':<18} {'n':>8} {'p50':>10} {'p99':>10} {'p99.9':>10} {'max':>10}"
+        ]
+        for stage, (count, p50, p99, p999, maximum) in self.report().items():
+            lines.append(
+                f"{stage:<18} {count:>8} {p50:>10.1f} {p99:>10.1f} {p999:>10.1f} {maximum:>10.1f}"
+            )
+        return "\n".join(lines)
+
+    def dump(self):
+        """Imprime el reporte y empieza un intervalo nuevo"""
+        self._output(self.format_report())
+        for histogram in self._histograms.values():
+            histogram.reset()
+
+    def start(self):
+        if self._reporting_thread is not None:
+            return
+        self._stop_event.clear()
+        self._reporting_thread = threading.Thread(target=self._report_loop, daemon=True)
+        self._reporting_thread.start()
+
+    def stop(self):
+        """Frena el reporte periódico e imprime lo que quedó del último intervalo"""
+        if self._reporting_thread is None:
+            return
+        self._stop_event.set()
+        self._reporting_thread.join()
+        self._reporting_thread = None
+        self.dump()
+
+    def _report_loop(self):
+        while not self._stop_event.wait(self._report_interval):
+            self.dump()
@@ -1,13 +1,19 @@
-import copy
-import sys
 import threading
 import time
-import traceback
-from collections import defaultdict, namedtuple
-from pprint import pprint
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+from types import MappingProxyType
 import src.model.api_wrapper as wrapper
+import src.model.market_recorder as recorder
+from src.model.async_logger import get_logger
+from src.model.ingestion import ConflatingSlots
+from src.model.latency import timestamp
+from src.model.order_tracker import OrderTracker
 
+import numpy as np
 import pyRofex
+import requests
+import requests.adapters
 import yfinance
 
 ZERO_LIMIT = 1e-4
@@ -20,11 +26,65 @@ ZERO_LIMIT = 1e-4
 
 OrderBook = namedtuple("OrderBook", "price size")
 
+# Niveles de precio de una punta, en arrays de NumPy ordenados del mejor al peor precio.
+PriceLevels = namedtuple("PriceLevels", "prices sizes")
+
+# Foto inmutable de las puntas de Rofex. El handler reemplaza la foto entera en cada mensaje
+# (copy-on-write) y le suma uno a la secuencia; los lectores solo leen la referencia, sin copiar
+# ni tomar locks. bids y asks son MappingProxyType para que no se puedan modificar.
+# bid_levels y ask_levels tienen la profundidad completa (PriceLevels) de cada ticker.
+# received es el timestamp monótono (latency.timestamp) del mensaje que generó la foto.
+BookSnapshot = namedtuple(
+    "BookSnapshot",
+    "bids asks sequence bid_levels ask_levels received",
+    defaults=(MappingProxyType({}), MappingProxyType({}), 0),
+)
+
+EMPTY_BOOK_SNAPSHOT = BookSnapshot(MappingProxyType({}), MappingProxyType({}), 0)
+
+
+def price_levels(md_entries, descending):
+    """Arma los niveles de precio de una punta a partir de las entradas del mensaje"""
+    prices = np.fromiter(
+        (entry["price"] for entry in md_entries), float, len(md_entries)
+    )
+    sizes = np.fromiter((entry["size"] for entry in md_entries), float, len(md_entries))
+    order = np.argsort(-prices if descending else prices, kind="stable")
+    return PriceLevels(prices[order], sizes[order])
+
+
+def merge_market_data(pending, update):
+    """
+    Combina dos (market data, recibido) de un mismo instrumento por punta: si el mensaje
+    nuevo no trae una punta se conserva la del pendiente, igual que al aplicarlos en orden.
+    """
+    market_data, received = update
+    pending_market_data, _ = pending
+    merged = dict(market_data)
+    for entry in (
+        pyRofex.MarketDataEntry.BIDS.value,
+        pyRofex.MarketDataEntry.OFFERS.value,
+    ):
+        if not merged.get(entry):
+            merged[entry] = pending_market_data.get(entry)
+    return merged, received
+
 
 class ApiData:
     def __init__(self):
         self._last_update_api = 0.0
         self._start_request = False
+        # Condición compartida con DataUpdate para despertar al loop de trading
+        self._update_condition = None
+        # Instrumentos que cambiaron desde la última lectura del calculador de tasas
+        self._updated = set()
+        self._updated_lock = threading.Lock()
+        # Grabador de market data, si está configurado
+        self._recorder = None
+        # Timestamp monótono de recepción de la última data nueva
+        self._last_received = 0
+        # Los mensajes se formatean y escriben en otro hilo
+        self._logger = get_logger()
 
     # Las clases base definidas por el usuario pueden generar NotImplementedError
     # para indicar que una subclase debe definir un método o comportamiento, simulando una interfaz.
@@ -34,71 +94,250 @@ class ApiData:
     def start_request(self):
         return self._start_request
 
+    def invalidate_market_data(self):
+        """
+        Descarta la data que dejó de valer por un corte de conexión. Devuelve la cantidad de
+        instrumentos descartados, por defecto no se descarta nada.
+        """
+        return 0
+
     def stop(self):
         self._start_request = False
+        # Despierta al loop de trading para que pueda reconectar
+        self._notify_update()
 
     def last_update_api(self):
         return self._last_update_api
 
+    def last_received(self):
+        return self._last_received
+
+    def pop_updated(self):
+        """Devuelve los instrumentos que cambiaron desde la última llamada y los limpia"""
+        with self._updated_lock:
+            updated, self._updated = self._updated, set()
+        return updated
+
+    def _mark_updated(self, instrument):
+        with self._updated_lock:
+            self._updated.add(instrument)
+
+    def set_recorder(self, market_recorder):
+        self._recorder = market_recorder
+
+    def set_update_condition(self, update_condition):
+        self._update_condition = update_condition
+
+    def _notify_update(self):
+        if self._update_condition is not None:
+            with self._update_condition:
+                self._update_condition.notify_all()
+
     def _update_last_update_api(self):
         self._last_update_api = time.time()
+        self._notify_update()
+
+
+class SpotSource(ApiData):
+    """
+    Fuente de precios spot de los subyacentes, la usan el calculador de tasas y la Strategy.
+    Los precios se reemplazan enteros en cada actualización (copy-on-write), así se leen
+    desde cualquier hilo sin copiarlos.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._prices = {}
 
+    def last_prices(self):
+        """{subyacente: precio} de solo lectura"""
+        return MappingProxyType(self._prices)
+
+    def price(self, ticker):
+        return self._prices.get(ticker, 0.0)
 
-class YfinanceAPI(ApiData):
+    def _set_prices(self, prices, received=None):
+        """
+        Publica precios nuevos {subyacente: precio}. Solo marca y graba los que se movieron
+        más que ZERO_LIMIT, en cualquier dirección. Devuelve los que cambiaron.
+        """
+        changed = {
+            underlier: price
+            for underlier, price in prices.items()
+            if abs(price - self._prices.get(underlier, 0.0)) > ZERO_LIMIT
+        }
+        if not changed:
+            return changed
+        new_prices = dict(self._prices)
+        new_prices.update(changed)
+        self._prices = new_prices
+        for underlier, price in changed.items():
+            self._mark_updated(underlier)
+            if self._recorder is not None:
+                self._recorder.record(underlier, recorder.SPOT, price, 0)
+        self._last_received = received or timestamp()
+        self._update_last_update_api()
+        return changed
+
+
+class YfinanceAPI(SpotSource):
     """
-    Pide Data a Yahoo Finance, se actualiza cada un periodo determinado
+    Pide Data a Yahoo Finance, se actualiza cada un periodo determinado.
+    Queda como alternativa a la fuente por websocket de Rofex.
+    Cada ticker se pide por separado en un pool de a lo sumo max_workers hilos que comparten
+    una sesión HTTP, y cada precio se publica apenas llega, así un ticker lento no demora al
+    resto. Si los precios no se mueven durante QUIET_POLLS consultas (mercado cerrado) o fallan
+    todos los pedidos, el período se duplica hasta max_interval.
     """
 
-    def __init__(self, instrument_handler, update_frequency, tradeable_check):
+    # Consultas seguidas sin cambios antes de empezar a espaciar
+    QUIET_POLLS = 10
+
+    def __init__(
+        self,
+        instrument_handler,
+        update_frequency,
+        tradeable_check,
+        max_workers=8,
+        max_interval=60.0,
+        request_timeout=5.0,
+        session=None,
+    ):
         super().__init__()
         self._tickers = tradeable_check.tradeable_yfinance_tickers()
         self._reorder_tickers = instrument_handler.reorder_yfinance_tickers
         self._update_frequency = update_frequency
+        self._interval = update_frequency
+        self._max_interval = max(max_interval, update_frequency)
+        self._request_timeout = request_timeout
+        self._max_workers = max(1, min(max_workers, len(self._tickers)))
+        self._session = session or self._create_session(self._max_workers)
+        self._yfinance_tickers = {
+            ticker: yfinance.Ticker(ticker, session=self._session)
+            for ticker in self._tickers
+        }
+        self._quiet_polls = 0
+        self._failed_polls = 0
+        self._poll_seconds = 0.0
+        # {subyacente: time.monotonic() de la última respuesta válida}
+        self._fetched_at = {}
+        self._stop_event = threading.Event()
         self._listening_thread = None
-        self._prices = {}
+
+    @staticmethod
+    def _create_session(pool_size):
+        """Sesión con conexiones keep-alive para todos los hilos del pool"""
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        session.mount("https://", adapter)
+        return session
+
+    def poll_seconds(self):
+        """Duración de la última consulta completa, en segundos"""
+        return self._poll_seconds
+
+    def interval(self):
+        """Período actual entre consultas, en segundos"""
+        return self._interval
+
+    def staleness(self):
+        """{subyacente: segundos desde la última respuesta válida de Yahoo Finance}"""
+        now = time.monotonic()
+        return {
+            self._reorder_tickers[ticker]: now - self._fetched_at[ticker]
+            if ticker in self._fetched_at
+            else float("inf")
+            for ticker in self._tickers
+        }
+
+    def _fetch_price(self, ticker):
+        """Último cierre diario de un ticker, None si Yahoo Finance no devolvió nada"""
+        data = self._yfinance_tickers[ticker].history(
+            period="1d", interval="1d", timeout=self._request_timeout
+        )
+        if data.empty:
+            return None
+        return float(data["Close"].iloc[-1])
+
+    def poll(self, executor):
+        """
+        Hace una consulta de todos los tickers y publica los que cambiaron a medida que
+        llegan. Devuelve (cantidad de precios que cambiaron, cantidad de errores).
+        """
+        start = time.monotonic()
+        n_changed = n_errors = 0
+        futures = {
+            executor.submit(self._fetch_price, ticker): ticker
+            for ticker in self._tickers
+        }
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                price = future.result()
+            except Exception as e:
+                n_errors += 1
+                self._logger.warning("Error pidiendo %s a Yahoo Finance: %s", ticker, e)
+                continue
+            if price is None or price != price:
+                n_errors += 1
+                continue
+            self._fetched_at[ticker] = time.monotonic()
+            changed = self._set_prices({self._reorder_tickers[ticker]: price})
+            if changed:
+                n_changed += 1
+                self._logger.info("Actualizada %s", changed)
+        self._poll_seconds = time.monotonic() - start
+        return n_changed, n_errors
+
+    def _next_interval(self, n_changed, n_errors):
+        """Vuelve al período configurado con cada cambio y lo duplica si no pasa nada"""
+        self._failed_polls = (
+            self._failed_polls + 1 if n_errors == len(self._tickers) else 0
+        )
+        self._quiet_polls = 0 if n_changed else self._quiet_polls + 1
+        backoff = self._failed_polls + max(0, self._quiet_polls - self.QUIET_POLLS)
+        self._interval = min(
+            self._update_frequency * 2 ** min(backoff, 32), self._max_interval
+        )
+        return self._interval
 
     def _update_prices(self):
         """Pide data de Yahoo Finance"""
-        while self._start_request:
-            try:
-                data = yfinance.download(
-                    tickers=self._tickers, period="1d", interval="1d", progress=False
-                )
-                start = time.time()
-                prices = data["Close"].to_dict(orient="records")[0]
-                # Si la diferencia es mayor al limite de tolerancia, se actualiza
-                if any(
-                    (
-                        price - self._prices.get(self._reorder_tickers[ticker], 0.0)
-                        > ZERO_LIMIT
+        with ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix="yfinance"
+        ) as executor:
+            while self._start_request:
+                try:
+                    interval = self._next_interval(*self.poll(executor))
+                except Exception:
+                    self._logger.exception(
+                        "Excepcion ocurrio actualizando Yahoo Finance... terminando..."
                     )
-                    for ticker, price in prices.items()
-                ):
-                    self._prices = {
-                        self._reorder_tickers[ticker]: price
-                        for ticker, price in prices.items()
-                    }
-                    self._update_last_update_api()
-                    print(f"Actualizada {self._prices}\n", flush=True)
-                time.sleep(self._update_frequency)
-            except Exception as e:
-                traceback.print_exc()
-                print(f"Excepcion ocurrio actualizando Yahoo Finance... terminando...")
-                self.stop()
+                    self.stop()
+                    break
+                if interval > self._update_frequency:
+                    self._logger.debug(
+                        "Yahoo Finance: próxima consulta en %.1f s", interval
+                    )
+                # El tiempo de la consulta se descuenta del período
+                self._stop_event.wait(max(0.0, interval - self._poll_seconds))
 
     def request_market_data(self):
         """Crea un hilo aparte para el request de Yahoo Finance"""
-        print("Conectando...")
-        self._listening_thread = threading.Thread(target=self._update_prices)
+        self._logger.info("Conectando a Yahoo Finance...")
+        self._stop_event.clear()
+        self._listening_thread = threading.Thread(
+            target=self._update_prices, name="yfinance", daemon=True
+        )
         self._start_request = True
         self._listening_thread.start()
-        print("Comenzó!")
-
-    def last_prices(self):
-        return self._prices.copy()
+        self._logger.info("Comenzó!")
 
-    def price(self, ticker):
-        return self._prices.get(ticker, 0.0)
+    def stop(self):
+        super().stop()
+        self._stop_event.set()
 
 
 class PyRofexApi(ApiData):
@@ -111,72 +350,165 @@ class PyRofexApi(ApiData):
 
     BIDS_OFFERS = [pyRofex.MarketDataEntry.BIDS, pyRofex.MarketDataEntry.OFFERS]
 
-    def __init__(self, tradeable_check, subscribe_to_order_report=False):
+    # Tiempo máximo que se espera el reporte final de una orden, en segundos
+    ORDER_STATUS_TIMEOUT = 5.0
+
+    def __init__(
+        self, tradeable_check, subscribe_to_order_report=True, depth=1, conflate=False
+    ):
         super().__init__()
         self._futures_ticker = tradeable_check.tradeable_rofex_futures_tickers()
+        # Con conflate el websocket deja el último mensaje de cada futuro en su slot y las
+        # puntas se arman por lotes desde el loop de trading
+        self._ingestion = (
+            ConflatingSlots(self._futures_ticker, merge=merge_market_data)
+            if conflate
+            else None
+        )
+        self._drain_lock = threading.Lock()
+        # Cantidad de niveles del libro que se piden a Rofex
+        self._depth = depth
         self._subscribe_to_order_report = subscribe_to_order_report
         self._pyrofex_wrapper = wrapper.APIWrapper()
-        self._bids = {}
-        self._asks = {}
-        # lock es usado para evitar que se actualice la data de Rofex mientras se está actualizando
-        self._bids_lock = threading.Lock()
-        self._asks_lock = threading.Lock()
+        # Estado de las ordenes propias, alimentado por los reportes del websocket
+        self._order_tracker = OrderTracker()
+        self._snapshot = EMPTY_BOOK_SNAPSHOT
+        # lock es usado solo entre escritores, los lectores leen la referencia a la foto
+        self._snapshot_lock = threading.Lock()
+        # Instrumentos que no son futuros (por ejemplo los spot) suscriptos en la misma
+        # sesión de websocket: símbolo -> listener(message, received)
+        self._market_data_listeners = {}
+        self._extra_subscriptions = []
+        # listener(message) por cada reporte de orden, en el hilo del websocket
+        self._order_report_listeners = []
 
     def __str__(self):
+        snapshot = self._snapshot
         repr_str = ""
-        all_tickers = set(self._bids.keys()).union(set(self._asks.keys()))
+        all_tickers = set(snapshot.bids.keys()).union(set(snapshot.asks.keys()))
         for ticker in all_tickers:
             repr_str += (
                 f"{ticker}: "
-                f'{self._bids[ticker].get(pyRofex.MarketDataEntry.BIDS.value, "-")}'
-                f'{self._asks[ticker].get(pyRofex.MarketDataEntry.OFFERS.value, "-")}'
+                f'{snapshot.bids.get(ticker, "-")} '
+                f'{snapshot.asks.get(ticker, "-")}\n'
             )
         return repr_str
 
     def _market_data_handler(self, message):
         """
         Maneja los mensajes de datos de mercado recibidos a través de websocket
-        Analiza los datos y mantiene la información de oferta/demanda para cada ticker
-
+        Analiza los datos y mantiene la información de oferta/demanda para cada ticker.
+        Con conflate el mensaje solo se deja en el slot del ticker y las puntas se arman
+        en el próximo snapshot(), con el último mensaje de cada ticker.
         """
+        received = timestamp()
         try:
-            print(f"Mensaje: Market Data de Rofex ... {message}\n", flush=True)
+            # Se formatea solo si DEBUG está habilitado, en el hilo del logger
+            self._logger.debug("Mensaje: Market Data de Rofex ... %s", message)
             ticker = message["instrumentId"]["symbol"]
+            listener = self._market_data_listeners.get(ticker)
+            if listener is not None:
+                listener(message, received)
+                return
             market_data = message["marketData"]
-            if market_data[pyRofex.MarketDataEntry.OFFERS.value]:
-                md_entry = market_data[pyRofex.MarketDataEntry.OFFERS.value][0]
-                with self._asks_lock:
-                    self._asks[ticker] = OrderBook(md_entry["price"], md_entry["size"])
-            if market_data[pyRofex.MarketDataEntry.BIDS.value]:
-                md_entry = market_data[pyRofex.MarketDataEntry.BIDS.value][0]
-                with self._bids_lock:
-                    self._bids[ticker] = OrderBook(md_entry["price"], md_entry["size"])
+            if self._recorder is not None:
+                # Se graba cada mensaje antes de la conflación, así el replay ve todos
+                self._record_top_of_book(ticker, market_data)
+            if self._ingestion is not None:
+                self._ingestion.put(ticker, (market_data, received))
+            else:
+                self._apply_market_data([(ticker, (market_data, received))])
             self._update_last_update_api()
-        except Exception as e:
-            traceback.print_exc()
-            print(
-                f"Excepcion durante el manejo de Market Data de Rofex... terminando..."
+        except Exception:
+            self._logger.exception(
+                "Excepcion durante el manejo de Market Data de Rofex... terminando..."
             )
             self.stop()
 
+    def _apply_market_data(self, updates):
+        """
+        Arma una sola foto nueva con un lote de (ticker, (market data, recibido)), copiando
+        los mappings una vez por lote y no por mensaje.
+        """
+        levels = []
+        for ticker, (market_data, received) in updates:
+            offers = market_data[pyRofex.MarketDataEntry.OFFERS.value]
+            bids = market_data[pyRofex.MarketDataEntry.BIDS.value]
+            if offers or bids:
+                levels.append(
+                    (
+                        ticker,
+                        price_levels(bids, descending=True) if bids else None,
+                        price_levels(offers, descending=False) if offers else None,
+                        received,
+                    )
+                )
+        if not levels:
+            return
+        with self._snapshot_lock:
+            snapshot = self._snapshot
+            bids, asks = dict(snapshot.bids), dict(snapshot.asks)
+            bid_levels, ask_levels = dict(snapshot.bid_levels), dict(
+                snapshot.ask_levels
+            )
+            for ticker, ticker_bid_levels, ticker_ask_levels, _ in levels:
+                for ticker_levels, top_of_book, levels_by_ticker in (
+                    (ticker_bid_levels, bids, bid_levels),
+                    (ticker_ask_levels, asks, ask_levels),
+                ):
+                    if ticker_levels is not None:
+                        top_of_book[ticker] = OrderBook(
+                            ticker_levels.prices[0].item(),
+                            ticker_levels.sizes[0].item(),
+                        )
+                        levels_by_ticker[ticker] = ticker_levels
+            received = max(update[3] for update in levels)
+            new_snapshot = snapshot._replace(
+                bids=MappingProxyType(bids),
+                asks=MappingProxyType(asks),
+                bid_levels=MappingProxyType(bid_levels),
+                ask_levels=MappingProxyType(ask_levels),
+                sequence=snapshot.sequence + 1,
+                received=received,
+            )
+            self._snapshot = new_snapshot
+        self._last_received = received
+        for ticker, _, _, _ in levels:
+            self._mark_updated(ticker)
+
+    def _record_top_of_book(self, ticker, market_data):
+        """Graba la mejor punta de cada lado que trae el mensaje"""
+        bids = market_data[pyRofex.MarketDataEntry.BIDS.value]
+        if bids:
+            bid = max(bids, key=lambda level: level["price"])
+            self._recorder.record(ticker, recorder.BID, bid["price"], bid["size"])
+        offers = market_data[pyRofex.MarketDataEntry.OFFERS.value]
+        if offers:
+            offer = min(offers, key=lambda level: level["price"])
+            self._recorder.record(ticker, recorder.OFFER, offer["price"], offer["size"])
+
     def _order_report_handler(self, message):
-        print("============ Reporte de la Orden ==============")
-        pprint(message)
-        print("=========================================================")
-        sys.stdout.flush()
+        try:
+            self._order_tracker.on_order_report(message)
+            for listener in self._order_report_listeners:
+                listener(message)
+        except Exception:
+            self._logger.exception(
+                "Excepcion durante el manejo del Reporte de la Orden..."
+            )
 
     def _error_handler(self, message):
-        print(f"Error de Rofex: {message}")
+        self._logger.error("Error de Rofex: %s", message)
         self.stop()
 
     # Cambie message por e
     def _exception_handler(self, e):
-        print(f"Excepción de Rofex: {e.message}")
+        self._logger.error("Excepción de Rofex: %s", getattr(e, "message", e))
         self.stop()
 
     def request_market_data(self):
         """Pide data de PyRofex"""
-        print("Conectando...")
+        self._logger.info("Conectando a Rofex...")
         self._start_request = True
         self._pyrofex_wrapper.init_websocket_connection(
             market_data_handler=self._market_data_handler,
@@ -185,32 +517,110 @@ class PyRofexApi(ApiData):
             exception_handler=self._exception_handler,
         )
         self._pyrofex_wrapper.market_data_subscription(
-            tickers=self._futures_ticker, entries=self.BIDS_OFFERS
+            tickers=self._futures_ticker, entries=self.BIDS_OFFERS, depth=self._depth
         )
+        for tickers, entries in self._extra_subscriptions:
+            self._pyrofex_wrapper.market_data_subscription(
+                tickers=tickers, entries=entries
+            )
         # Poner suscribe como True para que se suscriba a los reportes de ordenes
         if self._subscribe_to_order_report:
             self._pyrofex_wrapper.order_report_subscription()
-        print("Comenzó!")
+        self._logger.info("Comenzó!")
 
     def stop(self):
         super().stop()
         self._pyrofex_wrapper.close_websocket_connection_safely()
 
+    def invalidate_market_data(self):
+        """
+        Vacía las puntas después de un corte: hasta que Rofex mande la foto nueva de cada
+        futuro no hay puntas ni tasas, así no se opera contra precios viejos.
+        """
+        if self._ingestion is not None:
+            self._ingestion.clear()
+        with self._snapshot_lock:
+            snapshot = self._snapshot
+            stale = set(snapshot.bids).union(snapshot.asks)
+            self._snapshot = EMPTY_BOOK_SNAPSHOT._replace(
+                sequence=snapshot.sequence + 1, received=timestamp()
+            )
+        for ticker in stale:
+            self._mark_updated(ticker)
+        self._update_last_update_api()
+        return len(stale)
+
+    def add_order_report_listener(self, listener):
+        """listener(message) recibe cada reporte de orden después del OrderTracker"""
+        self._order_report_listeners.append(listener)
+
+    def add_market_data_listener(self, tickers, listener, entries=None):
+        """
+        Suscribe tickers que no son futuros por la misma sesión de websocket. Sus mensajes no
+        tocan las puntas de los futuros, se pasan a listener(message, received). La suscripción
+        se repite en cada reconexión.
+        """
+        tickers = list(tickers)
+        entries = entries or self.BIDS_OFFERS
+        for ticker in tickers:
+            self._market_data_listeners[ticker] = listener
+        self._extra_subscriptions.append((tickers, entries))
+        if self._start_request:
+            self._pyrofex_wrapper.market_data_subscription(
+                tickers=tickers, entries=entries
+            )
+
+    def pop_updated(self):
+        """Con conflate primero aplica los pendientes, así se devuelven marcados"""
+        self._drain()
+        return super().pop_updated()
+
+    def snapshot(self):
+        """
+        Devuelve la foto actual de las puntas, es inmutable y no hace falta copiarla.
+        Con conflate primero aplica los mensajes pendientes en un solo lote.
+        """
+        self._drain()
+        return self._snapshot
+
+    def _drain(self):
+        if self._ingestion is not None and self._ingestion.pending():
+            # Un lote se aplica entero antes de sacar el siguiente, así uno viejo nunca
+            # pisa a uno nuevo
+            with self._drain_lock:
+                self._apply_market_data(self._ingestion.drain())
+
     def asks(self):
-        with self._asks_lock:
-            copied = copy.deepcopy(self._asks)
-        return copied
+        return self.snapshot().asks
 
     def bids(self):
-        with self._bids_lock:
-            copied = copy.deepcopy(self._bids)
-        return copied
+        return self.snapshot().bids
+
+    def ingestion(self):
+        """Slots de conflación, None si los mensajes se aplican de a uno"""
+        return self._ingestion
 
     def place_order(self, *args, **kwargs):
         return self._pyrofex_wrapper.send_order(*args, **kwargs)
 
+    def next_account(self):
+        """Cuenta por la que salen las patas del próximo trade"""
+        return self._pyrofex_wrapper.next_account()
+
     def get_order_status(self, *args, **kwargs):
         return self._pyrofex_wrapper.get_order_status(*args, **kwargs)
 
-    def order_execution_status(self, order_id):
-        return self.get_order_status(order_id)["order"]["status"]
+    def order_tracker(self):
+        return self._order_tracker
+
+    def order_execution_status(self, order_id, timeout=ORDER_STATUS_TIMEOUT):
+        """
+        Estado de la orden según los reportes del websocket, sin consultar por REST.
+        Espera hasta timeout segundos que la orden llegue a un estado final.
+        """
+        final_state = self._order_tracker.wait_for_state(order_id)
+        try:
+            return final_state.result(timeout).status
+        except TimeoutError:
+            self._order_tracker.cancel_wait(order_id, final_state)
+            return self._order_tracker.status(order_id)
@@ -0,0 +1,176 @@
+import datetime as dt
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+from src.model.async_logger import get_logger
+
+# Registro de ancho fijo (32 bytes): timestamp, id del instrumento, punta, precio y size.
+RECORD = struct.Struct("<dIB3xdd")
+RECORD_DTYPE = np.dtype(
+    [
+        ("timestamp", "<f8"),
+        ("instrument", "<u4"),
+        ("side", "u1"),
+        ("padding", "V3"),
+        ("price", "<f8"),
+        ("size", "<f8"),
+    ]
+)
+assert RECORD.size == RECORD_DTYPE.itemsize
+
+BID = 0
+OFFER = 1
+SPOT = 2
+
+RECORDS_SUFFIX = ".bin"
+SYMBOLS_SUFFIX = ".symbols"
+
+
+class MarketDataRecorder:
+    """
+    Graba cada actualización de puntas y de spot en un log binario de ancho fijo, un archivo
+    por día. Los hilos de market data solo encolan, un hilo aparte empaqueta y escribe a disco.
+    Los ids de los instrumentos se listan, uno por línea, en el archivo .symbols del día.
+    """
+
+    def __init__(self, directory, prefix="market_data", flush_interval=0.5):
+        self._directory = directory
+        self._prefix = prefix
+        self._flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()
+        self._writing_thread = None
+        self._instrument_ids = {}
+        self._day = None
+        self._records_file = None
+        self._symbols_file = None
+        self._recorded = 0
+        self._logger = get_logger()
+
+    def record(self, instrument, side, price, size, timestamp=None):
+        """Encola una actualización, nunca bloquea al hilo que llama"""
+        self._queue.put(
+            (timestamp or time.time(), instrument, side, float(price), float(size or 0))
+        )
+
+    def recorded(self):
+        return self._recorded
+
+    def start(self):
+        if self._writing_thread is not None:
+            return
+        os.makedirs(self._directory, exist_ok=True)
+        self._writing_thread = threading.Thread(target=self._write, daemon=True)
+        self._writing_thread.start()
+
+    def stop(self):
+        """Escribe lo que quedó en la cola y cierra los archivos"""
+        if self._writing_thread is None:
+            return
+        self._queue.put(None)
+        self._writing_thread.join()
+        self._writing_thread = None
+
+    def path(self, day):
+        return os.path.join(
+            self._directory, f"{self._prefix}_{day:%Y%m%d}{RECORDS_SUFFIX}"
+        )
+
+    def _rotate(self, day):
+        """Cierra el archivo del día anterior y abre (o continúa) el del nuevo día"""
+        self._close_files()
+        self._day = day
+        path = self.path(day)
+        self._instrument_ids = {
+            symbol: i for i, symbol in enumerate(read_symbols(symbols_path(path)))
+        }
+        self._records_file = open(path, "ab")
+        self._symbols_file = open(symbols_path(path), "a")
+
+    def _instrument_id(self, instrument):
+        instrument_id = self._instrument_ids.get(instrument)
+        if instrument_id is None:
+            instrument_id = self._instrument_ids[instrument] = len(self._instrument_ids)
+            self._symbols_file.write(instrument + "\n")
+            self._symbols_file.flush()
+        return instrument_id
+
+    def _write(self):
+        running = True
+        while running:
+            try:
+                batch = [self._queue.get(timeout=self._flush_interval)]
+            except queue.Empty:
+                continue
+            # Se vacía la cola en un solo batch
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [update for update in batch if update is not None]
+            try:
+                self._write_batch(batch)
+            except Exception:
+                self._logger.exception("Excepcion grabando market data...")
+        self._close_files()
+
+    def _write_batch(self, batch):
+        buffer = bytearray(RECORD.size * len(batch))
+        offset = 0
+        for timestamp, instrument, side, price, size in batch:
+            day = dt.date.fromtimestamp(timestamp)
+            if day != self._day:
+                if offset:
+                    self._records_file.write(buffer[:offset])
+                    offset = 0
+                self._rotate(day)
+            RECORD.pack_into(
+                buffer,
+                offset,
+                timestamp,
+                self._instrument_id(instrument),
+                side,
+                price,
+                size,
+            )
+            offset += RECORD.size
+        if offset:
+            self._records_file.write(buffer[:offset])
+            self._records_file.flush()
+        self._recorded += len(batch)
+
+    def _close_files(self):
+        for f in (self._records_file, self._symbols_file):
+            if f is not None:
+                f.close()
+        self._records_file = None
+        self._symbols_file = None
+        self._day = None
+
+
+def read_records(path):
+    """Devuelve los registros de un archivo mapeados en memoria como array estructurado"""
+    # Si el proceso se cortó a mitad de un registro se ignora el registro incompleto
+    n_records = os.path.getsize(path) // RECORD_DTYPE.itemsize
+    if not n_records:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(n_records,))
+
+
+def read_symbols(path):
+    """Devuelve los instrumentos de un archivo .symbols, el índice es el id del instrumento"""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [line.rstrip("\n") for line in f]
+
+
+def symbols_path(records_path):
+    return records_path[: -len(RECORDS_SUFFIX)] + SYMBOLS_SUFFIX
@@ -0,0 +1,209 @@
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+# Oportunidad de arbitraje: vender el futuro de tasa colocadora cara (buy_rate, calculada con
+# el bid) y comprar el de tasa tomadora barata (sell_rate, calculada con el ask).
+# spread es buy_rate - sell_rate, sin descontar el costo.
+Opportunity = namedtuple(
+    "Opportunity",
+    "ticker_to_sell buy_rate sell_maturity ticker_to_buy sell_rate buy_maturity spread",
+)
+
+
+class SortedRates:
+    """
+    Tasas de un conjunto de futuros en un array ordenado de (clave, ticker), de la mejor a la
+    peor. Las colocadoras se guardan con la tasa negada así las dos quedan ascendentes.
+    Cambiar una tasa es un bisect para sacar la clave vieja y otro para insertar la nueva.
+    """
+
+    def __init__(self, descending):
+        self._sign = -1.0 if descending else 1.0
+        self._entries = []
+        self._keys = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def set(self, ticker, rate):
+        self.remove(ticker)
+        key = (self._sign * rate, ticker)
+        insort(self._entries, key)
+        self._keys[ticker] = key
+
+    def remove(self, ticker):
+        key = self._keys.pop(ticker, None)
+        if key is not None:
+            del self._entries[bisect_left(self._entries, key)]
+
+    def entry(self, i):
+        """(ticker, tasa) del i-ésimo mejor"""
+        key, ticker = self._entries[i]
+        return ticker, self._sign * key
+
+    def best(self):
+        return self.entry(0) if self._entries else None
+
+
+class OpportunityScanner:
+    """
+    Ranking de oportunidades de arbitraje entre todos los vencimientos.
+    Mantiene por vencimiento un SortedRates de tasas colocadoras y otro de tomadoras, y se
+    actualiza de forma incremental con la foto de las tasas del calculador: solo se revisan
+    los vencimientos cuya foto cambió. top() elige K veces el mejor par entre los futuros
+    sin usar, mirando solo las primeras tasas sin usar de cada lista, así encontrar las K
+    mejores cuesta O(K) por libro y no depende de la cantidad de futuros. Con cross_maturity
+    también se combinan futuros de distintos vencimientos (spreads entre tasas implícitas
+    de la curva).
+    """
+
+    def __init__(self, max_opportunities=5, cross_maturity=False):
+        self._max_opportunities = max_opportunities
+        self._cross_maturity = cross_maturity
+        # {vencimiento: (colocadoras, tomadoras)}
+        self._rates_by_maturity = {}
+        # Las mismas tasas de todos los vencimientos juntos, para los pares cruzados
+        self._all_rates = (SortedRates(descending=True), SortedRates(descending=False))
+        self._maturity_by_ticker = {}
+        # Mappings de la última foto aplicada por vencimiento, para saltear los que no cambiaron
+        self._seen = ({}, {})
+        self._version = None
+
+    def update(self, rates_snapshot):
+        """Aplica las tasas que cambiaron desde la última foto. Devuelve si cambió algo"""
+        if rates_snapshot.version == self._version:
+            return False
+        self._version = rates_snapshot.version
+        changed = False
+        for side, rates_by_maturity in enumerate(
+            (rates_snapshot.buy_rates, rates_snapshot.sell_rates)
+        ):
+            seen = self._seen[side]
+            for tradeable_maturity in set(seen).union(rates_by_maturity):
+                rates = rates_by_maturity.get(tradeable_maturity, {})
+                previous = seen.get(tradeable_maturity, {})
+                # Las fotos son copy-on-write: el mismo objeto es la misma tasa
+                if rates is previous:
+                    continue
+                changed |= self._apply(side, tradeable_maturity, previous, rates)
+                if rates:
+                    seen[tradeable_maturity] = rates
+                else:
+                    seen.pop(tradeable_maturity, None)
+        return changed
+
+    def _apply(self, side, tradeable_maturity, previous, rates):
+        if tradeable_maturity not in self._rates_by_maturity:
+            self._rates_by_maturity[tradeable_maturity] = (
+                SortedRates(descending=True),
+                SortedRates(descending=False),
+            )
+        maturity_rates = self._rates_by_maturity[tradeable_maturity][side]
+        all_rates = self._all_rates[side]
+        changed = False
+        for ticker in previous:
+            if ticker not in rates:
+                maturity_rates.remove(ticker)
+                all_rates.remove(ticker)
+                changed = True
+        for ticker, rate in rates.items():
+            if previous.get(ticker) != rate:
+                maturity_rates.set(ticker, rate)
+                all_rates.set(ticker, rate)
+                self._maturity_by_ticker[ticker] = tradeable_maturity
+                changed = True
+        return changed
+
+    def best(self, tradeable_maturity):
+        """(mejor colocadora, mejor tomadora) de un vencimiento"""
+        buy_rates, sell_rates = self._rates_by_maturity[tradeable_maturity]
+        return buy_rates.best(), sell_rates.best()
+
+    def top(self, cost=0.0, k=None):
+        """
+        Hasta k oportunidades con spread mayor a cost, de la mejor a la peor y sin repetir
+        futuros entre ellas: cada futuro se opera contra la primera punta una sola vez.
+        """
+        k = self._max_opportunities if k is None else k
+        if self._cross_maturity:
+            books = [self._all_rates]
+        else:
+            books = list(self._rates_by_maturity.values())
+        # Primer índice sin usar de cada lista de tasas, solo avanza
+        cursors = [[0, 0] for _ in books]
+        used_tickers = set()
+        opportunities = []
+        while len(opportunities) < k:
+            best = None
+            for book, (buy_rates, sell_rates) in enumerate(books):
+                pair = self._best_pair(
+                    buy_rates, sell_rates, cursors[book], used_tickers
+                )
+                if pair is not None and (best is None or pair < best[0]):
+                    best = (pair, book)
+            # El mejor par disponible no supera el costo, los demás tampoco
+            if best is None or -best[0][0] <= cost:
+                break
+            (negative_spread, i, j), book = best
+            buy_rates, sell_rates = books[book]
+            ticker_to_sell, buy_rate = buy_rates.entry(i)
+            ticker_to_buy, sell_rate = sell_rates.entry(j)
+            opportunities.append(
+                Opportunity(
+                    ticker_to_sell,
+                    buy_rate,
+                    self._maturity_by_ticker[ticker_to_sell],
+                    ticker_to_buy,
+                    sell_rate,
+                    self._maturity_by_ticker[ticker_to_buy],
+                    buy_rate - sell_rate,
+                )
+            )
+            used_tickers.add(ticker_to_sell)
+            used_tickers.add(ticker_to_buy)
+        return opportunities
+
+    @staticmethod
+    def _best_pair(buy_rates, sell_rates, cursor, used_tickers):
+        """
+        (-spread, i, j) del mejor par de futuros distintos y sin usar de un libro, o None.
+        Como el spread es colocadora menos tomadora, el mejor par es la mejor colocadora
+        sin usar contra la mejor tomadora sin usar; si las dos son el mismo futuro se
+        prueba la siguiente de cada lado.
+        """
+        i = cursor[0] = _first_unused(buy_rates, cursor[0], used_tickers)
+        j = cursor[1] = _first_unused(sell_rates, cursor[1], used_tickers)
+        if i >= len(buy_rates) or j >= len(sell_rates):
+            return None
+        ticker_to_sell, buy_rate = buy_rates.entry(i)
+        ticker_to_buy, sell_rate = sell_rates.entry(j)
+        if ticker_to_sell != ticker_to_buy:
+            return -(buy_rate - sell_rate), i, j
+        pairs = []
+        next_i = _first_unused(buy_rates, i + 1, used_tickers)
+        if next_i < len(buy_rates):
+            pairs.append((-(buy_rates.entry(next_i)[1] - sell_rate), next_i, j))
+        next_j = _first_unused(sell_rates, j + 1, used_tickers)
+        if next_j < len(sell_rates):
+            pairs.append((-(buy_rate - sell_rates.entry(next_j)[1]), i, next_j))
+        return min(pairs) if pairs else None
+
+
+def _first_unused(rates, start, used_tickers):
+    """Índice de la primera tasa desde start cuyo futuro no se usó"""
+    while start < len(rates) and rates.entry(start)[0] in used_tickers:
+        start += 1
+    return start
+
+
+def opportunity_scanner_from_config(config_service):
+    """
+    OpportunityScanner con TOP_OPPORTUNITIES y CROSS_MATURITY de la configuración, o None si
+    TOP_OPPORTUNITIES es 0 (se opera el mejor par de cada vencimiento).
+    """
+    top_opportunities = config_service.get("TOP_OPPORTUNITIES", 0)
+    if top_opportunities <= 0:
+        return None
+    return OpportunityScanner(
+        top_opportunities, config_service.get("CROSS_MATURITY", False)
+    )
@@ -0,0 +1,113 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pyRofex
+
+from src.model.async_logger import get_logger
+from src.model.latency import DECISION_TO_SEND, SEND_TO_ACK, timestamp
+
+# Una pata del arbitraje
+OrderLeg = namedtuple("OrderLeg", "ticker side size price")
+
+# Resultado del envío de una pata: respuesta de Rofex (o el error) y latencia del envío en segundos
+LegResult = namedtuple("LegResult", "leg response latency error")
+
+
+class DispatchHandle:
+    """
+    Agrupa las patas enviadas en paralelo de un mismo arbitraje.
+    """
+
+    def __init__(self, legs, futures):
+        self._legs = legs
+        self._futures = futures
+
+    def legs(self):
+        return list(self._legs)
+
+    def done(self):
+        return all(future.done() for future in self._futures)
+
+    def results(self, timeout=None):
+        """Espera que se envíen todas las patas y devuelve un LegResult por pata"""
+        wait(self._futures, timeout=timeout)
+        return [future.result(timeout=0) for future in self._futures]
+
+    def latencies(self, timeout=None):
+        return [result.latency for result in self.results(timeout)]
+
+    def all_sent(self, timeout=None):
+        return all(result.error is None for result in self.results(timeout))
+
+
+class OrderDispatcher:
+    """
+    Manda todas las patas de un arbitraje en paralelo para achicar la ventana de riesgo
+    entre patas, todas por la misma cuenta. El seguimiento (estado de las ordenes, logs)
+    corre en otro hilo, fuera del camino crítico.
+    """
+
+    def __init__(self, pyrofex_api, max_workers=4, latency_tracer=None):
+        self._pyrofex_api = pyrofex_api
+        # Mide decisión->envío y envío->ack, si está configurado
+        self._latency_tracer = latency_tracer
+        self._logger = get_logger()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="envio-ordenes"
+        )
+        self._background_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="seguimiento-ordenes"
+        )
+
+    def _send(self, leg, decided=0, account=None):
+        start = timestamp()
+        if self._latency_tracer is not None:
+            self._latency_tracer.record(DECISION_TO_SEND, decided, start)
+        try:
+            # Sin cuenta va por la cuenta por defecto
+            extra = {} if account is None else {"account": account}
+            # No se puede mandar Market Order por Remarkets, se manda Limit IOC
+            response = self._pyrofex_api.place_order(
+                ticker=leg.ticker,
+                side=leg.side,
+                size=leg.size,
+                price=leg.price,
+                time_in_force=pyRofex.TimeInForce.ImmediateOrCancel,
+                order_type=pyRofex.OrderType.LIMIT,
+                **extra,
+            )
+            acknowledged = timestamp()
+            if self._latency_tracer is not None:
+                self._latency_tracer.record(SEND_TO_ACK, start, acknowledged)
+            return LegResult(leg, response, (acknowledged - start) / 1e9, None)
+        except Exception as e:
+            return LegResult(leg, None, (timestamp() - start) / 1e9, e)
+
+    def dispatch(self, legs, decided=0):
+        """
+        Manda las patas en paralelo, devuelve enseguida un DispatchHandle.
+        decided es el timestamp (latency.timestamp) de la decisión de operar.
+        La cuenta se elige una vez, así un futuro y su cobertura quedan en la misma cuenta.
+        """
+        account = self._pyrofex_api.next_account()
+        return DispatchHandle(
+            legs,
+            [self._executor.submit(self._send, leg, decided, account) for leg in legs],
+        )
+
+    def run_in_background(self, function, *args, **kwargs):
+        """Corre el seguimiento de las ordenes fuera del camino crítico"""
+
+        def run():
+            try:
+                function(*args, **kwargs)
+            except Exception:
+                self._logger.exception(
+                    "Excepción durante el seguimiento de las ordenes..."
+                )
+
+        return self._background_executor.submit(run)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+        self._background_executor.shutdown(wait=True)
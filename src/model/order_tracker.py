@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import Future, InvalidStateError
+
+# Estados finales de una orden, una IOC siempre termina en alguno de estos
+TERMINAL_STATES = frozenset(["FILLED", "CANCELLED", "REJECTED", "EXPIRED"])
+
+# Ejecución parcial o total de una orden
+Fill = namedtuple("Fill", "quantity price timestamp")
+
+
+class OrderState:
+    """
+    Estado en memoria de una orden propia, armado con los reportes del websocket.
+    """
+
+    def __init__(self, client_id):
+        self.client_id = client_id
+        self.order_id = None
+        self.ticker = None
+        self.side = None
+        self.price = None
+        self.quantity = 0.0
+        self.status = None
+        self.cum_quantity = 0.0
+        self.leaves_quantity = 0.0
+        self.average_price = 0.0
+        self.text = None
+        self.transitions = []
+        self.fills = []
+        self.created = time.time()
+        self.updated = self.created
+
+    def __repr__(self):
+        return (
+            f"{self.client_id} ({self.order_id}) {self.ticker} {self.side} "
+            f"{self.cum_quantity}/{self.quantity} @ {self.average_price} - {self.status}"
+        )
+
+    def done(self):
+        return self.status in TERMINAL_STATES
+
+
+class OrderTracker:
+    """
+    Tabla en memoria de las ordenes propias indexada por clientId y orderId.
+    Se alimenta de los reportes de ordenes del websocket, así la estrategia no necesita
+    consultar el estado por REST.
+    """
+
+    def __init__(self):
+        self._orders = {}
+        self._client_id_by_order_id = {}
+        self._waiters = defaultdict(list)
+        self._fill_listeners = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._orders)
+
+    def order(self, client_id):
+        return self._orders.get(client_id)
+
+    def order_by_order_id(self, order_id):
+        return self._orders.get(self._client_id_by_order_id.get(order_id))
+
+    def status(self, client_id):
+        order = self._orders.get(client_id)
+        return order.status if order is not None else None
+
+    def add_fill_listener(self, listener):
+        """listener(order, fill) se llama por cada ejecución nueva, en el hilo del websocket"""
+        self._fill_listeners.append(listener)
+
+    def on_order_report(self, message):
+        """Actualiza la tabla con un mensaje de reporte de orden del websocket"""
+        report = message.get("orderReport", message)
+        client_id = report.get("clOrdId")
+        if client_id is None:
+            return
+        now = time.time()
+        new_fill = None
+        with self._lock:
+            order = self._orders.get(client_id)
+            if order is None:
+                order = self._orders[client_id] = OrderState(client_id)
+            if report.get("orderId"):
+                order.order_id = report["orderId"]
+                self._client_id_by_order_id[order.order_id] = client_id
+            order.ticker = report.get("instrumentId", {}).get("symbol", order.ticker)
+            order.side = report.get("side", order.side)
+            order.price = report.get("price", order.price)
+            order.quantity = report.get("orderQty", order.quantity)
+            order.leaves_quantity = report.get("leavesQty", order.leaves_quantity)
+            order.average_price = report.get("avgPx", order.average_price)
+            order.text = report.get("text", order.text)
+            cum_quantity = report.get("cumQty", order.cum_quantity)
+            if cum_quantity > order.cum_quantity:
+                new_fill = Fill(
+                    report.get("lastQty") or cum_quantity - order.cum_quantity,
+                    report.get("lastPx") or order.average_price,
+                    now,
+                )
+                order.fills.append(new_fill)
+                order.cum_quantity = cum_quantity
+            status = report.get("status")
+            if status is not None and status != order.status:
+                order.status = status
+                order.transitions.append((status, now))
+            order.updated = now
+            waiters = self._ready_waiters(order)
+        for future in waiters:
+            try:
+                future.set_result(order)
+            except InvalidStateError:
+                # El waiter se canceló mientras se resolvía
+                pass
+        if new_fill is not None:
+            for listener in self._fill_listeners:
+                listener(order, new_fill)
+
+    def _ready_waiters(self, order):
+        """Saca los waiters cuya condición ya se cumple (se llama con el lock tomado)"""
+        waiters = self._waiters.get(order.client_id)
+        if not waiters:
+            return []
+        ready = [future for states, future in waiters if order.status in states]
+        waiters[:] = [
+            (states, future) for states, future in waiters if order.status not in states
+        ]
+        if not waiters:
+            del self._waiters[order.client_id]
+        return ready
+
+    def wait_for_state(self, client_id, states=TERMINAL_STATES):
+        """
+        Devuelve un Future que se resuelve con la orden cuando llega a alguno de los estados.
+        """
+        future = Future()
+        with self._lock:
+            order = self._orders.get(client_id)
+            if order is not None and order.status in states:
+                future.set_result(order)
+            else:
+                self._waiters[client_id].append((frozenset(states), future))
+        return future
+
+    def cancel_wait(self, client_id, future):
+        """Descarta un waiter que ya no se va a esperar"""
+        with self._lock:
+            waiters = self._waiters.get(client_id, [])
+            waiters[:] = [(states, f) for states, f in waiters if f is not future]
+            if not waiters:
+                self._waiters.pop(client_id, None)
+        future.cancel()
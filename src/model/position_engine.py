@@ -0,0 +1,362 @@
+import threading
+from collections import namedtuple
+
+import pyRofex
+
+from src.model.config import get_config_service
+from src.model.spot_sources import spot_ticker
+
+# Límites de riesgo, None es sin límite. Las posiciones van en contratos (o acciones para
+# los spot) y los nocionales en pesos, valuados al precio promedio de cada posición:
+# - max_position: posición neta por instrumento
+# - max_underlier_notional: nocional neto por subyacente, futuros y spot juntos
+# - max_maturity_notional: nocional bruto por vencimiento
+# - max_gross_notional: nocional bruto total
+RiskLimits = namedtuple(
+    "RiskLimits",
+    "max_position max_underlier_notional max_maturity_notional max_gross_notional",
+)
+
+# Claves de la configuración de cada límite
+LIMIT_KEYS = RiskLimits(
+    "MAX_POSITION",
+    "MAX_UNDERLIER_NOTIONAL",
+    "MAX_MATURITY_NOTIONAL",
+    "MAX_GROSS_NOTIONAL",
+)
+
+# Posición de un instrumento: cantidad neta (positiva comprada), precio promedio de la
+# posición abierta y PnL realizado
+Position = namedtuple("Position", "ticker quantity average_price realized_pnl")
+
+# Lo que suman al riesgo las patas enviadas y todavía sin terminar, se descuenta con release
+Reservation = namedtuple("Reservation", "quantities underliers maturities gross")
+
+
+class LimitBreached(Exception):
+    def __init__(self, ticker, limit, value, maximum):
+        super().__init__(
+            f"{ticker}: {limit} llegaría a {value:.2f}, el máximo es {maximum:.2f}"
+        )
+        self.ticker = ticker
+        self.limit = limit
+
+
+def limits_from_config(config_service):
+    """RiskLimits con las claves de LIMIT_KEYS, las que faltan quedan sin límite"""
+    return RiskLimits(*(config_service.get(key) for key in LIMIT_KEYS))
+
+
+def _sign(side):
+    """1 para las compras y -1 para las ventas, side es pyRofex.Side o el texto del reporte"""
+    if side is pyRofex.Side.BUY:
+        return 1.0
+    if side is pyRofex.Side.SELL:
+        return -1.0
+    return 1.0 if side.upper() == "BUY" else -1.0
+
+
+class PositionEngine:
+    """
+    Posiciones netas, nocionales y PnL del bot, armados con las ejecuciones del websocket.
+    Cada ejecución actualiza de forma incremental los contadores agregados por instrumento,
+    subyacente, vencimiento y total, así el control previo al envío de ordenes (reserve) solo
+    mira los contadores de las patas y cuesta lo mismo sin importar cuántas posiciones haya.
+    Las patas enviadas quedan reservadas hasta que sus ordenes terminan, para que varios
+    trades seguidos no se pasen del límite antes de que lleguen las ejecuciones.
+    """
+
+    def __init__(
+        self,
+        futures_by_ticker,
+        maturity_by_ticker,
+        spot_tickers=None,
+        limits=None,
+        config_service=None,
+    ):
+        # {ticker: (tamaño del contrato, subyacente, vencimiento)}
+        self._instruments = {
+            ticker: (
+                future.future_contract_size,
+                future.underlier_ticker,
+                maturity_by_ticker.get(ticker),
+            )
+            for ticker, future in futures_by_ticker.items()
+        }
+        for underlier, symbol in (spot_tickers or {}).items():
+            self._instruments[symbol] = (1.0, underlier, None)
+        # Con limits None los límites se leen de la configuración y siguen sus recargas
+        self._fixed_limits = limits
+        self._config_service = (
+            None if limits is not None else config_service or get_config_service()
+        )
+        self._config = None
+        self._limits = None
+        self._quantity = {}
+        self._average_price = {}
+        self._realized_pnl = {}
+        # Nocional con signo de cada posición, cantidad * tamaño del contrato * precio promedio
+        self._exposure = {}
+        self._underlier_notional = {}
+        self._maturity_notional = {}
+        self._gross_notional = 0.0
+        self._pending_quantity = {}
+        self._pending_underlier = {}
+        self._pending_maturity = {}
+        self._pending_gross = 0.0
+        self._fills = 0
+        self._rejections = 0
+        self._lock = threading.Lock()
+
+    def _instrument(self, ticker):
+        return self._instruments.get(ticker, (1.0, ticker, None))
+
+    def limits(self):
+        """Límites vigentes, en el mismo orden que RiskLimits y con inf donde no hay"""
+        if self._fixed_limits is not None:
+            if self._limits is None:
+                self._limits = self._parse_limits(self._fixed_limits)
+            return self._limits
+        # La configuración se reemplaza entera al recargarse, alcanza con comparar el objeto
+        config = self._config_service.config()
+        if config is not self._config:
+            self._limits = self._parse_limits(limits_from_config(self._config_service))
+            self._config = config
+        return self._limits
+
+    @staticmethod
+    def _parse_limits(limits):
+        return RiskLimits(
+            *(float("inf") if limit is None else float(limit) for limit in limits)
+        )
+
+    def reserve(self, legs):
+        """
+        Controla que las patas no pasen ningún límite y las reserva hasta el release.
+        Levanta LimitBreached si alguna pata aumenta una exposición que supera su límite,
+        las que la achican siempre pasan.
+        """
+        limits = self.limits()
+        with self._lock:
+            quantities = {}
+            underliers = {}
+            maturities = {}
+            gross = 0.0
+            for leg in legs:
+                multiplier, underlier, maturity = self._instrument(leg.ticker)
+                size = _sign(leg.side) * leg.size
+                before = (
+                    self._quantity.get(leg.ticker, 0.0)
+                    + self._pending_quantity.get(leg.ticker, 0.0)
+                    + quantities.get(leg.ticker, 0.0)
+                )
+                after = before + size
+                if abs(after) > limits.max_position and abs(after) > abs(before):
+                    self._reject(
+                        leg.ticker, "la posición", abs(after), limits.max_position
+                    )
+                gross_change = (abs(after) - abs(before)) * multiplier * leg.price
+                quantities[leg.ticker] = quantities.get(leg.ticker, 0.0) + size
+                underliers[underlier] = (
+                    underliers.get(underlier, 0.0) + size * multiplier * leg.price
+                )
+                if maturity is not None:
+                    maturities[maturity] = maturities.get(maturity, 0.0) + gross_change
+                gross += gross_change
+            for underlier, change in underliers.items():
+                current = self._underlier_notional.get(
+                    underlier, 0.0
+                ) + self._pending_underlier.get(underlier, 0.0)
+                value = abs(current + change)
+                if value > limits.max_underlier_notional and value > abs(current):
+                    self._reject(
+                        underlier,
+                        "el nocional del subyacente",
+                        value,
+                        limits.max_underlier_notional,
+                    )
+            for maturity, change in maturities.items():
+                value = (
+                    self._maturity_notional.get(maturity, 0.0)
+                    + self._pending_maturity.get(maturity, 0.0)
+                    + change
+                )
+                if value > limits.max_maturity_notional and change > 0:
+                    self._reject(
+                        maturity,
+                        "el nocional del vencimiento",
+                        value,
+                        limits.max_maturity_notional,
+                    )
+            value = self._gross_notional + self._pending_gross + gross
+            if value > limits.max_gross_notional and gross > 0:
+                self._reject(
+                    "total", "el nocional bruto", value, limits.max_gross_notional
+                )
+            reservation = Reservation(quantities, underliers, maturities, gross)
+            self._apply_reservation(reservation, 1.0)
+        return reservation
+
+    def _reject(self, ticker, limit, value, maximum):
+        self._rejections += 1
+        raise LimitBreached(ticker, limit, value, maximum)
+
+    def _apply_reservation(self, reservation, sign):
+        for ticker, quantity in reservation.quantities.items():
+            self._pending_quantity[ticker] = (
+                self._pending_quantity.get(ticker, 0.0) + sign * quantity
+            )
+        for underlier, notional in reservation.underliers.items():
+            self._pending_underlier[underlier] = (
+                self._pending_underlier.get(underlier, 0.0) + sign * notional
+            )
+        for maturity, notional in reservation.maturities.items():
+            self._pending_maturity[maturity] = (
+                self._pending_maturity.get(maturity, 0.0) + sign * notional
+            )
+        self._pending_gross += sign * reservation.gross
+
+    def release(self, reservation):
+        """Descuenta una reserva cuando sus ordenes ya terminaron (o no se enviaron)"""
+        with self._lock:
+            self._apply_reservation(reservation, -1.0)
+
+    def on_fill(self, order, fill):
+        """Listener de OrderTracker.add_fill_listener, corre en el hilo del websocket"""
+        self.apply_fill(order.ticker, order.side, fill.quantity, fill.price)
+
+    def apply_fill(self, ticker, side, quantity, price):
+        size = _sign(side) * quantity
+        multiplier, underlier, maturity = self._instrument(ticker)
+        with self._lock:
+            previous = self._quantity.get(ticker, 0.0)
+            average_price = self._average_price.get(ticker, 0.0)
+            current = previous + size
+            if previous * size >= 0 and current:
+                # Aumenta la posición (o la abre), cambia el precio promedio
+                average_price = (
+                    abs(previous) * average_price + abs(size) * price
+                ) / abs(current)
+            else:
+                # Cierra parte de la posición al precio de la ejecución
+                closed = min(abs(size), abs(previous))
+                direction = 1.0 if previous > 0 else -1.0
+                self._realized_pnl[ticker] = (
+                    self._realized_pnl.get(ticker, 0.0)
+                    + closed * direction * (price - average_price) * multiplier
+                )
+                if current * previous < 0:
+                    # Se dio vuelta, lo que sobra abre una posición nueva
+                    average_price = price
+                elif current == 0:
+                    average_price = 0.0
+            self._quantity[ticker] = current
+            self._average_price[ticker] = average_price
+            exposure = current * multiplier * average_price
+            change = exposure - self._exposure.get(ticker, 0.0)
+            gross_change = abs(exposure) - abs(self._exposure.get(ticker, 0.0))
+            self._exposure[ticker] = exposure
+            self._underlier_notional[underlier] = (
+                self._underlier_notional.get(underlier, 0.0) + change
+            )
+            if maturity is not None:
+                self._maturity_notional[maturity] = (
+                    self._maturity_notional.get(maturity, 0.0) + gross_change
+                )
+            self._gross_notional += gross_change
+            self._fills += 1
+
+    def position(self, ticker):
+        with self._lock:
+            return Position(
+                ticker,
+                self._quantity.get(ticker, 0.0),
+                self._average_price.get(ticker, 0.0),
+                self._realized_pnl.get(ticker, 0.0),
+            )
+
+    def positions(self):
+        """Posiciones de todos los instrumentos operados"""
+        with self._lock:
+            tickers = list(self._quantity)
+        return [self.position(ticker) for ticker in tickers]
+
+    def underlier_notional(self, underlier):
+        return self._underlier_notional.get(underlier, 0.0)
+
+    def maturity_notional(self, maturity):
+        return self._maturity_notional.get(maturity, 0.0)
+
+    def gross_notional(self):
+        return self._gross_notional
+
+    def realized_pnl(self):
+        with self._lock:
+            return sum(self._realized_pnl.values())
+
+    def unrealized_pnl(self, book_snapshot, spot_prices=None):
+        """
+        PnL de las posiciones abiertas valuadas contra los libros: las compradas al bid y
+        las vendidas al ask, los spot al precio de spot_prices. Las posiciones sin precio
+        no suman.
+        """
+        spot_prices = spot_prices or {}
+        with self._lock:
+            positions = [
+                (ticker, quantity, self._average_price[ticker])
+                for ticker, quantity in self._quantity.items()
+                if quantity
+            ]
+        pnl = 0.0
+        for ticker, quantity, average_price in positions:
+            multiplier, underlier, maturity = self._instrument(ticker)
+            book = (book_snapshot.bids if quantity > 0 else book_snapshot.asks).get(
+                ticker
+            )
+            if book is not None:
+                mark = book.price
+            elif maturity is None and underlier in spot_prices:
+                mark = spot_prices[underlier]
+            else:
+                continue
+            pnl += quantity * multiplier * (mark - average_price)
+        return pnl
+
+    def fills(self):
+        return self._fills
+
+    def rejections(self):
+        return self._rejections
+
+    def report(self, book_snapshot=None, spot_prices=None):
+        """Resumen para el log"""
+        report = {
+            "fills": self._fills,
+            "rejections": self._rejections,
+            "gross_notional": self._gross_notional,
+            "realized_pnl": self.realized_pnl(),
+            "positions": {
+                position.ticker: position.quantity
+                for position in self.positions()
+                if position.quantity
+            },
+        }
+        if book_snapshot is not None:
+            report["unrealized_pnl"] = self.unrealized_pnl(book_snapshot, spot_prices)
+        return report
+
+
+def position_engine_from_config(instrument_handler, tradeable_check, config_service):
+    """PositionEngine de los futuros tradeables y sus spot, con los límites configurados"""
+    futures_by_ticker = instrument_handler.rofex_instruments_by_ticker()
+    return PositionEngine(
+        futures_by_ticker,
+        tradeable_check.tradeable_ticker_maturity(),
+        {
+            future.underlier_ticker: spot_ticker(
+                future.underlier_ticker, config_service
+            )
+            for future in futures_by_ticker.values()
+        },
+        config_service=config_service,
+    )
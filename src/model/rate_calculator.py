@@ -1,5 +1,16 @@
 import copy
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+from types import MappingProxyType
+import src.model.clock as clock
+from src.model.async_logger import get_logger
+from src.model.latency import RECEIVE_TO_RATES, timestamp
+from src.model.market_apis import EMPTY_BOOK_SNAPSHOT
+
+# Foto inmutable de las tasas para leer desde otros hilos (por ejemplo el Display):
+# {vencimiento: {ticker: tasa}} de solo lectura, version aumenta con cada recálculo.
+RatesSnapshot = namedtuple("RatesSnapshot", "buy_rates sell_rates version")
+
+EMPTY_RATES_SNAPSHOT = RatesSnapshot(MappingProxyType({}), MappingProxyType({}), 0)
 
 
 class ImplicitRateCalculator:
@@ -9,15 +20,45 @@ class ImplicitRateCalculator:
 
     DAYS_IN_A_YEAR = 365
 
-    def __init__(self, pyrofex_api, yfinance_api, tradeable_check):
+    def __init__(
+        self,
+        pyrofex_api,
+        spot_source,
+        tradeable_check,
+        latency_tracer=None,
+        clock_service=None,
+    ):
         self._tradeable_underliers_futures = (
             tradeable_check.tradeable_pyrofex_future_underlier_ticker()
         )
         self._tradeable_tickers_maturities = tradeable_check.tradeable_ticker_maturity()
+        self._tradeable_futures_by_ticker = {
+            future.ticker: future
+            for futures in self._tradeable_underliers_futures.values()
+            for future in futures
+        }
         self._pyrofex_api = pyrofex_api
-        self._yfinance_api = yfinance_api
+        self._spot_source = spot_source
         self._buy_rate = defaultdict(dict)
         self._sell_rate = defaultdict(dict)
+        # Mejor tasa por vencimiento, se recalcula solo para los vencimientos que cambiaron
+        self._max_buy_rate = {}
+        self._min_sell_rate = {}
+        # Los días al vencimiento cambian una vez por día, ahí se recalcula todo
+        self._full_update = True
+        # Días al vencimiento y exponentes cacheados por día, retira los contratos vencidos
+        self._clock_service = clock_service or clock.ClockService()
+        self._clock_service.register(self._tradeable_futures_by_ticker.values())
+        self._clock_service.add_rollover_listener(self._on_rollover)
+        self._days_in_year = self._clock_service.days_in_year()
+        # Foto de las puntas con la que se calcularon las tasas
+        self._book_snapshot = EMPTY_BOOK_SNAPSHOT
+        # Mide recepción->tasas, si está configurado
+        self._latency_tracer = latency_tracer
+        # Timestamp monótono del último recálculo de tasas
+        self._rates_timestamp = 0
+        # Se reemplaza entera en cada recálculo (copy-on-write), los lectores no copian
+        self._rates_snapshot = EMPTY_RATES_SNAPSHOT
 
     def buy_rate(self):
         return copy.deepcopy(self._buy_rate)
@@ -25,11 +66,22 @@ class ImplicitRateCalculator:
     def sell_rate(self):
         return copy.deepcopy(self._sell_rate)
 
+    def book_snapshot(self):
+        return self._book_snapshot
+
+    def rates_snapshot(self):
+        """Foto inmutable de las tasas, se puede leer desde cualquier hilo sin locks"""
+        return self._rates_snapshot
+
+    def rates_timestamp(self):
+        """Timestamp monótono (latency.timestamp) del último recálculo de tasas"""
+        return self._rates_timestamp
+
     def max_buy_rate(self, tradeable_maturity):
-        return max(self._buy_rate[tradeable_maturity].items(), key=lambda x: x[1])
+        return self._max_buy_rate[tradeable_maturity]
 
     def min_sell_rate(self, tradeable_maturity):
-        return min(self._sell_rate[tradeable_maturity].items(), key=lambda x: x[1])
+        return self._min_sell_rate[tradeable_maturity]
 
     def ready(self):
         return self._buy_rate and self._sell_rate
@@ -39,41 +91,163 @@ class ImplicitRateCalculator:
             self._buy_rate[tradeable_maturity] and self._sell_rate[tradeable_maturity]
         )
 
-    def _implicit_rate(self, maturity_price, current_price, time_to_expire):
+    def _implicit_rate(self, maturity_price, current_price, exponent):
         """
         TNA = ((1 + Tasa de cambio)^(1/DIAS_DEL_AÑO) - 1))*DIAS_DEL_AÑO
+        exponent es 1 / días al vencimiento, cacheado por el ClockService.
         """
-        return (
-            (maturity_price / current_price) ** (1 / time_to_expire) - 1
-        ) * self.DAYS_IN_A_YEAR
+        return ((maturity_price / current_price) ** exponent - 1) * self._days_in_year
+
+    def _on_rollover(self, day, expired):
+        """Día nuevo: se recalcula todo y se sacan los contratos vencidos de los índices"""
+        self._full_update = True
+        if not expired:
+            return
+        expired_tickers = {future.ticker for future in expired}
+        self._tradeable_underliers_futures = {
+            underlier: tuple(
+                future for future in futures if future.ticker not in expired_tickers
+            )
+            for underlier, futures in self._tradeable_underliers_futures.items()
+        }
+        touched_maturities = set()
+        for ticker in expired_tickers:
+            self._tradeable_futures_by_ticker.pop(ticker, None)
+            tradeable_maturity = self._tradeable_tickers_maturities.get(ticker)
+            for rates in (self._buy_rate, self._sell_rate):
+                if ticker in rates.get(tradeable_maturity, {}):
+                    del rates[tradeable_maturity][ticker]
+                    touched_maturities.add(tradeable_maturity)
+        for tradeable_maturity in touched_maturities:
+            self._update_best_rates(tradeable_maturity)
+        if touched_maturities:
+            self._publish_rates(touched_maturities)
+        get_logger().info(
+            "Contratos vencidos retirados el %s: %s", day, sorted(expired_tickers)
+        )
+
+    def _futures_to_update(
+        self, last_price_underlier, updated_underliers, updated_futures
+    ):
+        """
+        Devuelve los futuros cuyas tasas hay que recalcular.
+        Solo los que cambiaron, salvo el primer cálculo del día que recalcula todo.
+        """
+        if self._full_update:
+            self._full_update = False
+            return [
+                future
+                for ticker in last_price_underlier
+                for future in self._tradeable_underliers_futures.get(ticker, [])
+            ]
+        futures = {
+            future.ticker: future
+            for ticker in updated_underliers
+            for future in self._tradeable_underliers_futures.get(ticker, [])
+        }
+        for ticker in updated_futures:
+            if ticker in self._tradeable_futures_by_ticker:
+                futures[ticker] = self._tradeable_futures_by_ticker[ticker]
+        return [
+            future
+            for future in futures.values()
+            if future.underlier_ticker in last_price_underlier
+        ]
 
     def update_rates(self):
         """
         Actualiza las tasas y ordena los instrumentos por fecha de vencimiento.
+        Solo recalcula los futuros (y vencimientos) afectados por la data nueva.
         """
-        last_price_underlier = self._yfinance_api.last_prices()
-        rofex_instruments_bids = self._pyrofex_api.bids()
-        rofex_instruments_ask = self._pyrofex_api.asks()
-        # self._buy_rate = defaultdict(dict)
-        # self._sell_rate = defaultdict(dict)
-        for ticker, last_price_of_each in last_price_underlier.items():
-            for future in self._tradeable_underliers_futures[ticker]:
-                future_ticker = future.ticker
-                time_to_expire = future.time_to_expire()
-                tradeable_maturity = self._tradeable_tickers_maturities[future_ticker]
-                if future_ticker in rofex_instruments_bids:
-                    self._buy_rate[tradeable_maturity][
-                        future_ticker
-                    ] = self._implicit_rate(
-                        rofex_instruments_bids[future_ticker].price,
-                        last_price_of_each,
-                        time_to_expire,
-                    )
-                if future_ticker in rofex_instruments_ask:
-                    self._sell_rate[tradeable_maturity][
-                        future_ticker
-                    ] = self._implicit_rate(
-                        rofex_instruments_ask[future_ticker].price,
-                        last_price_of_each,
-                        time_to_expire,
+        self._clock_service.check_rollover()
+        # Primero se sacan los marcados y después se leen los precios: lo que llegue en el
+        # medio ya está en la foto y queda marcado para la próxima vuelta, no se pierde
+        updated_underliers = self._spot_source.pop_updated()
+        updated_futures = self._pyrofex_api.pop_updated()
+        last_price_underlier = self._spot_source.last_prices()
+        self._book_snapshot = self._pyrofex_api.snapshot()
+        rofex_instruments_bids = self._book_snapshot.bids
+        rofex_instruments_ask = self._book_snapshot.asks
+        touched_maturities = set()
+        for future in self._futures_to_update(
+            last_price_underlier, updated_underliers, updated_futures
+        ):
+            future_ticker = future.ticker
+            last_price_of_each = last_price_underlier[future.underlier_ticker]
+            exponent = self._clock_service.exponent(future)
+            tradeable_maturity = self._tradeable_tickers_maturities[future_ticker]
+            if future_ticker in rofex_instruments_bids:
+                self._buy_rate[tradeable_maturity][future_ticker] = self._implicit_rate(
+                    rofex_instruments_bids[future_ticker].price,
+                    last_price_of_each,
+                    exponent,
+                )
+                touched_maturities.add(tradeable_maturity)
+            elif (
+                self._buy_rate[tradeable_maturity].pop(future_ticker, None) is not None
+            ):
+                # La punta desapareció (por ejemplo se invalidó al reconectar)
+                touched_maturities.add(tradeable_maturity)
+            if future_ticker in rofex_instruments_ask:
+                self._sell_rate[tradeable_maturity][
+                    future_ticker
+                ] = self._implicit_rate(
+                    rofex_instruments_ask[future_ticker].price,
+                    last_price_of_each,
+                    exponent,
+                )
+                touched_maturities.add(tradeable_maturity)
+            elif (
+                self._sell_rate[tradeable_maturity].pop(future_ticker, None) is not None
+            ):
+                touched_maturities.add(tradeable_maturity)
+        for tradeable_maturity in touched_maturities:
+            self._update_best_rates(tradeable_maturity)
+        if touched_maturities:
+            self._rates_timestamp = timestamp()
+            self._publish_rates(touched_maturities)
+            if self._latency_tracer is not None:
+                self._record_latency()
+
+    def _record_latency(self):
+        # La data nueva más reciente es la que disparó el recálculo
+        received = max(self._book_snapshot.received, self._spot_source.last_received())
+        self._latency_tracer.record(RECEIVE_TO_RATES, received, self._rates_timestamp)
+
+    def _publish_rates(self, touched_maturities):
+        """Publica una foto nueva copiando solo los vencimientos que cambiaron"""
+        snapshot = self._rates_snapshot
+        buy_rates = dict(snapshot.buy_rates)
+        sell_rates = dict(snapshot.sell_rates)
+        for tradeable_maturity in touched_maturities:
+            for rates, published in (
+                (self._buy_rate, buy_rates),
+                (self._sell_rate, sell_rates),
+            ):
+                if rates[tradeable_maturity]:
+                    published[tradeable_maturity] = MappingProxyType(
+                        dict(rates[tradeable_maturity])
                     )
+                else:
+                    # Un vencimiento sin contratos vigentes deja de mostrarse
+                    published.pop(tradeable_maturity, None)
+        self._rates_snapshot = RatesSnapshot(
+            MappingProxyType(buy_rates),
+            MappingProxyType(sell_rates),
+            snapshot.version + 1,
+        )
+
+    def _update_best_rates(self, tradeable_maturity):
+        """Recalcula la mejor tasa colocadora y tomadora de un vencimiento"""
+        if self._buy_rate[tradeable_maturity]:
+            self._max_buy_rate[tradeable_maturity] = max(
+                self._buy_rate[tradeable_maturity].items(), key=lambda x: x[1]
+            )
+        else:
+            self._max_buy_rate.pop(tradeable_maturity, None)
+        if self._sell_rate[tradeable_maturity]:
+            self._min_sell_rate[tradeable_maturity] = min(
+                self._sell_rate[tradeable_maturity].items(), key=lambda x: x[1]
+            )
+        else:
+            self._min_sell_rate.pop(tradeable_maturity, None)
@@ -0,0 +1,367 @@
+import argparse
+import csv
+import datetime as dt
+import heapq
+import json
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import Future
+from types import MappingProxyType
+
+import pyRofex
+
+import src.model.clock as clock
+import src.model.market_recorder as mrec
+from src.model.config import get_config_service
+from src.model.market_apis import ApiData, BookSnapshot, OrderBook
+from src.model.order_dispatcher import DispatchHandle, OrderDispatcher
+from src.model.rate_calculator import ImplicitRateCalculator
+from src.model.strategy import Strategy
+from src.model.update_data import DataUpdate
+
+# Un mensaje de market data grabado
+ReplayEvent = namedtuple("ReplayEvent", "timestamp instrument side price size")
+
+# Resumen de un replay
+ReplayReport = namedtuple(
+    "ReplayReport", "messages seconds messages_per_second trades orders fills pnl"
+)
+
+SIDES = {"BID": mrec.BID, "OFFER": mrec.OFFER, "SPOT": mrec.SPOT}
+
+
+def _side(value):
+    if isinstance(value, str) and not value.isdigit():
+        return SIDES[value.upper()]
+    return int(value)
+
+
+def read_binary_log(path):
+    """Lee un log del MarketDataRecorder"""
+    symbols = mrec.read_symbols(mrec.symbols_path(path))
+    for record in mrec.read_records(path):
+        yield ReplayEvent(
+            float(record["timestamp"]),
+            symbols[record["instrument"]],
+            int(record["side"]),
+            float(record["price"]),
+            float(record["size"]),
+        )
+
+
+def read_csv(path):
+    """Lee un CSV con columnas timestamp, instrument, side, price, size"""
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            yield ReplayEvent(
+                float(row["timestamp"]),
+                row["instrument"],
+                _side(row["side"]),
+                float(row["price"]),
+                float(row["size"] or 0),
+            )
+
+
+def read_json_lines(path):
+    """Lee un archivo con un objeto JSON por línea, mismas claves que el CSV"""
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            yield ReplayEvent(
+                float(row["timestamp"]),
+                row["instrument"],
+                _side(row["side"]),
+                float(row["price"]),
+                float(row.get("size") or 0),
+            )
+
+
+def load_events(paths):
+    """Lee los archivos según su extensión y los mezcla ordenados por timestamp"""
+    readers = []
+    for path in paths:
+        if path.endswith(mrec.RECORDS_SUFFIX):
+            readers.append(read_binary_log(path))
+        elif path.endswith(".csv"):
+            readers.append(read_csv(path))
+        else:
+            readers.append(read_json_lines(path))
+    return heapq.merge(*readers, key=lambda event: event.timestamp)
+
+
+class SimulatedFills:
+    """
+    Registra las ejecuciones simuladas y calcula posiciones y PnL.
+    """
+
+    def __init__(self, multipliers):
+        # Pesos por unidad de precio de cada instrumento (tamaño del contrato)
+        self._multipliers = multipliers
+        self._positions = defaultdict(float)
+        self._cash = 0.0
+        self._fills = []
+
+    def fill(self, ticker, side, size, price):
+        signed_size = size if side == pyRofex.Side.BUY else -size
+        self._positions[ticker] += signed_size
+        self._cash -= signed_size * price * self._multipliers.get(ticker, 1.0)
+        self._fills.append((ticker, side, size, price))
+
+    def fills(self):
+        return list(self._fills)
+
+    def positions(self):
+        return dict(self._positions)
+
+    def pnl(self, mark_prices):
+        """Cash más las posiciones abiertas valuadas a mark_prices"""
+        return self._cash + sum(
+            position * mark_prices.get(ticker, 0.0) * self._multipliers.get(ticker, 1.0)
+            for ticker, position in self._positions.items()
+        )
+
+
+class ReplayPyRofexApi(ApiData):
+    """
+    Reemplaza a PyRofexApi en los replays: arma las puntas con los mensajes grabados y
+    simula la ejecución de las ordenes IOC contra esas puntas.
+    """
+
+    def __init__(self, simulated_fills):
+        super().__init__()
+        self._bids = {}
+        self._asks = {}
+        self._sequence = 0
+        self._simulated_fills = simulated_fills
+        self._order_status = {}
+        self._order_count = 0
+
+    def apply(self, event):
+        book = self._bids if event.side == mrec.BID else self._asks
+        book[event.instrument] = OrderBook(event.price, event.size)
+        self._sequence += 1
+        self._mark_updated(event.instrument)
+        self._update_last_update_api()
+
+    def request_market_data(self):
+        self._start_request = True
+
+    def snapshot(self):
+        # Todo corre en un solo hilo, no hace falta copiar las puntas
+        return BookSnapshot(
+            MappingProxyType(self._bids), MappingProxyType(self._asks), self._sequence
+        )
+
+    def bids(self):
+        return MappingProxyType(self._bids)
+
+    def asks(self):
+        return MappingProxyType(self._asks)
+
+    def mid_prices(self):
+        return {
+            ticker: (bid.price + self._asks[ticker].price) / 2
+            for ticker, bid in self._bids.items()
+            if ticker in self._asks
+        }
+
+    def place_order(self, ticker, side, size, price, time_in_force, order_type):
+        """Ejecuta la orden contra la punta, lo que no se ejecuta se cancela (IOC)"""
+        self._order_count += 1
+        client_id = f"replay-{self._order_count}"
+        if side == pyRofex.Side.BUY:
+            book, crosses = self._asks, lambda top: price >= top.price
+        else:
+            book, crosses = self._bids, lambda top: price <= top.price
+        top = book.get(ticker)
+        filled = 0
+        if top is not None and crosses(top):
+            filled = min(size, top.size)
+            self._simulated_fills.fill(ticker, side, filled, top.price)
+            # La liquidez tomada ya no está disponible
+            book[ticker] = OrderBook(top.price, top.size - filled)
+        if filled == size:
+            self._order_status[client_id] = "FILLED"
+        elif filled:
+            self._order_status[client_id] = "PARTIALLY_FILLED"
+        else:
+            self._order_status[client_id] = "CANCELLED"
+        return {"status": "OK", "order": {"clientId": client_id}}
+
+    def order_execution_status(self, order_id):
+        return self._order_status.get(order_id)
+
+    def orders_sent(self):
+        return self._order_count
+
+
+class ReplaySpotApi(ApiData):
+    """
+    Reemplaza a YfinanceAPI en los replays.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._prices = {}
+
+    def apply(self, event):
+        self._prices[event.instrument] = event.price
+        self._mark_updated(event.instrument)
+        self._update_last_update_api()
+
+    def request_market_data(self):
+        self._start_request = True
+
+    def last_prices(self):
+        return self._prices
+
+    def price(self, ticker):
+        return self._prices.get(ticker, 0.0)
+
+
+class ReplayOrderDispatcher(OrderDispatcher):
+    """
+    Manda las patas una detrás de otra en el mismo hilo, así el replay es determinístico.
+    """
+
+    def __init__(self, pyrofex_api, verbose=False):
+        self._pyrofex_api = pyrofex_api
+        self._latency_tracer = None
+        self._verbose = verbose
+        self._dispatched = 0
+
+    def dispatched(self):
+        """Cantidad de arbitrajes enviados"""
+        return self._dispatched
+
+    def dispatch(self, legs, decided=0):
+        self._dispatched += 1
+        futures = []
+        for leg in legs:
+            future = Future()
+            future.set_result(self._send(leg, decided))
+            futures.append(future)
+        return DispatchHandle(legs, futures)
+
+    def run_in_background(self, function, *args, **kwargs):
+        if self._verbose:
+            function(*args, **kwargs)
+
+    def shutdown(self):
+        pass
+
+
+class ReplayEngine:
+    """
+    Reproduce market data grabada a través del ImplicitRateCalculator y la Strategy reales,
+    con un reloj congelado en el timestamp de cada mensaje y ejecución simulada de las ordenes.
+    """
+
+    def __init__(
+        self,
+        instrument_handler,
+        tradeable_check,
+        rate_engine=ImplicitRateCalculator,
+        config_service=None,
+        depth_sizing=False,
+        verbose=False,
+    ):
+        futures_by_ticker = instrument_handler.rofex_instruments_by_ticker()
+        self._simulated_fills = SimulatedFills(
+            {
+                ticker: future.future_contract_size
+                for ticker, future in futures_by_ticker.items()
+            }
+        )
+        self._pyrofex_api = ReplayPyRofexApi(self._simulated_fills)
+        self._spot_api = ReplaySpotApi()
+        self._data_update = DataUpdate(self._spot_api, self._pyrofex_api)
+        config_service = config_service or get_config_service()
+        # Como en el TradingBot, el calendario de la configuración. Los días se cuentan con
+        # el reloj global, que durante el replay es el FrozenClock
+        self._clock_service = clock.clock_service_from_config(config_service)
+        self._implicit_rate_calculator = rate_engine(
+            self._pyrofex_api,
+            self._spot_api,
+            tradeable_check,
+            clock_service=self._clock_service,
+        )
+        self._order_dispatcher = ReplayOrderDispatcher(self._pyrofex_api, verbose)
+        self._strategy = Strategy(
+            instrument_handler,
+            self._implicit_rate_calculator,
+            self._pyrofex_api,
+            self._spot_api,
+            self._data_update,
+            tradeable_check,
+            depth_sizing=depth_sizing,
+            clock_service=self._clock_service,
+            config_service=config_service,
+            order_dispatcher=self._order_dispatcher,
+        )
+
+    def run(self, events):
+        """Procesa los mensajes lo más rápido posible y devuelve un ReplayReport"""
+        frozen_clock = None
+        previous_clock = clock.clock()
+        messages = 0
+        start = time.perf_counter()
+        try:
+            for event in events:
+                event_time = dt.datetime.fromtimestamp(event.timestamp)
+                if frozen_clock is None:
+                    frozen_clock = clock.FrozenClock(event_time)
+                    clock.set_clock(frozen_clock)
+                frozen_clock.set(event_time)
+                if event.side == mrec.SPOT:
+                    self._spot_api.apply(event)
+                else:
+                    self._pyrofex_api.apply(event)
+                messages += 1
+                self._data_update.give_last_update()
+                self._implicit_rate_calculator.update_rates()
+                if self._implicit_rate_calculator.ready():
+                    self._strategy.start_trades()
+        finally:
+            clock.set_clock(previous_clock)
+        seconds = time.perf_counter() - start
+        fills = self._simulated_fills.fills()
+        mark_prices = dict(self._spot_api.last_prices())
+        mark_prices.update(self._pyrofex_api.mid_prices())
+        return ReplayReport(
+            messages,
+            seconds,
+            messages / seconds if seconds else 0.0,
+            self._order_dispatcher.dispatched(),
+            self._pyrofex_api.orders_sent(),
+            len(fills),
+            self._simulated_fills.pnl(mark_prices),
+        )
+
+
+def main():
+    from src.model.tradeable_check import TradeableCheck
+
+    parser = argparse.ArgumentParser(description="Replay de market data grabada")
+    parser.add_argument("paths", nargs="+", help="logs .bin, .csv o .jsonl")
+    parser.add_argument("--tickers", nargs="+", default=["PAMP", "YPFD", "GGAL", "DLR"])
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    tradeable_check = TradeableCheck(args.tickers)
+    report = ReplayEngine(tradeable_check, tradeable_check, verbose=args.verbose).run(
+        load_events(args.paths)
+    )
+    print(
+        f"Mensajes: {report.messages} en {report.seconds:.3f} s "
+        f"({report.messages_per_second:.0f} mensajes/s)\n"
+        f"Arbitrajes: {report.trades} - Ordenes: {report.orders} - "
+        f"Ejecuciones: {report.fills}\n"
+        f"PnL: {report.pnl:.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+import itertools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pyRofex
+import requests
+import requests.adapters
+from pyRofex.components import globals as rofex_globals
+from pyRofex.components import urls
+from pyRofex.components.exceptions import ApiException
+
+from src.model.async_logger import get_logger
+from src.model.order_tracker import TERMINAL_STATES
+
+# pyRofex 0.5 agrupa los paths de instrumentos en un dict, en 0.4 son strings sueltos
+if isinstance(urls.instruments, dict):
+    DETAILED_INSTRUMENTS_URL = urls.instruments["details"]
+else:
+    DETAILED_INSTRUMENTS_URL = urls.detailed_instruments
+
+
+class RofexRestClient:
+    """
+    Cliente REST de Rofex para una cuenta y un entorno, independiente del estado global de
+    pyRofex. Todas las llamadas salen por una sesión de requests con un pool de hasta
+    pool_size conexiones keep-alive, así cada orden reutiliza una conexión TCP/TLS abierta
+    en lugar de abrir una nueva. La sesión se comparte entre hilos y warm_up abre las
+    conexiones al arrancar, antes de la primera orden.
+    """
+
+    def __init__(
+        self,
+        user,
+        password,
+        account,
+        environment,
+        pool_size=4,
+        timeout=5.0,
+        token=None,
+        base_url=None,
+        session=None,
+    ):
+        environment_config = rofex_globals.environment_config[environment]
+        self._user = user
+        self._password = password
+        self._account = account
+        self._environment = environment
+        self._proprietary = environment_config["proprietary"]
+        self._base_url = base_url or environment_config["url"]
+        self._verify = environment_config["ssl"]
+        self._proxies = environment_config["proxies"]
+        self._pool_size = pool_size
+        self._timeout = timeout
+        self._session = session or self._create_session(pool_size)
+        self._token = token
+        self._token_lock = threading.Lock()
+        self._requests = 0
+        self._requests_lock = threading.Lock()
+        self._logger = get_logger()
+
+    @staticmethod
+    def _create_session(pool_size):
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, pool_block=False
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def account(self):
+        return self._account
+
+    def environment(self):
+        return self._environment
+
+    def request_count(self):
+        """Cantidad de pedidos REST hechos, sin contar la autenticación"""
+        return self._requests
+
+    def authenticate(self):
+        """Pide un token nuevo con el usuario y la contraseña"""
+        response = self._session.post(
+            self._base_url + urls.auth,
+            headers={"X-Username": self._user, "X-Password": self._password},
+            verify=self._verify,
+            proxies=self._proxies,
+            timeout=self._timeout,
+        )
+        if not response.ok:
+            raise ApiException("Authentication fails. Incorrect User or Password")
+        self._token = response.headers["X-Auth-Token"]
+        return self._token
+
+    def _ensure_token(self):
+        if self._token is None:
+            with self._token_lock:
+                if self._token is None:
+                    self.authenticate()
+        return self._token
+
+    def _get(self, path):
+        return self._authorized_get(path).json()
+
+    def _authorized_get(self, path, stream=False):
+        token = self._ensure_token()
+        with self._requests_lock:
+            self._requests += 1
+        response = self._request(path, token, stream)
+        if response.status_code == 401:
+            # Se lee la respuesta para que la conexión vuelva al pool
+            response.content
+            # El token venció: se renueva una sola vez (si otro hilo no lo hizo ya)
+            with self._token_lock:
+                if self._token == token:
+                    self.authenticate()
+                token = self._token
+            response = self._request(path, token, stream)
+            if response.status_code == 401:
+                raise ApiException("Authentication Fails.")
+        return response
+
+    def _request(self, path, token, stream=False):
+        return self._session.get(
+            self._base_url + path,
+            headers={"X-Auth-Token": token},
+            verify=self._verify,
+            proxies=self._proxies,
+            timeout=self._timeout,
+            stream=stream,
+        )
+
+    def warm_up(self, connections=None):
+        """
+        Abre hasta connections conexiones del pool (por defecto pool_size) con pedidos
+        livianos en paralelo. Devuelve cuántos pedidos salieron bien.
+        """
+        connections = connections or self._pool_size
+        self._ensure_token()
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            responses = list(
+                executor.map(lambda _: self._warm_up_request(), range(connections))
+            )
+        # Las respuestas se leen recién cuando salieron todos los pedidos: mientras tanto
+        # cada una retiene su conexión y ningún pedido reutiliza la de otro
+        warmed_up = 0
+        for response in responses:
+            if response is not None:
+                response.content
+                response.close()
+                warmed_up += response.ok
+        return warmed_up
+
+    def _warm_up_request(self):
+        try:
+            return self._authorized_get(urls.segments, stream=True)
+        except Exception:
+            self._logger.exception("No se pudo precalentar la conexión REST...")
+            return None
+
+    def send_order(
+        self,
+        ticker,
+        size,
+        order_type,
+        side,
+        market=pyRofex.Market.ROFEX,
+        time_in_force=pyRofex.TimeInForce.DAY,
+        account=None,
+        price=None,
+        cancel_previous=False,
+        iceberg=False,
+        expire_date=None,
+        display_quantity=None,
+    ):
+        """Misma firma y mismo pedido que pyRofex.send_order"""
+        new_order_url = urls.new_order
+        if order_type is pyRofex.OrderType.LIMIT:
+            new_order_url += urls.limit_order
+        if time_in_force is pyRofex.TimeInForce.GoodTillDate:
+            new_order_url += urls.good_till_date
+        if iceberg:
+            new_order_url += urls.iceberg
+        return self._get(
+            new_order_url.format(
+                market=market.value,
+                ticker=ticker,
+                size=size,
+                type=order_type.value,
+                side=side.value,
+                time_force=time_in_force.value,
+                account=account or self._account,
+                price=price,
+                cancel_previous=cancel_previous,
+                iceberg=iceberg,
+                expire_date=expire_date,
+                display_quantity=display_quantity,
+            )
+        )
+
+    def get_order_status(self, client_order_id, proprietary=None):
+        return self._get(
+            urls.order_status.format(
+                c=client_order_id, p=proprietary or self._proprietary
+            )
+        )
+
+    def cancel_order(self, client_order_id, proprietary=None):
+        return self._get(
+            urls.cancel_order.format(
+                id=client_order_id, p=proprietary or self._proprietary
+            )
+        )
+
+    def get_detailed_instruments(self):
+        return self._get(DETAILED_INSTRUMENTS_URL)
+
+    def close(self):
+        self._session.close()
+
+
+class RestClientPool:
+    """
+    Reparte las ordenes entre varios RofexRestClient (cuentas o entornos) en round-robin.
+    Una orden con account va al cliente de esa cuenta, así las patas de un trade salen
+    todas por la cuenta que se eligió con next_account. Las consultas de una orden van al
+    cliente que la mandó. Se recuerdan las últimas
+    max_orders ordenes, y una orden se olvida al consultarla en un estado final.
+    """
+
+    def __init__(self, clients, max_orders=10000):
+        if not clients:
+            raise ValueError("RestClientPool necesita al menos un cliente")
+        self._clients = list(clients)
+        # next() de itertools.count es atómico con el GIL, no hace falta lock
+        self._counter = itertools.count()
+        # Si dos clientes tienen la misma cuenta, las ordenes con account van al primero
+        self._client_by_account = {}
+        for client in self._clients:
+            self._client_by_account.setdefault(client.account(), client)
+        self._max_orders = max_orders
+        self._client_by_order = OrderedDict()
+        self._orders_lock = threading.Lock()
+
+    def clients(self):
+        return list(self._clients)
+
+    def accounts(self):
+        return list(dict.fromkeys(client.account() for client in self._clients))
+
+    def next_client(self):
+        return self._clients[next(self._counter) % len(self._clients)]
+
+    def next_account(self):
+        return self.next_client().account()
+
+    def warm_up(self):
+        return sum(client.warm_up() for client in self._clients)
+
+    def send_order(self, *args, **kwargs):
+        client = self._client_by_account.get(kwargs.get("account"))
+        if client is None:
+            client = self.next_client()
+        response = client.send_order(*args, **kwargs)
+        client_id = response.get("order", {}).get("clientId")
+        if client_id is not None:
+            with self._orders_lock:
+                self._client_by_order[client_id] = client
+                if len(self._client_by_order) > self._max_orders:
+                    self._client_by_order.popitem(last=False)
+        return response
+
+    def _client_for(self, client_order_id):
+        with self._orders_lock:
+            return self._client_by_order.get(client_order_id, self._clients[0])
+
+    def tracked_orders(self):
+        return len(self._client_by_order)
+
+    def get_order_status(self, client_order_id, proprietary=None):
+        response = self._client_for(client_order_id).get_order_status(
+            client_order_id, proprietary
+        )
+        if response.get("order", {}).get("status") in TERMINAL_STATES:
+            with self._orders_lock:
+                self._client_by_order.pop(client_order_id, None)
+        return response
+
+    def cancel_order(self, client_order_id, proprietary=None):
+        return self._client_for(client_order_id).cancel_order(
+            client_order_id, proprietary
+        )
+
+    def get_detailed_instruments(self):
+        return self._clients[0].get_detailed_instruments()
+
+    def close(self):
+        for client in self._clients:
+            client.close()
+
+
+def rest_client_pool_from_config(
+    config_service, environment, user=None, password=None, account=None, token=None
+):
+    """
+    Un RofexRestClient con las credenciales principales (por defecto USER, PASS y ACCOUNT)
+    y uno por cada cuenta extra de REST_ACCOUNTS ({"USER", "PASS", "ACCOUNT"}), todos en
+    el entorno dado y con REST_POOL_SIZE conexiones cada uno. El pool recuerda a qué
+    cliente fueron las últimas REST_MAX_ORDERS ordenes.
+    """
+    pool_size = config_service.get("REST_POOL_SIZE", 4)
+    timeout = config_service.get("REST_TIMEOUT", 5.0)
+    max_orders = config_service.get("REST_MAX_ORDERS", 10000)
+    accounts = [
+        {
+            "USER": user or config_service["USER"],
+            "PASS": password or config_service["PASS"],
+            "ACCOUNT": account or config_service["ACCOUNT"],
+        }
+    ] + list(config_service.get("REST_ACCOUNTS", []))
+    return RestClientPool(
+        [
+            RofexRestClient(
+                credentials["USER"],
+                credentials["PASS"],
+                credentials["ACCOUNT"],
+                environment,
+                pool_size=pool_size,
+                timeout=timeout,
+                # La cuenta principal reutiliza el token que ya pidió pyRofex
+                token=token if i == 0 else None,
+            )
+            for i, credentials in enumerate(accounts)
+        ],
+        max_orders=max_orders,
+    )
@@ -0,0 +1,760 @@
+import multiprocessing
+import platform
+import queue
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import nullcontext
+from multiprocessing import shared_memory
+from types import MappingProxyType
+
+import numpy as np
+
+import src.model.api_wrapper as wrapper
+from src.model.async_logger import get_logger
+from src.model.clock import clock_service_from_config
+from src.model.config import get_config_service
+from src.model.instrument_catalog import InstrumentCatalog
+from src.model.latency import timestamp
+from src.model.market_apis import (
+    ApiData,
+    OrderBook,
+    PriceLevels,
+    PyRofexApi,
+    SpotSource,
+)
+from src.model.opportunity_scanner import opportunity_scanner_from_config
+from src.model.order_tracker import TERMINAL_STATES
+from src.model.position_engine import position_engine_from_config
+from src.model.strategy import Strategy
+from src.model.tradeable_check import TradeableCheck
+from src.model.update_data import DataUpdate
+
+# Posiciones del encabezado de la memoria compartida
+SEQLOCK = 0
+BOOK_SEQUENCE = 1
+RECEIVED = 2
+HEADER_SIZE = 4
+
+# Lados y campos de los niveles de cada libro
+BID = 0
+ASK = 1
+PRICE = 0
+SIZE = 1
+
+# Arquitecturas con orden total de escrituras (TSO), donde el seqlock no necesita barreras
+TSO_MACHINES = frozenset({"x86_64", "amd64", "i386", "i686", "x86"})
+
+# Todo lo que un proceso worker necesita para armar su shard, se pasa por pickle al crearlo.
+# rate_engine es la clase del calculador de tasas, wake y stop son multiprocessing.Event,
+# instruments es el catálogo del feed, token el de pyRofex del feed, order_reports la cola
+# por la que el feed le pasa los reportes de sus ordenes, sent_orders la cola compartida en
+# la que los workers avisan (worker_id, clientId) de cada orden que mandan y lock el de la
+# memoria compartida (None en x86).
+ShardConfig = namedtuple(
+    "ShardConfig",
+    "worker_id memory_name futures_tickers underliers depth tickers maturities "
+    "rate_engine wake stop instruments token order_reports sent_orders lock",
+)
+
+
+def memory_model_is_tso(machine=None):
+    """Si la arquitectura garantiza que las escrituras se ven en el orden en que se hacen"""
+    return (machine or platform.machine()).lower() in TSO_MACHINES
+
+
+class SharedMarketData:
+    """
+    Puntas de los futuros y precios spot en un bloque de multiprocessing.shared_memory.
+    Escribe un solo proceso (el feed) y leen los workers, sincronizados con un seqlock: el
+    escritor deja la secuencia impar mientras escribe y los lectores copian y reintentan si
+    la secuencia cambió en el medio. Nadie toma locks entre procesos.
+    Cada instrumento guarda la secuencia de su última escritura, así cada lector sabe qué
+    cambió desde su última lectura.
+    El seqlock se apoya en que las escrituras se vean en orden (TSO, como en x86): desde
+    Python no hay barreras de memoria. En otras arquitecturas hay que pasar lock (un
+    multiprocessing.Lock, que es una barrera completa) y escritor y lectores lo toman.
+    """
+
+    def __init__(self, futures_tickers, underliers, depth=1, name=None, lock=None):
+        if lock is None and not memory_model_is_tso():
+            raise RuntimeError(
+                f"SharedMarketData sin lock solo es correcto en x86, no en "
+                f"{platform.machine()}"
+            )
+        self._lock = lock
+        self._futures_tickers = list(futures_tickers)
+        self._underliers = list(underliers)
+        self._depth = depth
+        self._future_index = {
+            ticker: i for i, ticker in enumerate(self._futures_tickers)
+        }
+        self._underlier_index = {
+            underlier: i for i, underlier in enumerate(self._underliers)
+        }
+        n_futures, n_underliers = len(self._futures_tickers), len(self._underliers)
+        int_sizes = (HEADER_SIZE, n_futures, n_underliers)
+        float_sizes = (n_futures * 2 * depth * 2, n_underliers)
+        size = 8 * (sum(int_sizes) + sum(float_sizes))
+        # Con name None se crea el bloque, si no se adjunta al que creó el feed
+        self._owner = name is None
+        self._memory = shared_memory.SharedMemory(
+            name=name, create=self._owner, size=max(size, 8)
+        )
+        offset = 0
+        arrays = []
+        for dtype, count in [(np.int64, n) for n in int_sizes] + [
+            (np.float64, n) for n in float_sizes
+        ]:
+            arrays.append(
+                np.ndarray(
+                    (count,), dtype=dtype, buffer=self._memory.buf, offset=offset
+                )
+            )
+            offset += 8 * count
+        self._header, self._book_versions, self._spot_versions = arrays[:3]
+        self._books = arrays[3].reshape((n_futures, 2, depth, 2))
+        self._spots = arrays[4]
+        if self._owner:
+            self._header[:] = 0
+            self._book_versions[:] = 0
+            self._spot_versions[:] = 0
+            self._books[:] = np.nan
+            self._spots[:] = np.nan
+
+    def name(self):
+        return self._memory.name
+
+    def futures_tickers(self):
+        return self._futures_tickers
+
+    def underliers(self):
+        return self._underliers
+
+    def depth(self):
+        return self._depth
+
+    def future_index(self):
+        return self._future_index
+
+    def underlier_index(self):
+        return self._underlier_index
+
+    def book_sequence(self):
+        return int(self._header[BOOK_SEQUENCE])
+
+    def publish(self, book_snapshot, prices, updated_futures, updated_underliers):
+        """
+        Escribe los futuros y subyacentes que cambiaron. Lo llama solo el proceso feed.
+        Devuelve la cantidad de instrumentos escritos.
+        """
+        futures = [
+            self._future_index[ticker]
+            for ticker in updated_futures
+            if ticker in self._future_index
+        ]
+        underliers = [
+            self._underlier_index[underlier]
+            for underlier in updated_underliers
+            if underlier in self._underlier_index and underlier in prices
+        ]
+        if not futures and not underliers:
+            return 0
+        with self._lock or nullcontext():
+            sequence = int(self._header[SEQLOCK]) + 2
+            self._header[SEQLOCK] = sequence - 1
+            for i in futures:
+                ticker = self._futures_tickers[i]
+                self._write_levels(
+                    i, BID, book_snapshot.bid_levels.get(ticker), book_snapshot.bids
+                )
+                self._write_levels(
+                    i, ASK, book_snapshot.ask_levels.get(ticker), book_snapshot.asks
+                )
+                self._book_versions[i] = sequence
+            for i in underliers:
+                self._spots[i] = prices[self._underliers[i]]
+                self._spot_versions[i] = sequence
+            if futures:
+                self._header[BOOK_SEQUENCE] += 1
+            self._header[RECEIVED] = timestamp()
+            self._header[SEQLOCK] = sequence
+        return len(futures) + len(underliers)
+
+    def _write_levels(self, i, side, levels, top_of_book):
+        book = self._books[i, side]
+        book[:] = np.nan
+        if levels is not None:
+            n = min(len(levels.prices), self._depth)
+            book[:n, PRICE] = levels.prices[:n]
+            book[:n, SIZE] = levels.sizes[:n]
+        elif self._futures_tickers[i] in top_of_book:
+            order_book = top_of_book[self._futures_tickers[i]]
+            book[0] = (order_book.price, order_book.size)
+
+    def read(self, futures, underliers):
+        """
+        Copia consistente de los futuros y subyacentes indicados (arrays de índices).
+        Devuelve (secuencia del libro, recibido, versiones de los futuros, libros,
+        versiones de los spot, spots).
+        """
+        if self._lock is not None:
+            with self._lock:
+                return self._copy(futures, underliers)
+        while True:
+            sequence = int(self._header[SEQLOCK])
+            if sequence & 1:
+                # El feed está escribiendo, se le cede el procesador
+                time.sleep(0)
+                continue
+            data = self._copy(futures, underliers)
+            if int(self._header[SEQLOCK]) == sequence:
+                return data
+
+    def _copy(self, futures, underliers):
+        # La indexación con arrays de índices copia, las copias no cambian después
+        return (
+            int(self._header[BOOK_SEQUENCE]),
+            int(self._header[RECEIVED]),
+            self._book_versions[futures],
+            self._books[futures],
+            self._spot_versions[underliers],
+            self._spots[underliers],
+        )
+
+    def close(self):
+        # Las vistas de NumPy apuntan al bloque, se sueltan antes de cerrarlo
+        self._header = self._book_versions = self._spot_versions = None
+        self._books = self._spots = None
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+class SharedSpotSource(SpotSource):
+    """
+    Precios spot de un worker, los escribe SharedPyRofexApi al leer la memoria compartida.
+    """
+
+    def request_market_data(self):
+        self._start_request = True
+
+
+class SharedPyRofexApi(PyRofexApi):
+    """
+    PyRofexApi de un worker: las puntas de los futuros de su shard salen de la memoria
+    compartida en lugar del websocket de market data. Las ordenes se mandan por REST desde el
+    worker y sus reportes los reenvía el feed por la cola order_reports, el worker no abre
+    ningún websocket. El clientId de cada orden mandada se avisa al feed por sent_orders,
+    para que le reenvíe sus reportes, y a los listeners de add_order_sent_listener.
+    """
+
+    def __init__(
+        self,
+        shared_market_data,
+        spot_source,
+        tradeable_check,
+        order_reports=None,
+        sent_orders=None,
+        worker_id=None,
+    ):
+        super().__init__(tradeable_check, subscribe_to_order_report=False)
+        self._shared_market_data = shared_market_data
+        self._spot_source = spot_source
+        self._order_reports = order_reports
+        self._order_reports_thread = None
+        self._sent_orders = sent_orders
+        self._worker_id = worker_id
+        self._order_sent_listeners = []
+        future_index = shared_market_data.future_index()
+        self._shard_futures = [
+            ticker for ticker in self._futures_ticker if ticker in future_index
+        ]
+        self._future_ids = np.array(
+            [future_index[ticker] for ticker in self._shard_futures], dtype=np.intp
+        )
+        underlier_index = shared_market_data.underlier_index()
+        self._shard_underliers = [
+            underlier
+            for underlier, futures in (
+                tradeable_check.tradeable_pyrofex_future_underlier_ticker().items()
+            )
+            if futures and underlier in underlier_index
+        ]
+        self._underlier_ids = np.array(
+            [underlier_index[underlier] for underlier in self._shard_underliers],
+            dtype=np.intp,
+        )
+        self._book_versions = np.zeros(len(self._shard_futures), dtype=np.int64)
+        # Secuencia global de puntas de la última lectura, la del snapshot es la del shard
+        self._book_sequence = 0
+        self._spot_versions = np.zeros(len(self._shard_underliers), dtype=np.int64)
+
+    def request_market_data(self):
+        """La market data la publica el feed, acá solo se leen los reportes reenviados"""
+        self._start_request = True
+        if self._order_reports is not None and self._order_reports_thread is None:
+            self._order_reports_thread = threading.Thread(
+                target=self._read_order_reports, name="order-reports", daemon=True
+            )
+            self._order_reports_thread.start()
+
+    def add_order_sent_listener(self, listener):
+        """listener(clientId) se llama por cada orden mandada, en el hilo que la mandó"""
+        self._order_sent_listeners.append(listener)
+
+    def place_order(self, *args, **kwargs):
+        response = super().place_order(*args, **kwargs)
+        client_id = response.get("order", {}).get("clientId")
+        if client_id is not None:
+            if self._sent_orders is not None:
+                self._sent_orders.put((self._worker_id, client_id))
+            for listener in self._order_sent_listeners:
+                listener(client_id)
+        return response
+
+    def _read_order_reports(self):
+        while True:
+            message = self._order_reports.get()
+            if message is None:
+                return
+            self._order_report_handler(message)
+
+    def stop(self):
+        # No hay websocket que cerrar
+        ApiData.stop(self)
+        if self._order_reports_thread is not None:
+            self._order_reports.put(None)
+            self._order_reports_thread.join(1.0)
+            self._order_reports_thread = None
+
+    def invalidate_market_data(self):
+        """Las puntas las publica el feed, el worker no tiene conexión que se corte"""
+        return 0
+
+    def snapshot(self):
+        """Foto de las puntas del shard, se relee si el feed publicó puntas nuevas"""
+        if self._shared_market_data.book_sequence() != self._book_sequence:
+            self.refresh(spots=False)
+        return self._snapshot
+
+    def refresh(self, spots=True):
+        """
+        Lee la memoria compartida y aplica lo que cambió desde la última lectura. Los spot
+        se leen solo desde el loop del worker (spots=True), así el calculador nunca marca un
+        subyacente con un precio que no leyó.
+        """
+        (
+            book_sequence,
+            received,
+            book_versions,
+            books,
+            spot_versions,
+            spot_prices,
+        ) = self._shared_market_data.read(
+            self._future_ids, self._underlier_ids if spots else self._underlier_ids[:0]
+        )
+        self._book_sequence = book_sequence
+        changed = np.flatnonzero(book_versions != self._book_versions)
+        if changed.size:
+            self._apply_books(changed, books, received)
+            self._book_versions = book_versions
+        if spots:
+            changed_spots = np.flatnonzero(spot_versions != self._spot_versions)
+            if changed_spots.size:
+                self._spot_source._set_prices(
+                    {
+                        self._shard_underliers[i]: float(spot_prices[i])
+                        for i in changed_spots
+                        if not np.isnan(spot_prices[i])
+                    },
+                    received,
+                )
+                self._spot_versions = spot_versions
+
+    def _apply_books(self, changed, books, received):
+        snapshot = self._snapshot
+        bids, asks = dict(snapshot.bids), dict(snapshot.asks)
+        bid_levels, ask_levels = dict(snapshot.bid_levels), dict(snapshot.ask_levels)
+        for i in changed:
+            ticker = self._shard_futures[i]
+            for side, top_of_book, levels_by_ticker in (
+                (BID, bids, bid_levels),
+                (ASK, asks, ask_levels),
+            ):
+                book = books[i, side]
+                valid = ~np.isnan(book[:, PRICE])
+                if valid.any():
+                    levels = PriceLevels(book[valid, PRICE], book[valid, SIZE])
+                    top_of_book[ticker] = OrderBook(
+                        levels.prices[0].item(), levels.sizes[0].item()
+                    )
+                    levels_by_ticker[ticker] = levels
+                else:
+                    top_of_book.pop(ticker, None)
+                    levels_by_ticker.pop(ticker, None)
+            self._mark_updated(ticker)
+        self._snapshot = snapshot._replace(
+            bids=MappingProxyType(bids),
+            asks=MappingProxyType(asks),
+            bid_levels=MappingProxyType(bid_levels),
+            ask_levels=MappingProxyType(ask_levels),
+            sequence=snapshot.sequence + 1,
+            received=received,
+        )
+        self._last_received = received
+        self._update_last_update_api()
+
+
+class ShardTradeableCheck(TradeableCheck):
+    """
+    TradeableCheck restringido a los vencimientos de un shard. Los índices se arman igual que
+    en TradeableCheck pero solo con esos vencimientos.
+    """
+
+    def __init__(self, tickers, maturities, instrument_catalog=None):
+        self._shard_maturities = frozenset(maturities)
+        super().__init__(tickers, instrument_catalog)
+
+    def _build_tradeable_indices(self):
+        future_maturity = self._pyrofex_future_maturity
+        self._pyrofex_future_maturity = MappingProxyType(
+            {
+                maturity: futures
+                for maturity, futures in future_maturity.items()
+                if maturity in self._shard_maturities
+            }
+        )
+        super()._build_tradeable_indices()
+        self._pyrofex_future_maturity = future_maturity
+
+
+def assign_shards(futures_by_maturity, n_workers):
+    """
+    Reparte los vencimientos entre n_workers: cada vencimiento va al worker con menos futuros
+    hasta el momento, empezando por los vencimientos con más futuros.
+    """
+    shards = [[] for _ in range(n_workers)]
+    loads = [0] * n_workers
+    for maturity, futures in sorted(
+        futures_by_maturity.items(), key=lambda item: (-len(item[1]), item[0])
+    ):
+        worker = loads.index(min(loads))
+        shards[worker].append(maturity)
+        loads[worker] += len(futures)
+    return [shard for shard in shards if shard]
+
+
+class ShardWorker:
+    """
+    Lo que corre en un proceso worker: lee su shard de la memoria compartida, calcula las
+    tasas y tradea. Usa el catálogo y el token del feed, así no vuelve a descargar el
+    catálogo ni a autenticarse, y recibe los reportes de sus ordenes por la cola del feed.
+    """
+
+    def __init__(self, shard, config_service=None):
+        config_service = config_service or get_config_service()
+        self._shard = shard
+        self._logger = get_logger()
+        # Inicializa pyRofex y el pool REST del worker con el token del feed
+        wrapper.APIWrapper(token=shard.token)
+        self._shared_market_data = SharedMarketData(
+            shard.futures_tickers,
+            shard.underliers,
+            shard.depth,
+            name=shard.memory_name,
+            lock=shard.lock,
+        )
+        self._tradeable_check = ShardTradeableCheck(
+            shard.tickers,
+            shard.maturities,
+            InstrumentCatalog(path=None, instruments=shard.instruments),
+        )
+        self._spot_source = SharedSpotSource()
+        self._pyrofex_api = SharedPyRofexApi(
+            self._shared_market_data,
+            self._spot_source,
+            self._tradeable_check,
+            order_reports=shard.order_reports,
+            sent_orders=shard.sent_orders,
+            worker_id=shard.worker_id,
+        )
+        self._data_update = DataUpdate(self._spot_source, self._pyrofex_api)
+        clock_service = clock_service_from_config(config_service)
+        self._implicit_rate_calculator = shard.rate_engine(
+            self._pyrofex_api,
+            self._spot_source,
+            self._tradeable_check,
+            clock_service=clock_service,
+        )
+        # Cada worker lleva las posiciones y los límites de sus propios vencimientos: los de
+        # vencimiento son exactos, los de subyacente y el total valen por worker
+        self._position_engine = position_engine_from_config(
+            self._tradeable_check, self._tradeable_check, config_service
+        )
+        # Un reporte que llega antes que el aviso de la orden se reparte a todos los
+        # workers: cada uno cuenta solo las ejecuciones de las ordenes que mandó.
+        # {clientId: ejecuciones ya aplicadas} de las ordenes propias sin terminar
+        self._applied_fills = {}
+        self._fills_lock = threading.Lock()
+        self._pyrofex_api.add_order_report_listener(self._on_order_report)
+        self._pyrofex_api.add_order_sent_listener(self._on_order_sent)
+        self._strategy = Strategy(
+            self._tradeable_check,
+            self._implicit_rate_calculator,
+            self._pyrofex_api,
+            self._spot_source,
+            self._data_update,
+            self._tradeable_check,
+            depth_sizing=shard.depth > 1,
+            config_service=config_service,
+            clock_service=clock_service,
+            opportunity_scanner=opportunity_scanner_from_config(config_service),
+            position_engine=self._position_engine,
+        )
+
+    def _on_order_report(self, message):
+        report = message.get("orderReport", message)
+        order = self._pyrofex_api.order_tracker().order(report.get("clOrdId"))
+        if order is not None:
+            self._apply_fills(order)
+
+    def _on_order_sent(self, client_id):
+        with self._fills_lock:
+            self._applied_fills.setdefault(client_id, 0)
+        # El reporte pudo haber llegado antes que la respuesta del envío
+        order = self._pyrofex_api.order_tracker().order(client_id)
+        if order is not None:
+            self._apply_fills(order)
+
+    def _apply_fills(self, order):
+        """
+        Aplica una sola vez las ejecuciones nuevas de una orden propia, y la olvida cuando
+        terminó
+        """
+        with self._fills_lock:
+            applied = self._applied_fills.get(order.client_id)
+            if applied is None:
+                return
+            # Se mira antes que las ejecuciones: si ya terminó, no llegan más
+            done = order.done()
+            fills = order.fills[applied:]
+            if done:
+                del self._applied_fills[order.client_id]
+            else:
+                self._applied_fills[order.client_id] = applied + len(fills)
+            for fill in fills:
+                self._position_engine.on_fill(order, fill)
+
+    def rate_calculator(self):
+        return self._implicit_rate_calculator
+
+    def position_engine(self):
+        return self._position_engine
+
+    def pyrofex_api(self):
+        return self._pyrofex_api
+
+    def start(self):
+        self._logger.info(
+            "Worker %s: vencimientos %s", self._shard.worker_id, self._shard.maturities
+        )
+        self._spot_source.request_market_data()
+        self._pyrofex_api.request_market_data()
+
+    def step(self):
+        """Lee lo que publicó el feed, recalcula y tradea. Devuelve si había data nueva"""
+        self._pyrofex_api.refresh()
+        if not self._data_update.update_boolean():
+            return False
+        self._data_update.give_last_update()
+        self._implicit_rate_calculator.update_rates()
+        if self._implicit_rate_calculator.ready():
+            self._strategy.start_trades()
+        return True
+
+    def run(self):
+        self.start()
+        while not self._shard.stop.is_set():
+            if not self._shard.wake.wait(1.0):
+                continue
+            # Se limpia antes de leer: lo que publique el feed después vuelve a despertar
+            self._shard.wake.clear()
+            self.step()
+
+    def close(self):
+        self._logger.info(
+            "Worker %s posiciones: %s",
+            self._shard.worker_id,
+            self._position_engine.report(),
+        )
+        self._pyrofex_api.stop()
+        self._shared_market_data.close()
+
+
+def run_shard(shard):
+    """Loop de un proceso worker"""
+    config_service = get_config_service()
+    logger = get_logger()
+    logger.set_level(config_service.get("LOG_LEVEL", "INFO"))
+    worker = None
+    try:
+        worker = ShardWorker(shard, config_service)
+        worker.run()
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        logger.exception("Excepción en el worker %s...", shard.worker_id)
+    finally:
+        if worker is not None:
+            worker.close()
+        logger.flush()
+
+
+class ShardedFeed:
+    """
+    Modo multiproceso: este proceso es el feed, dueño de PyRofexApi y de la fuente spot, y
+    publica las puntas y los spot en memoria compartida. Cada worker es un proceso aparte con
+    un subconjunto de los vencimientos tradeables y corre su propio calculador y Strategy,
+    así el cálculo de tasas y las decisiones escalan con los núcleos en lugar de competir
+    por un solo GIL.
+    """
+
+    def __init__(
+        self,
+        pyrofex_api,
+        spot_source,
+        tradeable_check,
+        tickers,
+        n_workers,
+        rate_engine,
+        depth=1,
+        max_orders=10000,
+    ):
+        self._pyrofex_api = pyrofex_api
+        self._spot_source = spot_source
+        futures_tickers = tradeable_check.tradeable_rofex_futures_tickers()
+        underliers = sorted(tradeable_check.tradeable_pyrofex_future_underlier_ticker())
+        # spawn: los workers no heredan los hilos ni el websocket de este proceso
+        context = multiprocessing.get_context("spawn")
+        # Fuera de x86 el seqlock solo no alcanza, escritor y lectores toman un lock
+        lock = None if memory_model_is_tso() else context.Lock()
+        self._shared_market_data = SharedMarketData(
+            futures_tickers, underliers, depth, lock=lock
+        )
+        # Los workers reciben el catálogo y el token ya cargados
+        instruments = list(tradeable_check.instrument_catalog().instruments())
+        token = wrapper.APIWrapper().token()
+        self._stop_event = context.Event()
+        self._shards = []
+        # Los workers avisan las ordenes que mandan, así sus reportes van solo a ellos
+        self._sent_orders = context.Queue()
+        # {clientId: shard} de las últimas max_orders ordenes sin terminar
+        self._shard_by_order = OrderedDict()
+        self._max_orders = max_orders
+        futures_by_maturity = tradeable_check.tradeable_futures_by_maturity()
+        for worker_id, maturities in enumerate(
+            assign_shards(futures_by_maturity, n_workers)
+        ):
+            shard = ShardConfig(
+                worker_id,
+                self._shared_market_data.name(),
+                futures_tickers,
+                underliers,
+                depth,
+                list(tickers),
+                maturities,
+                rate_engine,
+                context.Event(),
+                self._stop_event,
+                instruments,
+                token,
+                context.Queue(),
+                self._sent_orders,
+                lock,
+            )
+            self._shards.append(shard)
+        # Un solo websocket de reportes de ordenes, el del feed, que los reparte
+        pyrofex_api.add_order_report_listener(self._route_order_report)
+        self._processes = [
+            context.Process(
+                target=run_shard, args=(shard,), name=f"shard-{shard.worker_id}"
+            )
+            for shard in self._shards
+        ]
+        self._publications = 0
+        self._logger = get_logger()
+
+    def _read_sent_orders(self):
+        while True:
+            try:
+                worker_id, client_id = self._sent_orders.get_nowait()
+            except queue.Empty:
+                return
+            self._shard_by_order[client_id] = self._shards[worker_id]
+            if len(self._shard_by_order) > self._max_orders:
+                self._shard_by_order.popitem(last=False)
+
+    def _route_order_report(self, message):
+        """
+        Manda el reporte al worker que mandó la orden, según su clOrdId. Si todavía no llegó
+        el aviso de la orden (o no es de ningún worker) va a todos, así el que la mandó ve
+        su estado, y cada worker cuenta solo las ejecuciones de sus ordenes.
+        """
+        self._read_sent_orders()
+        report = message.get("orderReport", message)
+        client_id = report.get("clOrdId")
+        shard = self._shard_by_order.get(client_id)
+        if shard is None:
+            for shard in self._shards:
+                shard.order_reports.put(message)
+            return
+        shard.order_reports.put(message)
+        if report.get("status") in TERMINAL_STATES:
+            del self._shard_by_order[client_id]
+
+    def shards(self):
+        """Vencimientos de cada worker"""
+        return [shard.maturities for shard in self._shards]
+
+    def publications(self):
+        return self._publications
+
+    def start(self):
+        for process in self._processes:
+            process.start()
+        self._logger.info(
+            "Feed multiproceso: %s workers %s", len(self._processes), self.shards()
+        )
+
+    def publish(self):
+        """Publica lo que cambió desde la última vez y despierta a los workers"""
+        # Primero los marcados y después las fotos, como en el calculador de tasas: lo que
+        # llegue en el medio se publica ahora y queda marcado para la próxima vez
+        updated_futures = self._pyrofex_api.pop_updated()
+        updated_underliers = self._spot_source.pop_updated()
+        if not self._shared_market_data.publish(
+            self._pyrofex_api.snapshot(),
+            self._spot_source.last_prices(),
+            updated_futures,
+            updated_underliers,
+        ):
+            return False
+        self._publications += 1
+        for shard in self._shards:
+            shard.wake.set()
+        return True
+
+    def stop(self, timeout=5.0):
+        self._stop_event.set()
+        for process in self._processes:
+            if process.pid is None:
+                # Nunca arrancó
+                continue
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        for shard in self._shards:
+            shard.order_reports.close()
+        self._sent_orders.close()
+        self._shared_market_data.close()
@@ -0,0 +1,91 @@
+import pyRofex
+
+from src.model.market_apis import SpotSource
+
+DEFAULT_SPOT_TICKER_FORMAT = "MERV - XMEV - {ticker} - 48hs"
+
+
+def spot_ticker(underlier_ticker, config_service):
+    """
+    Ticker de Rofex del spot de un subyacente: SPOT_TICKERS si lo tiene, si no
+    SPOT_TICKER_FORMAT.
+    """
+    spot_tickers = config_service.get("SPOT_TICKERS", {})
+    if underlier_ticker in spot_tickers:
+        return spot_tickers[underlier_ticker]
+    return config_service.get("SPOT_TICKER_FORMAT", DEFAULT_SPOT_TICKER_FORMAT).format(
+        ticker=underlier_ticker
+    )
+
+
+class RofexSpotSource(SpotSource):
+    """
+    Precios spot por el websocket de Rofex, en la misma sesión que los futuros de PyRofexApi.
+    Los precios llegan por push: último operado y, si no hubo operaciones, el precio medio
+    entre las puntas.
+    """
+
+    ENTRIES = [
+        pyRofex.MarketDataEntry.LAST,
+        pyRofex.MarketDataEntry.BIDS,
+        pyRofex.MarketDataEntry.OFFERS,
+    ]
+
+    def __init__(self, pyrofex_api, spot_tickers):
+        super().__init__()
+        self._pyrofex_api = pyrofex_api
+        # {subyacente: ticker de Rofex del spot}
+        self._underlier_by_symbol = {
+            symbol: underlier for underlier, symbol in spot_tickers.items()
+        }
+        self._subscribed = False
+
+    def request_market_data(self):
+        """Suscribe los spot en el websocket de PyRofexApi, una sola vez"""
+        self._start_request = True
+        if not self._subscribed:
+            self._pyrofex_api.add_market_data_listener(
+                self._underlier_by_symbol.keys(), self._on_market_data, self.ENTRIES
+            )
+            self._subscribed = True
+            self._logger.info(
+                "Spot por websocket de Rofex: %s", list(self._underlier_by_symbol)
+            )
+
+    @staticmethod
+    def spot_price(market_data):
+        """Último precio operado, o el medio entre las puntas si no hubo operaciones"""
+        last = market_data.get(pyRofex.MarketDataEntry.LAST.value)
+        if last and last.get("price"):
+            return last["price"]
+        bids = market_data.get(pyRofex.MarketDataEntry.BIDS.value)
+        offers = market_data.get(pyRofex.MarketDataEntry.OFFERS.value)
+        if bids and offers:
+            return (bids[0]["price"] + offers[0]["price"]) / 2
+        return None
+
+    def _on_market_data(self, message, received):
+        underlier = self._underlier_by_symbol[message["instrumentId"]["symbol"]]
+        price = self.spot_price(message["marketData"])
+        if price is not None:
+            self._set_prices({underlier: price}, received)
+
+
+class FakeSpotSource(SpotSource):
+    """
+    Fuente spot local para tests y simulaciones, los precios se empujan con push.
+    """
+
+    def __init__(self, prices=None):
+        super().__init__()
+        if prices:
+            self._set_prices(prices)
+
+    def request_market_data(self):
+        self._start_request = True
+
+    def push(self, underlier, price):
+        return self._set_prices({underlier: price})
+
+    def push_many(self, prices):
+        return self._set_prices(prices)
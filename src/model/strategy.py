@@ -1,6 +1,13 @@
 from collections import namedtuple
-import json
 import pyRofex
+from src.model.async_logger import get_logger
+from src.model.config import get_config_service
+from src.model.depth_sizing import DepthSizer
+from src.model.latency import RATES_TO_DECISION, timestamp
+from src.model.opportunity_scanner import Opportunity
+from src.model.order_dispatcher import OrderDispatcher, OrderLeg
+from src.model.position_engine import LimitBreached
+from src.model.spot_sources import spot_ticker
 
 
 class Strategy:
@@ -13,25 +20,114 @@ class Strategy:
         instrument_handler,
         implicit_rate_calculator,
         pyrofex_api,
-        yfinance_api,
+        spot_source,
         data_update,
         tradeable_check,
+        require_same_snapshot=True,
+        depth_sizing=False,
+        config_service=None,
+        order_dispatcher=None,
+        latency_tracer=None,
+        clock_service=None,
+        opportunity_scanner=None,
+        position_engine=None,
     ):
         self._futures_by_ticker = instrument_handler.rofex_instruments_by_ticker()
         self._tradeable_maturitys = tradeable_check.tradeable_maturities()
         self._implicit_rate_calculator = implicit_rate_calculator
         self._pyrofex_api = pyrofex_api
-        self._yfinance_api = yfinance_api
+        self._spot_source = spot_source
         self._data_update = data_update
+        # Si es True no se opera cuando las puntas cambiaron desde que se calcularon las tasas
+        self._require_same_snapshot = require_same_snapshot
+        # Si es True el size se calcula recorriendo la profundidad del libro
+        self._depth_sizer = DepthSizer(clock_service) if depth_sizing else None
+        # La configuración se lee de memoria, sin tocar el disco en cada evaluación
+        self._config_service = config_service or get_config_service()
+        self._logger = get_logger()
+        # Mide tasas->decisión, si está configurado
+        self._latency_tracer = latency_tracer
+        # Si está configurado, se operan las oportunidades rankeadas entre todos los
+        # vencimientos en lugar del mejor par de cada vencimiento
+        self._opportunity_scanner = opportunity_scanner
+        # Si está configurado, controla los límites de riesgo antes de mandar las patas
+        self._position_engine = position_engine
+        # Manda las patas del arbitraje en paralelo
+        self._order_dispatcher = order_dispatcher or OrderDispatcher(
+            pyrofex_api, latency_tracer=latency_tracer
+        )
 
     def start_trades(self):
-        """Tradea cada vencimiento"""
+        """Tradea cada vencimiento, o las mejores oportunidades del scanner"""
+        if self._opportunity_scanner is not None:
+            self.start_ranked_trades()
+            return
         for tradeable_maturity in self._tradeable_maturitys:
             if self._implicit_rate_calculator.maturiry_ready_to_trade(
                 tradeable_maturity
             ):
                 self.start_trades_by_maturity(tradeable_maturity)
 
+    def trading_on_snapshot(self, book_snapshot):
+        """Controla que la foto de las tasas sea la última publicada por Rofex"""
+        if not self._require_same_snapshot:
+            return True
+        return self._pyrofex_api.snapshot().sequence == book_snapshot.sequence
+
+    def _depth_size(
+        self,
+        book_snapshot,
+        ticker_to_buy,
+        ticker_to_sell,
+        underlier_sell_price,
+        underlier_buy_price,
+        cost,
+    ):
+        """
+        Recorre la profundidad de los dos libros, devuelve None si no hay profundidad
+        (se usa solo la primera punta) o si no se encontró un monto rentable.
+        """
+        if self._depth_sizer is None:
+            return None
+        ask_levels = book_snapshot.ask_levels.get(ticker_to_buy)
+        bid_levels = book_snapshot.bid_levels.get(ticker_to_sell)
+        if ask_levels is None or bid_levels is None:
+            return None
+        return self._depth_sizer.size(
+            ask_levels,
+            bid_levels,
+            self._futures_by_ticker[ticker_to_buy],
+            self._futures_by_ticker[ticker_to_sell],
+            underlier_sell_price,
+            underlier_buy_price,
+            cost,
+        )
+
+    def start_ranked_trades(self):
+        """
+        Opera en orden las oportunidades rankeadas por el scanner, de la de mayor diferencia
+        de tasas a la de menor. Se corta cuando llega data nueva.
+        """
+        self._opportunity_scanner.update(
+            self._implicit_rate_calculator.rates_snapshot()
+        )
+        cost = self._config_service["COST"]
+        opportunities = self._opportunity_scanner.top(cost)
+        decided = self._decided()
+        for opportunity in opportunities:
+            if not self._trade(opportunity, cost, decided):
+                break
+
+    def _decided(self):
+        decided = timestamp()
+        if self._latency_tracer is not None:
+            self._latency_tracer.record(
+                RATES_TO_DECISION,
+                self._implicit_rate_calculator.rates_timestamp(),
+                decided,
+            )
+        return decided
+
     def start_trades_by_maturity(self, tradeable_maturity):
         """Si hay oportunidades manda las ordenes"""
         # Vender tasa tomadora cara y comprar tasa colocadora barata.
@@ -42,40 +138,85 @@ class Strategy:
             tradeable_maturity=tradeable_maturity
         )
 
-        with open(
-            "C:/Users/54112/source/repos/Arbitraje-de-Tasas/src/conf/config.json"
-        ) as f:
-            config = json.load(f)
+        cost = self._config_service["COST"]
         # Esto no es lo mejor, pero a fin de hacerlo sencillo, si la difrencia de la tasa cara con la barata
         # es menor a la al costo de transaccion, no ejecutar trade...
         # Se podría mejorar de la siguiente manera:
         # Si la diferencia entre el cashflow resultante de colocar tasa cara y tomar tasa barata
         # es mayor al costo de transaccion, entonces ejecutar trade.(Tener en cuenta que los montos
         # de buy y sell del spot no siempre coinciden por lo que es mejor hacerlo de esta manera...)
-        if not max_buy_rate - min_sell_rate > config["COST"]:
+        opportunity = max_buy_rate - min_sell_rate > cost
+        decided = self._decided()
+        if not opportunity:
             return
+        self._trade(
+            Opportunity(
+                ticker_to_sell,
+                max_buy_rate,
+                tradeable_maturity,
+                ticker_to_buy,
+                min_sell_rate,
+                tradeable_maturity,
+                max_buy_rate - min_sell_rate,
+            ),
+            cost,
+            decided,
+        )
+
+    def _trade(self, opportunity, cost, decided):
+        """
+        Calcula el size y manda las patas de una oportunidad.
+        Devuelve False si no se operó porque la data ya no es la de las tasas.
+        """
+        ticker_to_sell, max_buy_rate = opportunity.ticker_to_sell, opportunity.buy_rate
+        ticker_to_buy, min_sell_rate = opportunity.ticker_to_buy, opportunity.sell_rate
+        if opportunity.sell_maturity == opportunity.buy_maturity:
+            tradeable_maturity = opportunity.buy_maturity
+        else:
+            tradeable_maturity = (
+                f"{opportunity.sell_maturity} vs {opportunity.buy_maturity}"
+            )
         # Si hay oportunidad de arbitrar determinar el size.
         future_to_buy = self._futures_by_ticker[ticker_to_buy]
         future_to_sell = self._futures_by_ticker[ticker_to_sell]
         # Precio del Spot
         underlier_to_buy = future_to_sell.underlier_ticker
-        underlier_buy_price = self._yfinance_api.price(underlier_to_buy)
+        underlier_buy_price = self._spot_source.price(underlier_to_buy)
         underlier_to_sell = future_to_buy.underlier_ticker
-        underlier_sell_price = self._yfinance_api.price(underlier_to_sell)
-
-        rofex_instruments_ask = self._pyrofex_api.asks()
-        rofex_instruments_bids = self._pyrofex_api.bids()
-        available_buy_size = rofex_instruments_ask[ticker_to_buy].size
-        available_sell_size = rofex_instruments_bids[ticker_to_sell].size
-        # Minimo size entre sell y buy
-        amount_to_trade = min(
-            available_buy_size
-            * future_to_buy.future_contract_size
-            * underlier_sell_price,
-            available_sell_size
-            * future_to_sell.future_contract_size
-            * underlier_buy_price,
+        underlier_sell_price = self._spot_source.price(underlier_to_sell)
+
+        # Se opera con la misma foto de las puntas con la que se calcularon las tasas
+        book_snapshot = self._implicit_rate_calculator.book_snapshot()
+        if not self.trading_on_snapshot(book_snapshot):
+            return False
+        rofex_instruments_ask = book_snapshot.asks
+        rofex_instruments_bids = book_snapshot.bids
+        depth_size = self._depth_size(
+            book_snapshot,
+            ticker_to_buy,
+            ticker_to_sell,
+            underlier_sell_price,
+            underlier_buy_price,
+            cost,
         )
+        if depth_size is not None:
+            amount_to_trade = depth_size.amount
+            buy_price = depth_size.buy_price
+            sell_price = depth_size.sell_price
+        else:
+            available_buy_size = rofex_instruments_ask[ticker_to_buy].size
+            available_sell_size = rofex_instruments_bids[ticker_to_sell].size
+            # Minimo size entre sell y buy
+            amount_to_trade = min(
+                available_buy_size
+                * future_to_buy.future_contract_size
+                * underlier_sell_price,
+                available_sell_size
+                * future_to_sell.future_contract_size
+                * underlier_buy_price,
+            )
+            buy_price = rofex_instruments_ask[ticker_to_buy].price
+            sell_price = rofex_instruments_bids[ticker_to_sell].price
         # Redondear el size en unidad de contratos (HACER CON math.ceil... probar el lunes cuando abra el mercao)
         buy_size = int(
             amount_to_trade / future_to_buy.future_contract_size / underlier_sell_price
@@ -85,59 +226,145 @@ class Strategy:
             amount_to_trade / future_to_sell.future_contract_size / underlier_buy_price
             + 0.5
         )
-        buy_price = rofex_instruments_ask[ticker_to_buy].price
-        sell_price = rofex_instruments_bids[ticker_to_sell].price
         underlier_buy_size = sell_size * future_to_sell.future_contract_size
         underlier_sell_size = buy_size * future_to_buy.future_contract_size
         # Profit
-        trade_rate_profit = max_buy_rate - min_sell_rate - config["COST"]
+        trade_rate_profit = max_buy_rate - min_sell_rate - cost
         av_position_to_take = (
             underlier_buy_size * underlier_buy_price
             + underlier_sell_size * underlier_sell_price
         ) * 0.5
-        # Si no hay que actualizar data y hay size de buy y sell mandar orden.
-        if not self._data_update.update_boolean() and (buy_size * sell_size) > 0:
-            # No se puede mandar Market Order por Remarkets
-            # Ponmos Limit order
-            buy_order = self._pyrofex_api.place_order(
-                ticker=ticker_to_buy,
-                side=pyRofex.Side.BUY,
-                size=buy_size,
-                price=buy_price,
-                time_in_force=pyRofex.TimeInForce.ImmediateOrCancel,
-                order_type=pyRofex.OrderType.LIMIT,
-            )
-            sell_order = self._pyrofex_api.place_order(
-                ticker=ticker_to_sell,
-                side=pyRofex.Side.SELL,
-                size=sell_size,
-                price=sell_price,
-                time_in_force=pyRofex.TimeInForce.ImmediateOrCancel,
-                order_type=pyRofex.OrderType.LIMIT,
-            )
-            # Falta agregar las ordenes de los SPOT, pero de todas maneras no tienen ninguna liquidez en REMARKETS...
-            trade_info = [
-                f"--- Informacion del Trade {tradeable_maturity} ---",
-                "Tasa a tomar:",
-                f"Comprar:      {ticker_to_buy:<12} -> {buy_size:>8} @ {buy_price:.2f}",
-                f"Vender:     {underlier_to_sell:<12} -> {underlier_sell_size:>8} @ {underlier_sell_price:.2f}",
-                f"Tasa Implícita: {min_sell_rate:.6f}",
-                f"Monto del Trade: {underlier_sell_size * underlier_sell_price:.2f}",
-                f"Recepción del trade:   {buy_order}",
-                f'Estado del Trade: {self._pyrofex_api.order_execution_status(buy_order["order"]["clientId"])}',
-                f"---",
-                f"Tasa a colocar:",
-                f"Vender:     {ticker_to_sell:<12} -> {sell_size:>8} @ {sell_price:.2f}",
-                f"Comprar:      {underlier_to_buy:<12} -> {underlier_buy_size:>8} @ {underlier_buy_price:.2f}",
-                f"Tasa Implícita: {max_buy_rate:.6f}",
-                f"Monto del Trade: {underlier_buy_size * underlier_buy_price:.2f}",
-                f"Recepción del trade:   {sell_order}",
-                f'Estado del Trade: {self._pyrofex_api.order_execution_status(sell_order["order"]["clientId"])}',
-                f"--------------------------------------------",
-                f"Dif. de Tasas:     {trade_rate_profit:.6f}",
-                f"Posición Promedio: {av_position_to_take:.2f}",
-                f"--------------------------------------------",
-                "",
+        # Si llegó data nueva las tasas ya no son las de las puntas, no se opera
+        if self._data_update.update_boolean():
+            return False
+        # Si hay size de buy y sell mandar orden.
+        if buy_size * sell_size <= 0:
+            return True
+        legs = [
+            OrderLeg(ticker_to_buy, pyRofex.Side.BUY, buy_size, buy_price),
+            OrderLeg(ticker_to_sell, pyRofex.Side.SELL, sell_size, sell_price),
+        ]
+        if self._config_service.get("SEND_SPOT_ORDERS", False):
+            legs += [
+                OrderLeg(
+                    self.spot_ticker(underlier_to_buy),
+                    pyRofex.Side.BUY,
+                    int(underlier_buy_size),
+                    underlier_buy_price,
+                ),
+                OrderLeg(
+                    self.spot_ticker(underlier_to_sell),
+                    pyRofex.Side.SELL,
+                    int(underlier_sell_size),
+                    underlier_sell_price,
+                ),
             ]
+        reservation = None
+        if self._position_engine is not None:
+            try:
+                reservation = self._position_engine.reserve(legs)
+            except LimitBreached as e:
+                self._logger.warning("Trade descartado por límite de riesgo: %s", e)
+                return True
+        # Todas las patas salen en paralelo, el hilo de trading no espera el envío
+        try:
+            dispatch_handle = self._order_dispatcher.dispatch(legs, decided)
+        except Exception:
+            # Si no salió ninguna orden la reserva no se libera nunca en _log_trade
+            if reservation is not None:
+                self._position_engine.release(reservation)
+            raise
+        # El registro del trade se arma con valores, el texto se formatea en el logger
+        trade = {
+            "maturity": tradeable_maturity,
+            "buy_future": _position(ticker_to_buy, buy_size, buy_price),
+            "sell_underlier": _position(
+                underlier_to_sell, underlier_sell_size, underlier_sell_price
+            ),
+            "sell_rate": min_sell_rate,
+            "sell_future": _position(ticker_to_sell, sell_size, sell_price),
+            "buy_underlier": _position(
+                underlier_to_buy, underlier_buy_size, underlier_buy_price
+            ),
+            "buy_rate": max_buy_rate,
+            "rate_difference": trade_rate_profit,
+            "average_position": av_position_to_take,
+        }
+        # El envío y el estado de las ordenes se esperan fuera del camino crítico
+        self._order_dispatcher.run_in_background(
+            self._log_trade, trade, dispatch_handle, reservation
+        )
+        return True
+
+    def spot_ticker(self, underlier_ticker):
+        """Ticker de Rofex del spot de un subyacente"""
+        return spot_ticker(underlier_ticker, self._config_service)
+
+    def _log_trade(self, trade, dispatch_handle, reservation=None):
+        legs = []
+        statuses = []
+        try:
+            leg_results = dispatch_handle.results()
+            for result in leg_results:
+                if result.error is not None:
+                    statuses.append(f"ERROR {result.error}")
+                else:
+                    statuses.append(
+                        self._pyrofex_api.order_execution_status(
+                            result.response["order"]["clientId"]
+                        )
+                    )
+        finally:
+            # Con las ordenes terminadas lo que quede ya llegó como ejecución
+            if reservation is not None:
+                self._position_engine.release(reservation)
+        for result, status in zip(leg_results, statuses):
+            legs.append(
+                {
+                    "ticker": result.leg.ticker,
+                    "side": getattr(result.leg.side, "value", result.leg.side),
+                    "size": result.leg.size,
+                    "price": result.leg.price,
+                    "response": result.response,
+                    "error": None if result.error is None else str(result.error),
+                    "latency_ms": result.latency * 1e3,
+                    "status": status,
+                }
+            )
+        trade["legs"] = legs
+        self._logger.trade(trade, format_trade)
+
+
+def _position(ticker, size, price):
+    return {"ticker": ticker, "size": size, "price": price}
+
 
-            print("\n".join(trade_info), flush=True)
+def format_trade(trade):
+    """Texto del trade para la terminal, se llama desde el hilo del logger"""
+    buy_future, sell_future = trade["buy_future"], trade["sell_future"]
+    buy_underlier, sell_underlier = trade["buy_underlier"], trade["sell_underlier"]
+    buy_leg, sell_leg = trade["legs"][0], trade["legs"][1]
+    lines = [
+        f"--- Informacion del Trade {trade['maturity']} ---",
+        "Tasa a tomar:",
+        f"Comprar:      {buy_future['ticker']:<12} -> {buy_future['size']:>8} @ {buy_future['price']:.2f}",
+        f"Vender:     {sell_underlier['ticker']:<12} -> {sell_underlier['size']:>8} @ {sell_underlier['price']:.2f}",
+        f"Tasa Implícita: {trade['sell_rate']:.6f}",
+        f"Monto del Trade: {sell_underlier['size'] * sell_underlier['price']:.2f}",
+        f"Recepción del trade:   {buy_leg['response'] or buy_leg['error']}",
+        f"Latencia del envío:    {buy_leg['latency_ms']:.3f} ms",
+        f"---",
+        f"Tasa a colocar:",
+        f"Vender:     {sell_future['ticker']:<12} -> {sell_future['size']:>8} @ {sell_future['price']:.2f}",
+        f"Comprar:      {buy_underlier['ticker']:<12} -> {buy_underlier['size']:>8} @ {buy_underlier['price']:.2f}",
+        f"Tasa Implícita: {trade['buy_rate']:.6f}",
+        f"Monto del Trade: {buy_underlier['size'] * buy_underlier['price']:.2f}",
+        f"Recepción del trade:   {sell_leg['response'] or sell_leg['error']}",
+        f"Latencia del envío:    {sell_leg['latency_ms']:.3f} ms",
+        f"--------------------------------------------",
+        f"Dif. de Tasas:     {trade['rate_difference']:.6f}",
+        f"Posición Promedio: {trade['average_position']:.2f}",
+        f"--------------------------------------------",
+    ]
+    lines += [f"Estado de {leg['ticker']}: {leg['status']}" for leg in trade["legs"]]
+    return "\n".join(lines + [""])
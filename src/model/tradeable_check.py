@@ -1,36 +1,55 @@
+from types import MappingProxyType
 from src.model.instrument_handler import InstrumentHandler
 
 class TradeableCheck(InstrumentHandler):
     """
     Clase para ver que los instrumentos son tradeables.
+    Los índices se calculan una sola vez al crear el objeto y son de solo lectura.
     """
 
-    def __init__(self,tickers):
-        super().__init__(tickers)
+    def __init__(self,tickers,instrument_catalog=None):
+        super().__init__(tickers,instrument_catalog)
+        self._build_tradeable_indices()
+
+    def _build_tradeable_indices(self):
+        # Un vencimiento es tradeable si tiene futuros de más de un subyacente
+        self._tradeable_futures_by_maturity = MappingProxyType({
+            maturity: futures for maturity, futures in self._pyrofex_future_maturity.items()
+            if len(futures) > 1})
+        self._tradeable_ticker_maturity = MappingProxyType({
+            future.ticker: maturity
+            for maturity, futures in self._tradeable_futures_by_maturity.items()
+            for future in futures})
+        self._tradeable_rofex_futures = tuple(
+            future for futures in self._tradeable_futures_by_maturity.values() for future in futures)
+        self._tradeable_tickers = frozenset(self._tradeable_ticker_maturity)
+        self._tradeable_future_underlier_ticker = MappingProxyType({
+            underlier: tuple(future for future in futures if future.ticker in self._tradeable_tickers)
+            for underlier, futures in self._pyrofex_future_underlier.items()})
+        self._tradeable_yfinance_tickers = tuple(sorted(set(
+            self._convert_to_yfinance_ticker[future.underlier_ticker]
+            for future in self._tradeable_rofex_futures)))
 
     def tradeable_maturities(self):
-        return list(self.tradeable_futures_by_maturity().keys())
+        return list(self._tradeable_futures_by_maturity.keys())
 
     def tradeable_futures_by_maturity(self):
-        return {maturity: futures for maturity, futures in self._pyrofex_future_maturity.items()
-                if len(futures) > 1}
+        return self._tradeable_futures_by_maturity
 
     def tradeable_ticker_maturity(self):
-        return {future.ticker: maturity
-                for maturity, futures in self.tradeable_futures_by_maturity().items()
-                for future in futures}
+        return self._tradeable_ticker_maturity
 
     def tradeable_rofex_futures(self):
-        return sum(self.tradeable_futures_by_maturity().values(), [])
+        return self._tradeable_rofex_futures
 
     def tradeable_rofex_futures_tickers(self):
-        return [future._ticker for future in self.tradeable_rofex_futures()]
+        return [future.ticker for future in self._tradeable_rofex_futures]
+
+    def is_tradeable(self, ticker):
+        return ticker in self._tradeable_tickers
 
     def tradeable_pyrofex_future_underlier_ticker(self):
-        tradeable_tickers = self.tradeable_rofex_futures_tickers()
-        return {underlier: [future for future in futures if future.ticker in tradeable_tickers]
-                for underlier, futures in self._pyrofex_future_underlier.items()}
+        return self._tradeable_future_underlier_ticker
 
     def tradeable_yfinance_tickers(self):
-        return list(set(self._convert_to_yfinance_ticker[future._underlier_ticker]
-                        for future in self.tradeable_rofex_futures()))
\ No newline at end of file
+        return list(self._tradeable_yfinance_tickers)
@@ -2,68 +2,229 @@ from src.model.instrument_handler import InstrumentHandler
 from src.model.tradeable_check import TradeableCheck
 from src.model.market_apis import PyRofexApi
 from src.model.market_apis import YfinanceAPI
+from src.model.spot_sources import RofexSpotSource, spot_ticker
 from src.model.update_data import DataUpdate
 from src.model.rate_calculator import ImplicitRateCalculator
+from src.model.array_rate_calculator import ArrayImplicitRateCalculator
 from src.model.display import Display
 from src.model.strategy import Strategy
+from src.model.config import get_config_service
+from src.model.market_recorder import MarketDataRecorder
+from src.model.latency import LatencyTracer
+from src.model.async_logger import get_logger
+from src.model.clock import clock_service_from_config
+from src.model.sharding import ShardedFeed
+from src.model.opportunity_scanner import opportunity_scanner_from_config
+from src.model.position_engine import position_engine_from_config
+from src.model.connection_supervisor import connection_supervisor_from_config
 
-import traceback
 import time
 
 
 class TradingBot:
-    def __init__(self, tickers, underlier_update_frecuency):
+    # Motores disponibles para calcular las tasas implícitas
+    RATE_ENGINES = {
+        "dict": ImplicitRateCalculator,
+        "array": ArrayImplicitRateCalculator,
+    }
+
+    def __init__(
+        self,
+        tickers,
+        underlier_update_frecuency,
+        housekeeping_timeout=1.0,
+        rate_engine="dict",
+        market_depth=1,
+        config_service=None,
+    ):
+        # Tiempo máximo que el loop espera data nueva antes de revisar las conexiones
+        self._housekeeping_timeout = housekeeping_timeout
+        config_service = config_service or get_config_service()
+        self._logger = get_logger()
+        self._logger.set_level(config_service.get("LOG_LEVEL", "INFO"))
+        # Una línea JSON por trade
+        self._logger.set_trades_path(config_service.get("TRADES_LOG", "trades.jsonl"))
         self._instrument_handler = InstrumentHandler(tickers)
         self._tradeable_check = TradeableCheck(tickers)
-        self._pyrofex_api = PyRofexApi(self._tradeable_check)
-        self._yfinance_api = YfinanceAPI(
-            self._instrument_handler, underlier_update_frecuency, self._tradeable_check
+        # Con CONFLATE_MARKET_DATA las ráfagas se procesan por lotes, con el último mensaje
+        # de cada futuro
+        self._pyrofex_api = PyRofexApi(
+            self._tradeable_check,
+            depth=market_depth,
+            conflate=config_service.get("CONFLATE_MARKET_DATA", True),
+        )
+        self._spot_source = self._create_spot_source(
+            config_service.get("SPOT_SOURCE", "rofex"),
+            underlier_update_frecuency,
+            config_service,
+        )
+        # Graba toda la market data para poder reproducir lo que vio el bot
+        self._market_recorder = MarketDataRecorder(
+            config_service.get("RECORDER_DIR", "market_data")
+        )
+        self._pyrofex_api.set_recorder(self._market_recorder)
+        self._spot_source.set_recorder(self._market_recorder)
+        self._data_update = DataUpdate(self._pyrofex_api, self._spot_source)
+        # Histogramas de latencia de cada etapa, se imprimen periódicamente
+        self._latency_tracer = LatencyTracer(
+            config_service.get("LATENCY_REPORT_INTERVAL", 10.0),
+            output=self._logger.info,
+        )
+        # Días al vencimiento por contrato y por día, con el calendario configurado
+        self._clock_service = clock_service_from_config(config_service)
+        self._implicit_rate_calculator = self.RATE_ENGINES[rate_engine](
+            self._pyrofex_api,
+            self._spot_source,
+            self._tradeable_check,
+            latency_tracer=self._latency_tracer,
+            clock_service=self._clock_service,
         )
-        self._data_update = DataUpdate(self._pyrofex_api, self._yfinance_api)
-        self._implicit_rate_calculator = ImplicitRateCalculator(
-            self._pyrofex_api, self._yfinance_api, self._tradeable_check
+        # Con WORKERS > 0 este proceso solo publica la market data en memoria compartida y
+        # el cálculo de tasas y la Strategy corren en procesos aparte, por vencimiento
+        n_workers = config_service.get("WORKERS", 0)
+        self._sharded_feed = (
+            ShardedFeed(
+                self._pyrofex_api,
+                self._spot_source,
+                self._tradeable_check,
+                tickers,
+                n_workers,
+                self.RATE_ENGINES[rate_engine],
+                depth=market_depth,
+            )
+            if n_workers > 0
+            else None
+        )
+        # Reconectan con backoff cuando se cae una conexión, en lugar de reintentar en cada
+        # vuelta del loop
+        self._supervisors = [
+            connection_supervisor_from_config(
+                self._spot_source, "spot", config_service, wait_for_data=False
+            ),
+            connection_supervisor_from_config(
+                self._pyrofex_api, "Rofex", config_service
+            ),
+        ]
+        # La pantalla corre en su propio hilo, fuera del camino tick-to-trade
+        self._display = Display(
+            self._implicit_rate_calculator,
+            max_refresh_rate=config_service.get("DISPLAY_REFRESH_RATE", 4.0),
+        )
+        # Posiciones y PnL con las ejecuciones del websocket, y límites de riesgo
+        self._position_engine = position_engine_from_config(
+            self._instrument_handler, self._tradeable_check, config_service
+        )
+        self._pyrofex_api.order_tracker().add_fill_listener(
+            self._position_engine.on_fill
         )
-        self._display = Display(self._implicit_rate_calculator)
         self._strategy = Strategy(
             self._instrument_handler,
             self._implicit_rate_calculator,
             self._pyrofex_api,
-            self._yfinance_api,
+            self._spot_source,
             self._data_update,
             self._tradeable_check,
+            depth_sizing=market_depth > 1,
+            config_service=config_service,
+            clock_service=self._clock_service,
+            latency_tracer=self._latency_tracer,
+            opportunity_scanner=opportunity_scanner_from_config(config_service),
+            position_engine=self._position_engine,
         )
 
+    def _create_spot_source(self, name, underlier_update_frecuency, config_service):
+        """
+        "rofex": spot por el websocket de Rofex (por defecto).
+        "yfinance": polling a Yahoo Finance cada underlier_update_frecuency segundos, con
+        YFINANCE_WORKERS pedidos en paralelo y hasta YFINANCE_MAX_INTERVAL sin cambios.
+        """
+        if name == "yfinance":
+            return YfinanceAPI(
+                self._instrument_handler,
+                underlier_update_frecuency,
+                self._tradeable_check,
+                max_workers=config_service.get("YFINANCE_WORKERS", 8),
+                max_interval=config_service.get("YFINANCE_MAX_INTERVAL", 60.0),
+            )
+        if name == "rofex":
+            underliers = (
+                self._tradeable_check.tradeable_pyrofex_future_underlier_ticker()
+            )
+            return RofexSpotSource(
+                self._pyrofex_api,
+                {
+                    underlier: spot_ticker(underlier, config_service)
+                    for underlier in underliers
+                },
+            )
+        raise ValueError(f"Fuente de spot desconocida: {name}")
+
     def start(self):
         self._run()
         self._end()
 
     def _run(self):
-        self._yfinance_api.request_market_data()
-        self._pyrofex_api.request_market_data()
+        self._market_recorder.start()
+        self._latency_tracer.start()
+        if self._sharded_feed is not None:
+            self._sharded_feed.start()
+        else:
+            self._display.start()
+        for supervisor in self._supervisors:
+            supervisor.start()
         while True:
             try:
-                if self._data_update.update_boolean():
+                if self._data_update.wait_for_update(self._wait_timeout()):
                     self._data_update.give_last_update()
-                    self._implicit_rate_calculator.update_rates()
-                    if self._implicit_rate_calculator.ready():
-                        try:
-                            self._display.print_implicit_rates()
-                        except Exception:
-                            print(
-                                f"Excepción mientras se muestran las tasas implícitas..."
-                            )
-                        self._strategy.start_trades()
-            except Exception as e:
-                traceback.print_exc()
-                print(f"Excepción mientras se tradeaba...")
+                    if self._sharded_feed is not None:
+                        self._sharded_feed.publish()
+                    else:
+                        self._implicit_rate_calculator.update_rates()
+                        if self._implicit_rate_calculator.ready():
+                            self._strategy.start_trades()
+            except Exception:
+                self._logger.exception("Excepción mientras se tradeaba...")
                 break
-            if not self._yfinance_api.start_request():
-                self._yfinance_api.request_market_data()
-            if not self._pyrofex_api.start_request():
-                self._pyrofex_api.request_market_data()
+            for supervisor in self._supervisors:
+                supervisor.poll()
+
+    def _wait_timeout(self):
+        """Lo que se espera data nueva: hasta la próxima reconexión o el housekeeping"""
+        timeout = self._housekeeping_timeout
+        for supervisor in self._supervisors:
+            wait = supervisor.time_to_next_attempt()
+            if wait is not None:
+                timeout = min(timeout, wait)
+        return timeout
 
     def _end(self):
-        print("Cerrando...")
-        self._yfinance_api.stop()
+        self._logger.info("Cerrando...")
+        self._display.stop()
+        if self._sharded_feed is not None:
+            self._sharded_feed.stop()
+        self._logger.info(
+            "Despertares: %s - Evaluaciones: %s",
+            self._data_update.wake_ups(),
+            self._data_update.evaluations(),
+        )
+        self._logger.info(
+            "Posiciones: %s",
+            self._position_engine.report(
+                self._pyrofex_api.snapshot(), self._spot_source.last_prices()
+            ),
+        )
+        for supervisor in self._supervisors:
+            self._logger.info(
+                "Conexión de %s: %s", supervisor.name(), supervisor.report()
+            )
+        if self._pyrofex_api.ingestion() is not None:
+            self._logger.info(
+                "Conflación de market data: %s", self._pyrofex_api.ingestion().report()
+            )
+        self._spot_source.stop()
         self._pyrofex_api.stop()
-        print("Listo!")
+        self._market_recorder.stop()
+        self._latency_tracer.stop()
+        self._logger.info("Mensajes de log descartados: %s", self._logger.dropped())
+        self._logger.info("Listo!")
+        self._logger.flush()
@@ -1,22 +1,51 @@
+import threading
+
+
 class DataUpdate:
     """
     Realiza seguimiento a la actualización de los datos
     """
 
-    def __init__(self, yfinance_api, pyrofex_api):
-        self._yfinance_api = yfinance_api
+    def __init__(self, spot_source, pyrofex_api):
+        self._spot_source = spot_source
         self._pyrofex_api = pyrofex_api
         self._last_update = 0.0
+        # Las APIs notifican esta condición cada vez que llega data nueva
+        self._update_condition = threading.Condition()
+        self._spot_source.set_update_condition(self._update_condition)
+        self._pyrofex_api.set_update_condition(self._update_condition)
+        self._wake_ups = 0
+        self._evaluations = 0
 
     def update_boolean(self):
         "Devuelve True cuando los datos están por delante de la última vez que se leyeron"
         return (
             self._last_update < self._pyrofex_api.last_update_api()
-            or self._last_update < self._yfinance_api.last_update_api()
+            or self._last_update < self._spot_source.last_update_api()
         )
 
+    def wait_for_update(self, timeout=None):
+        """
+        Bloquea hasta que llegue data nueva o pase el timeout.
+        Devuelve True si hay data por delante de la última lectura.
+        """
+        with self._update_condition:
+            if not self.update_boolean():
+                self._update_condition.wait(timeout)
+            self._wake_ups += 1
+        return self.update_boolean()
+
     def give_last_update(self):
         "Devuelve la última vez que se leyeron los datos"
+        self._evaluations += 1
         self._last_update = max(
-            self._pyrofex_api.last_update_api(), self._yfinance_api.last_update_api()
+            self._pyrofex_api.last_update_api(), self._spot_source.last_update_api()
         )
+
+    def wake_ups(self):
+        "Cantidad de veces que el loop de trading se despertó"
+        return self._wake_ups
+
+    def evaluations(self):
+        "Cantidad de veces que se leyeron datos nuevos"
+        return self._evaluations
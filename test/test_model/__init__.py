@@ -1,6 +1,7 @@
+import os
 import unittest
 loader = unittest.TestLoader()
-start_dir = 'C:/Users/54112/source/repos/Arbitraje-de-Tasas/test/test_model'
+start_dir = os.path.dirname(os.path.abspath(__file__))
 suite = loader.discover(start_dir)
 
 runner = unittest.TextTestRunner()
@@ -0,0 +1,43 @@
+import unittest
+from unittest import mock
+
+import pyRofex
+
+import src.model.api_wrapper as wrapper
+
+
+class TestAPIWrapper(unittest.TestCase):
+    def setUp(self):
+        # APIWrapper es un singleton, cada test arma el suyo
+        instances = mock.patch.dict(wrapper.Singleton._instances, clear=True)
+        instances.start()
+        self.addCleanup(instances.stop)
+        config = {
+            "USER": "user",
+            "PASS": "password",
+            "ACCOUNT": "REM1234",
+            "REST_POOLED_SESSIONS": False,
+        }
+        self._config_service = mock.MagicMock()
+        self._config_service.__getitem__.side_effect = config.__getitem__
+        self._config_service.get.side_effect = config.get
+        self._config_service.environment.return_value = pyRofex.Environment.REMARKET
+
+    @mock.patch.object(pyRofex, "initialize")
+    def test_without_token_authenticates_with_the_credentials(self, initialize):
+        wrapper.APIWrapper(config_service=self._config_service)
+        initialize.assert_called_once_with(
+            user="user",
+            password="password",
+            account="REM1234",
+            environment=pyRofex.Environment.REMARKET,
+        )
+
+    @mock.patch.object(pyRofex, "initialize")
+    def test_a_worker_reuses_the_feed_token(self, initialize):
+        wrapper.APIWrapper(config_service=self._config_service, token="token")
+        self.assertEqual(initialize.call_args.kwargs["active_token"], "token")
+
+
+if __name__ == "__main__":
+    unittest.main()
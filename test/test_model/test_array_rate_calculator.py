@@ -0,0 +1,147 @@
+import src.model.rate_calculator as rc
+import src.model.array_rate_calculator as arc
+import src.model.market_apis as mapis
+import src.model.api_wrapper as wrapper
+from src.model.instrument_handler import FutureContract
+from src.model.spot_sources import FakeSpotSource
+
+import unittest
+from unittest.mock import MagicMock, patch
+import datetime as dt
+from freezegun import freeze_time
+
+
+class TestArrayRateCalculator(unittest.TestCase):
+    NOW_DATE = "2022-01-01"
+
+    def setUp(self):
+        self._yfinance_api_mock = MagicMock()
+        self._yfinance_api_mock.last_prices.return_value = {
+            "GGAL": 100.0,
+            "PAMP": 90.0,
+        }
+        self._pyrofex_api_mock = MagicMock()
+        # La foto de las puntas se arma con lo que devuelven bids() y asks()
+        self._pyrofex_api_mock.snapshot.side_effect = lambda: mapis.BookSnapshot(
+            self._pyrofex_api_mock.bids(), self._pyrofex_api_mock.asks(), 0
+        )
+        self._pyrofex_api_mock.bids.return_value = {
+            "GGAL/FEB22": mapis.OrderBook(110, 10),
+            "PAMP/FEB22": mapis.OrderBook(120, 10),
+            "GGAL/ABR22": mapis.OrderBook(118, 10),
+        }
+        self._pyrofex_api_mock.asks.return_value = {
+            "GGAL/FEB22": mapis.OrderBook(115, 10),
+            "PAMP/FEB22": mapis.OrderBook(130, 10),
+            "PAMP/ABR22": mapis.OrderBook(112, 10),
+        }
+        feb_date = dt.datetime(2022, 2, 28)
+        apr_date = dt.datetime(2022, 4, 29)
+        self._tradeable_check_mock = MagicMock()
+        self._tradeable_check_mock.tradeable_pyrofex_future_underlier_ticker.return_value = {
+            "GGAL": [
+                FutureContract("GGAL/FEB22", "GGAL", feb_date, 100.0),
+                FutureContract("GGAL/ABR22", "GGAL", apr_date, 100.0),
+            ],
+            "PAMP": [
+                FutureContract("PAMP/FEB22", "PAMP", feb_date, 100.0),
+                FutureContract("PAMP/ABR22", "PAMP", apr_date, 100.0),
+            ],
+        }
+        self._tradeable_check_mock.tradeable_ticker_maturity.return_value = {
+            "GGAL/FEB22": "FEB22",
+            "PAMP/FEB22": "FEB22",
+            "GGAL/ABR22": "ABR22",
+            "PAMP/ABR22": "ABR22",
+        }
+        self._dict_calculator = rc.ImplicitRateCalculator(
+            self._pyrofex_api_mock, self._yfinance_api_mock, self._tradeable_check_mock
+        )
+        self._array_calculator = arc.ArrayImplicitRateCalculator(
+            self._pyrofex_api_mock, self._yfinance_api_mock, self._tradeable_check_mock
+        )
+
+    @freeze_time(NOW_DATE)
+    def test_same_rates_as_dict_engine(self):
+        self._dict_calculator.update_rates()
+        self._array_calculator.update_rates()
+        for expected, result in [
+            (self._dict_calculator.buy_rate(), self._array_calculator.buy_rate()),
+            (self._dict_calculator.sell_rate(), self._array_calculator.sell_rate()),
+        ]:
+            self.assertEqual(set(expected.keys()), set(result.keys()))
+            for maturity, rates in expected.items():
+                self.assertEqual(set(rates.keys()), set(result[maturity].keys()))
+                for ticker, rate in rates.items():
+                    self.assertAlmostEqual(rate, result[maturity][ticker], 10)
+
+    @freeze_time(NOW_DATE)
+    def test_same_best_rates_as_dict_engine(self):
+        self._dict_calculator.update_rates()
+        self._array_calculator.update_rates()
+        for maturity in ["FEB22", "ABR22"]:
+            ticker, rate = self._dict_calculator.max_buy_rate(maturity)
+            array_ticker, array_rate = self._array_calculator.max_buy_rate(maturity)
+            self.assertEqual(ticker, array_ticker)
+            self.assertAlmostEqual(rate, array_rate, 10)
+            ticker, rate = self._dict_calculator.min_sell_rate(maturity)
+            array_ticker, array_rate = self._array_calculator.min_sell_rate(maturity)
+            self.assertEqual(ticker, array_ticker)
+            self.assertAlmostEqual(rate, array_rate, 10)
+        self.assertTrue(self._array_calculator.maturiry_ready_to_trade("FEB22"))
+
+
+class TestArrayUpdatesDuringARecalculation(unittest.TestCase):
+    """Lo que llega mientras se recalcula queda para la próxima vuelta, no se pierde"""
+
+    def setUp(self):
+        patcher = patch.object(wrapper, "APIWrapper")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        tradeable_check = MagicMock()
+        tradeable_check.tradeable_rofex_futures_tickers.return_value = ["GGAL/FEB22"]
+        tradeable_check.tradeable_pyrofex_future_underlier_ticker.return_value = {
+            "GGAL": [
+                FutureContract("GGAL/FEB22", "GGAL", dt.datetime(2022, 5, 28), 100.0)
+            ]
+        }
+        tradeable_check.tradeable_ticker_maturity.return_value = {"GGAL/FEB22": "FEB22"}
+        self._pyrofex_api = mapis.PyRofexApi(
+            tradeable_check, subscribe_to_order_report=False
+        )
+        self._pyrofex_api._market_data_handler(
+            {
+                "type": "Md",
+                "instrumentId": {"marketId": "ROFX", "symbol": "GGAL/FEB22"},
+                "marketData": {
+                    "BI": [{"price": 110, "size": 10}],
+                    "OF": [{"price": 115, "size": 10}],
+                },
+            }
+        )
+        self._spot_source = FakeSpotSource({"GGAL": 100.0})
+        self._calculator = arc.ArrayImplicitRateCalculator(
+            self._pyrofex_api, self._spot_source, tradeable_check
+        )
+
+    @freeze_time("2022-01-01")
+    def test_a_spot_update_during_a_recalculation_is_not_lost(self):
+        self._calculator.update_rates()
+        rate = self._calculator.buy_rate()["FEB22"]["GGAL/FEB22"]
+        read = self._spot_source.last_prices
+
+        def read_then_update():
+            prices = read()
+            self._spot_source.push("GGAL", 105.0)
+            return prices
+
+        with patch.object(
+            self._spot_source, "last_prices", side_effect=read_then_update
+        ):
+            self._calculator.update_rates()
+        self._calculator.update_rates()
+        self.assertLess(self._calculator.buy_rate()["FEB22"]["GGAL/FEB22"], rate)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+import src.model.async_logger as alog
+
+
+class CountingStr:
+    def __init__(self):
+        self.calls = 0
+        self.thread = None
+
+    def __str__(self):
+        self.calls += 1
+        self.thread = threading.current_thread()
+        return "formateado"
+
+
+class TestAsyncLogger(unittest.TestCase):
+    def setUp(self):
+        self._output = io.StringIO()
+        self._logger = alog.AsyncLogger(level=alog.INFO, output=self._output)
+
+    def tearDown(self):
+        self._logger.stop()
+
+    def test_messages_below_level_are_not_formatted(self):
+        argument = CountingStr()
+        self._logger.start()
+        self._logger.debug("mensaje %s", argument)
+        self._logger.info("mensaje %s", argument)
+        self._logger.flush()
+        self.assertEqual(argument.calls, 1)
+        # El formateo ocurre en el hilo del logger
+        self.assertIsNot(argument.thread, threading.current_thread())
+        self.assertNotIn("DEBUG", self._output.getvalue())
+        self.assertIn("INFO    mensaje formateado", self._output.getvalue())
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        logger = alog.AsyncLogger(max_queue=2, output=self._output)
+        for i in range(5):
+            logger.info("mensaje %s", i)
+        self.assertEqual(logger.dropped(), 3)
+        logger.start()
+        logger.stop()
+        self.assertEqual(self._output.getvalue().count("mensaje"), 2)
+
+    def test_trades_wait_for_room_instead_of_dropping(self):
+        logger = alog.AsyncLogger(max_queue=2, output=self._output)
+        logger.info("mensaje %s", 1)
+        logger.info("mensaje %s", 2)
+        producer = threading.Thread(target=logger.trade, args=({}, lambda t: "trade!"))
+        producer.start()
+        producer.join(0.1)
+        # Con la cola llena el trade espera, no se descarta
+        self.assertTrue(producer.is_alive())
+        logger.start()
+        producer.join(1)
+        logger.stop()
+        self.assertFalse(producer.is_alive())
+        self.assertEqual(logger.dropped(), 0)
+        self.assertIn("trade!", self._output.getvalue())
+
+    def test_trades_are_written_as_json_lines(self):
+        with tempfile.TemporaryDirectory() as directory:
+            trades_path = os.path.join(directory, "trades.jsonl")
+            self._logger.set_trades_path(trades_path)
+            self._logger.start()
+            self._logger.trade({"maturity": "FEB22", "rate": 0.5}, lambda t: "trade!")
+            self._logger.trade({"maturity": "MAR22", "side": alog})
+            self._logger.stop()
+            with open(trades_path) as f:
+                trades = [json.loads(line) for line in f]
+        self.assertEqual([t["maturity"] for t in trades], ["FEB22", "MAR22"])
+        self.assertIn("timestamp", trades[0])
+        self.assertEqual(self._output.getvalue(), "trade!\n")
+
+    def test_exception_includes_traceback(self):
+        self._logger.start()
+        try:
+            raise ValueError("falló")
+        except ValueError:
+            self._logger.exception("Excepcion %s", "grave")
+        self._logger.flush()
+        self.assertIn("ERROR   Excepcion grave", self._output.getvalue())
+        self.assertIn("ValueError: falló", self._output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import datetime as dt
+import unittest
+from unittest import mock
+
+import src.model.clock as clock
+import src.model.expired as exp
+from src.model.instrument_handler import FutureContract
+
+
+class TestTradingCalendar(unittest.TestCase):
+    def test_calendar_days(self):
+        calendar = clock.TradingCalendar()
+        self.assertEqual(
+            calendar.days_between(dt.date(2022, 1, 1), dt.date(2022, 5, 28)), 147
+        )
+        self.assertEqual(calendar.days_in_year(), 365)
+
+    def test_business_days_skip_weekends_and_holidays(self):
+        calendar = clock.TradingCalendar(
+            holidays=["2022-02-28"], business_days=True, days_in_year=252
+        )
+        # Del viernes 25/02 al miércoles 02/03: viernes y martes (el lunes es feriado)
+        self.assertEqual(
+            calendar.days_between(dt.date(2022, 2, 25), dt.date(2022, 3, 2)), 2
+        )
+        self.assertEqual(
+            calendar.days_between(dt.date(2022, 3, 2), dt.date(2022, 2, 25)), -2
+        )
+        self.assertEqual(calendar.days_in_year(), 252)
+
+
+class TestClockService(unittest.TestCase):
+    def setUp(self):
+        self._frozen_clock = clock.FrozenClock(dt.datetime(2022, 2, 27, 11, 0))
+        self._previous_clock = clock.set_clock(self._frozen_clock)
+        self.addCleanup(clock.set_clock, self._previous_clock)
+        self._feb = FutureContract(
+            "GGAL/FEB22", "GGAL", dt.datetime(2022, 2, 28), 100.0
+        )
+        self._apr = FutureContract(
+            "GGAL/ABR22", "GGAL", dt.datetime(2022, 4, 29), 100.0
+        )
+        self._clock_service = clock.ClockService()
+        self._clock_service.register([self._feb, self._apr])
+        self._listener = mock.MagicMock()
+        self._clock_service.add_rollover_listener(self._listener)
+
+    def test_days_are_computed_once_per_day(self):
+        self.assertTrue(self._clock_service.check_rollover())
+        self.assertFalse(self._clock_service.check_rollover())
+        self._listener.assert_called_once_with(dt.date(2022, 2, 27), ())
+        with mock.patch.object(
+            self._clock_service.calendar(), "days_between"
+        ) as days_between:
+            self.assertEqual(self._clock_service.exponent(self._feb), 1.0)
+            self.assertEqual(self._clock_service.days_to_expiry(self._apr), 61)
+            days_between.assert_not_called()
+
+    def test_rollover_retires_expired_contracts(self):
+        self._clock_service.check_rollover()
+        self._frozen_clock.advance(dt.timedelta(days=1))
+        self.assertTrue(self._clock_service.check_rollover())
+        self._listener.assert_called_with(dt.date(2022, 2, 28), (self._feb,))
+        self.assertTrue(self._clock_service.is_expired(self._feb))
+        self.assertEqual(self._clock_service.exponent(self._apr), 1 / 60)
+        with self.assertRaises(exp.ExpiredInstrument):
+            self._clock_service.exponent(self._feb)
+        # Un contrato retirado no se vuelve a avisar
+        self._frozen_clock.advance(dt.timedelta(days=1))
+        self._clock_service.check_rollover()
+        self._listener.assert_called_with(dt.date(2022, 3, 1), ())
+
+    def test_business_days_do_not_retire_a_contract_before_its_date(self):
+        clock_service = clock.ClockService(clock.TradingCalendar(business_days=True))
+        clock_service.register([self._feb, self._apr])
+        clock_service.add_rollover_listener(self._listener)
+        # El domingo 27/02 el contrato que vence el lunes tiene 0 días hábiles
+        clock_service.check_rollover()
+        self._listener.assert_called_once_with(dt.date(2022, 2, 27), ())
+        self.assertFalse(clock_service.is_expired(self._feb))
+        self.assertEqual(clock_service.exponent(self._feb), 1.0)
+        self.assertEqual(clock_service.days_to_expiry(self._apr), 44)
+        self._frozen_clock.advance(dt.timedelta(days=1))
+        clock_service.check_rollover()
+        self._listener.assert_called_with(dt.date(2022, 2, 28), (self._feb,))
+
+
+if __name__ == "__main__":
+    unittest.main()
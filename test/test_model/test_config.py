@@ -0,0 +1,58 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import src.model.config as cfg
+
+
+class TestConfigService(unittest.TestCase):
+    def setUp(self):
+        self._config = {
+            "USER": "user",
+            "PASS": "pass",
+            "ACCOUNT": "account",
+            "ENVIRONMENT": "REMARKET",
+            "COST": 0.01,
+        }
+        self._dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._dir.name, "config.json")
+        self._write(self._config)
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _write(self, config, mtime=None):
+        with open(self._path, "w") as f:
+            json.dump(config, f)
+        if mtime is not None:
+            os.utime(self._path, (mtime, mtime))
+
+    def test_missing_key_is_invalid(self):
+        del self._config["COST"]
+        self._write(self._config)
+        with self.assertRaises(cfg.InvalidConfig):
+            cfg.ConfigService(self._path)
+
+    def test_check_for_changes_reloads_when_file_changes(self):
+        config_service = cfg.ConfigService(self._path)
+        self.assertEqual(config_service["COST"], 0.01)
+        self.assertFalse(config_service.check_for_changes())
+        self._config["COST"] = 0.02
+        self._write(self._config, mtime=os.stat(self._path).st_mtime + 10)
+        self.assertTrue(config_service.check_for_changes())
+        self.assertEqual(config_service["COST"], 0.02)
+
+    def test_invalid_reload_keeps_previous_config(self):
+        config_service = cfg.ConfigService(self._path)
+        self._config["COST"] = "caro"
+        self._write(self._config, mtime=os.stat(self._path).st_mtime + 10)
+        with mock.patch.object(config_service, "_logger") as logger:
+            self.assertFalse(config_service.check_for_changes())
+        self.assertEqual(config_service["COST"], 0.01)
+        logger.exception.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
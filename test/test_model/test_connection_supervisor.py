@@ -0,0 +1,120 @@
+import random
+import unittest
+from unittest import mock
+
+import src.model.api_wrapper as wrapper
+from src.model.connection_supervisor import ConnectionSupervisor
+from src.model.market_apis import PyRofexApi
+
+
+def market_data(symbol, bid, offer):
+    return {
+        "type": "Md",
+        "instrumentId": {"marketId": "ROFX", "symbol": symbol},
+        "marketData": {
+            "BI": [{"price": bid, "size": 10}],
+            "OF": [{"price": offer, "size": 10}],
+        },
+    }
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestConnectionSupervisor(unittest.TestCase):
+    def setUp(self):
+        self._api_wrapper = mock.MagicMock()
+        patcher = mock.patch.object(
+            wrapper, "APIWrapper", return_value=self._api_wrapper
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        tradeable_check = mock.MagicMock()
+        tradeable_check.tradeable_rofex_futures_tickers.return_value = ["GGAL/FEB22"]
+        self._pyrofex_api = PyRofexApi(tradeable_check)
+        self._time = FakeTime()
+        self._supervisor = ConnectionSupervisor(
+            self._pyrofex_api,
+            "Rofex",
+            initial_backoff=1.0,
+            max_backoff=4.0,
+            jitter=0.0,
+            stable_after=10.0,
+            time_function=self._time,
+            random_generator=random.Random(1),
+        )
+
+    def _connections(self):
+        return self._api_wrapper.init_websocket_connection.call_count
+
+    def test_reconnects_with_backoff_and_invalidates_books(self):
+        self._supervisor.start()
+        self._pyrofex_api._market_data_handler(market_data("GGAL/FEB22", 110, 115))
+        self._pyrofex_api.pop_updated()
+        sequence = self._pyrofex_api.snapshot().sequence
+        self._pyrofex_api._error_handler("se cortó")
+        self.assertFalse(self._supervisor.poll())
+        # Las puntas viejas se descartan y el calculador se entera por pop_updated
+        self.assertEqual(dict(self._pyrofex_api.bids()), {})
+        self.assertGreater(self._pyrofex_api.snapshot().sequence, sequence)
+        self.assertEqual(self._pyrofex_api.pop_updated(), {"GGAL/FEB22"})
+        # No se reintenta en cada vuelta del loop
+        self._time.now += 0.5
+        self.assertFalse(self._supervisor.poll())
+        self.assertEqual(self._connections(), 1)
+        self.assertAlmostEqual(self._supervisor.time_to_next_attempt(), 0.5)
+        self._time.now += 0.5
+        self.assertTrue(self._supervisor.poll())
+        self.assertEqual(self._connections(), 2)
+        # Se vuelven a suscribir la market data y los reportes de ordenes
+        self.assertEqual(self._api_wrapper.market_data_subscription.call_count, 2)
+        self.assertEqual(self._api_wrapper.order_report_subscription.call_count, 2)
+        # El corte termina con la primera foto nueva
+        self._supervisor.poll()
+        self.assertEqual(self._supervisor.gaps(), [])
+        self._time.now += 0.25
+        self._pyrofex_api._market_data_handler(market_data("GGAL/FEB22", 111, 114))
+        self._supervisor.poll()
+        self.assertEqual(self._supervisor.gaps(), [1.25])
+        self.assertEqual(self._supervisor.disconnects(), 1)
+        self.assertEqual(self._supervisor.reconnects(), 1)
+
+    def test_failed_attempts_back_off_exponentially_up_to_the_maximum(self):
+        self._api_wrapper.init_websocket_connection.side_effect = ConnectionError
+        self._supervisor.start()
+        waits = []
+        for _ in range(4):
+            waits.append(self._supervisor.time_to_next_attempt())
+            self._time.now += waits[-1]
+            self.assertFalse(self._supervisor.poll())
+        self.assertEqual(waits, [2.0, 4.0, 4.0, 4.0])
+        self.assertEqual(self._supervisor.failed_attempts(), 5)
+        self._api_wrapper.init_websocket_connection.side_effect = None
+        self._time.now += self._supervisor.time_to_next_attempt()
+        self.assertTrue(self._supervisor.poll())
+        self.assertEqual(self._supervisor.gaps(), [])
+
+    def test_backoff_resets_after_a_stable_connection(self):
+        self._supervisor.start()
+        self._pyrofex_api.stop()
+        self._supervisor.poll()
+        self._time.now += 1.0
+        self._supervisor.poll()
+        self._time.now += 10.0
+        self._supervisor.poll()
+        self._pyrofex_api.stop()
+        self._supervisor.poll()
+        self.assertEqual(self._supervisor.time_to_next_attempt(), 1.0)
+
+    def test_jitter_spreads_the_waits(self):
+        supervisor = ConnectionSupervisor(
+            self._pyrofex_api, "Rofex", initial_backoff=1.0, jitter=0.5
+        )
+        waits = [supervisor.backoff(2) for _ in range(100)]
+        self.assertTrue(all(2.0 <= wait <= 4.0 for wait in waits))
+        self.assertGreater(len(set(waits)), 1)
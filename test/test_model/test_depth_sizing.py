@@ -0,0 +1,67 @@
+import src.model.depth_sizing as ds
+import src.model.market_apis as mapis
+from src.model.instrument_handler import FutureContract
+
+import unittest
+import datetime as dt
+import numpy as np
+from freezegun import freeze_time
+
+
+class TestDepthSizer(unittest.TestCase):
+    NOW_DATE = "2022-01-01"
+
+    def setUp(self):
+        maturity_date = dt.datetime(2022, 5, 28)
+        self._buy_future = FutureContract("GGAL/FEB22", "GGAL", maturity_date, 100.0)
+        self._sell_future = FutureContract("PAMP/FEB22", "PAMP", maturity_date, 100.0)
+        self._depth_sizer = ds.DepthSizer()
+
+    def _levels(self, prices, sizes):
+        return mapis.PriceLevels(
+            np.array(prices, dtype=float), np.array(sizes, dtype=float)
+        )
+
+    @freeze_time(NOW_DATE)
+    def test_size_stops_at_the_level_that_kills_the_spread(self):
+        # El segundo nivel de las dos puntas deja la diferencia de tasas por debajo del costo
+        ask_levels = self._levels([115, 125], [10, 10])
+        bid_levels = self._levels([120, 110], [5, 10])
+        depth_size = self._depth_sizer.size(
+            ask_levels, bid_levels, self._buy_future, self._sell_future, 100, 100, 0.01
+        )
+        self.assertAlmostEqual(depth_size.amount, 5 * 100 * 100)
+        self.assertEqual(depth_size.buy_price, 115)
+        self.assertEqual(depth_size.sell_price, 120)
+
+    @freeze_time(NOW_DATE)
+    def test_size_walks_the_book_while_the_spread_beats_the_cost(self):
+        ask_levels = self._levels([115, 116], [10, 10])
+        bid_levels = self._levels([125, 124], [10, 10])
+        depth_size = self._depth_sizer.size(
+            ask_levels, bid_levels, self._buy_future, self._sell_future, 100, 100, 0.01
+        )
+        self.assertAlmostEqual(depth_size.amount, 20 * 100 * 100)
+        self.assertEqual(depth_size.buy_price, 116)
+        self.assertEqual(depth_size.sell_price, 124)
+        self.assertGreater(depth_size.buy_rate - depth_size.sell_rate, 0.01)
+
+    @freeze_time(NOW_DATE)
+    def test_size_is_none_without_opportunity(self):
+        ask_levels = self._levels([125], [10])
+        bid_levels = self._levels([115], [10])
+        self.assertIsNone(
+            self._depth_sizer.size(
+                ask_levels,
+                bid_levels,
+                self._buy_future,
+                self._sell_future,
+                100,
+                100,
+                0.01,
+            )
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import io
+import re
+import unittest
+from types import MappingProxyType
+from unittest import mock
+
+import src.model.display as display
+from src.model.async_logger import AsyncLogger
+from src.model.display import Display
+from src.model.rate_calculator import RatesSnapshot
+
+
+class FakeCalculator:
+    def __init__(self):
+        self.snapshot = RatesSnapshot(MappingProxyType({}), MappingProxyType({}), 0)
+
+    def publish(self, buy_rates, sell_rates):
+        self.snapshot = RatesSnapshot(buy_rates, sell_rates, self.snapshot.version + 1)
+
+    def rates_snapshot(self):
+        return self.snapshot
+
+
+def render(text):
+    """Aplica la salida (con secuencias ANSI) a una pantalla y devuelve sus líneas"""
+    screen, row, column = [""], 0, 0
+    for token in re.findall(r"\x1b\[(\d*)([ABGK])|(\r)|(\n)|([^\x1b\r\n]+)", text):
+        count, command, carriage_return, newline, chars = token
+        if command == "A":
+            row -= int(count)
+        elif command == "B":
+            row += int(count)
+        elif command == "G":
+            column = int(count) - 1
+        elif command == "K":
+            screen[row] = screen[row][:column]
+        elif carriage_return:
+            column = 0
+        elif newline:
+            row, column = row + 1, 0
+        while len(screen) <= row:
+            screen.append("")
+        if chars:
+            line = screen[row].ljust(column)
+            screen[row] = line[:column] + chars + line[column + len(chars) :]
+            column += len(chars)
+    return screen[:-1] if screen[-1] == "" else screen
+
+
+class TestDisplay(unittest.TestCase):
+    def setUp(self):
+        self._calculator = FakeCalculator()
+        self._output = io.StringIO()
+        self._display = Display(self._calculator, output=self._output, use_ansi=True)
+
+    def test_refresh_redraws_only_changed_cells(self):
+        self._calculator.publish(
+            {"FEB22": {"GGAL/FEB22": 0.4, "PAMP/FEB22": 0.5}},
+            {"FEB22": {"GGAL/FEB22": 0.6, "PAMP/FEB22": 0.7}},
+        )
+        self.assertTrue(self._display.refresh())
+        first_draw = self._output.getvalue()
+        # Sin tasas nuevas no se escribe nada
+        self.assertFalse(self._display.refresh())
+        self.assertEqual(self._output.getvalue(), first_draw)
+
+        buy_rates = {"FEB22": {"GGAL/FEB22": 0.4, "PAMP/FEB22": 0.55}}
+        sell_rates = {"FEB22": {"GGAL/FEB22": 0.6, "PAMP/FEB22": 0.7}}
+        self._calculator.publish(buy_rates, sell_rates)
+        self.assertTrue(self._display.refresh())
+        update = self._output.getvalue()[len(first_draw) :]
+        self.assertLess(len(update), 40)
+        self.assertEqual(
+            render(self._output.getvalue()),
+            self._display.table_lines(buy_rates, sell_rates),
+        )
+
+    def test_logger_output_forces_a_full_redraw_below_it(self):
+        logger = AsyncLogger(output=self._output)
+        logger.start()
+        self.addCleanup(logger.stop)
+        with mock.patch.object(display, "get_logger", return_value=logger):
+            # El hilo de la Display no llega a redibujar durante el test
+            shown = Display(
+                self._calculator,
+                max_refresh_rate=0.001,
+                output=self._output,
+                use_ansi=True,
+            )
+        self._calculator.publish(
+            {"FEB22": {"GGAL/FEB22": 0.4, "PAMP/FEB22": 0.5}},
+            {"FEB22": {"GGAL/FEB22": 0.6, "PAMP/FEB22": 0.7}},
+        )
+        shown.start()
+        self.assertTrue(shown.refresh())
+        logger.info("Latencias")
+        logger.flush()
+        # Sin tasas nuevas igual se vuelve a imprimir, la tabla quedó arriba del log
+        self.assertTrue(shown.refresh())
+        buy_rates = {"FEB22": {"GGAL/FEB22": 0.4, "PAMP/FEB22": 0.55}}
+        sell_rates = {"FEB22": {"GGAL/FEB22": 0.6, "PAMP/FEB22": 0.7}}
+        self._calculator.publish(buy_rates, sell_rates)
+        logger.info("Trade")
+        logger.flush()
+        self.assertTrue(shown.refresh())
+        screen = render(self._output.getvalue())
+        lines = shown.table_lines(buy_rates, sell_rates)
+        self.assertEqual(screen[-len(lines) :], lines)
+        self.assertTrue(screen[-len(lines) - 1].endswith("INFO    Trade"))
+        shown.stop()
+        self.assertIs(logger.output(), self._output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+from unittest import mock
+
+import src.model.api_wrapper as wrapper
+import src.model.market_recorder as mrec
+from src.model.ingestion import ConflatingSlots
+from src.model.market_apis import PyRofexApi
+
+
+def market_data(symbol, bid, offer):
+    return {
+        "type": "Md",
+        "instrumentId": {"marketId": "ROFX", "symbol": symbol},
+        "marketData": {
+            "BI": [{"price": bid, "size": 10}],
+            "OF": [{"price": offer, "size": 10}],
+        },
+    }
+
+
+class TestConflatingSlots(unittest.TestCase):
+    def test_last_value_wins_and_conflated_updates_are_counted(self):
+        slots = ConflatingSlots(["GGAL/FEB22", "PAMP/FEB22"])
+        self.assertFalse(slots.put("GGAL/FEB22", 1))
+        self.assertFalse(slots.put("PAMP/FEB22", 2))
+        self.assertTrue(slots.put("GGAL/FEB22", 3))
+        # Un instrumento nuevo recibe su slot
+        slots.put("YPFD/FEB22", 4)
+        self.assertEqual(
+            slots.drain(), [("GGAL/FEB22", 3), ("PAMP/FEB22", 2), ("YPFD/FEB22", 4)]
+        )
+        self.assertEqual(slots.drain(), [])
+        self.assertEqual(slots.received(), 4)
+        self.assertEqual(slots.conflated(), 1)
+        slots.put("PAMP/FEB22", 5)
+        slots.clear()
+        self.assertFalse(slots.pending())
+        self.assertEqual(slots.drain(), [])
+
+    def test_merge_combines_the_new_value_with_the_pending_one(self):
+        slots = ConflatingSlots(
+            ["GGAL/FEB22"], merge=lambda pending, new: pending + new
+        )
+        slots.put("GGAL/FEB22", [1])
+        self.assertTrue(slots.put("GGAL/FEB22", [2]))
+        self.assertEqual(slots.drain(), [("GGAL/FEB22", [1, 2])])
+        slots.put("GGAL/FEB22", [3])
+        self.assertEqual(slots.drain(), [("GGAL/FEB22", [3])])
+
+
+class TestConflatedMarketData(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(wrapper, "APIWrapper")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        tradeable_check = mock.MagicMock()
+        tradeable_check.tradeable_rofex_futures_tickers.return_value = [
+            "GGAL/FEB22",
+            "PAMP/FEB22",
+        ]
+        self._pyrofex_api = PyRofexApi(
+            tradeable_check, subscribe_to_order_report=False, conflate=True
+        )
+
+    def test_a_burst_is_applied_as_one_snapshot_with_the_last_messages(self):
+        for i in range(1000):
+            self._pyrofex_api._market_data_handler(
+                market_data("GGAL/FEB22", 100 + i, 200 + i)
+            )
+        self._pyrofex_api._market_data_handler(market_data("PAMP/FEB22", 50, 51))
+        # El websocket solo dejó los mensajes en los slots
+        self.assertEqual(self._pyrofex_api._snapshot.sequence, 0)
+        snapshot = self._pyrofex_api.snapshot()
+        self.assertEqual(snapshot.sequence, 1)
+        self.assertEqual(snapshot.bids["GGAL/FEB22"].price, 1099)
+        self.assertEqual(snapshot.asks["PAMP/FEB22"].price, 51)
+        self.assertEqual(self._pyrofex_api.pop_updated(), {"GGAL/FEB22", "PAMP/FEB22"})
+        self.assertEqual(self._pyrofex_api.ingestion().conflated(), 999)
+        # Sin mensajes nuevos la foto no cambia
+        self.assertIs(self._pyrofex_api.snapshot(), snapshot)
+
+    def test_a_message_without_a_side_keeps_the_pending_side(self):
+        self._pyrofex_api._market_data_handler(market_data("GGAL/FEB22", 100, 101))
+        only_offer = market_data("GGAL/FEB22", 100, 102)
+        only_offer["marketData"]["BI"] = []
+        self._pyrofex_api._market_data_handler(only_offer)
+        snapshot = self._pyrofex_api.snapshot()
+        self.assertEqual(snapshot.bids["GGAL/FEB22"].price, 100)
+        self.assertEqual(snapshot.asks["GGAL/FEB22"].price, 102)
+
+    def test_pop_updated_applies_pending_messages_first(self):
+        self._pyrofex_api._market_data_handler(market_data("GGAL/FEB22", 100, 101))
+        # El calculador saca los marcados antes de pedir la foto
+        self.assertEqual(self._pyrofex_api.pop_updated(), {"GGAL/FEB22"})
+        self.assertEqual(self._pyrofex_api.snapshot().bids["GGAL/FEB22"].price, 100)
+        self.assertEqual(self._pyrofex_api.pop_updated(), set())
+
+    def test_every_message_is_recorded_before_conflation(self):
+        market_recorder = mock.MagicMock()
+        self._pyrofex_api.set_recorder(market_recorder)
+        for i in range(3):
+            self._pyrofex_api._market_data_handler(
+                market_data("GGAL/FEB22", 100 + i, 200 + i)
+            )
+        self._pyrofex_api.snapshot()
+        self.assertEqual(
+            market_recorder.record.call_args_list,
+            [
+                mock.call("GGAL/FEB22", side, price, 10)
+                for i in range(3)
+                for side, price in ((mrec.BID, 100 + i), (mrec.OFFER, 200 + i))
+            ],
+        )
+
+    def test_invalidation_discards_pending_messages(self):
+        self._pyrofex_api._market_data_handler(market_data("GGAL/FEB22", 100, 101))
+        self._pyrofex_api.snapshot()
+        self._pyrofex_api._market_data_handler(market_data("GGAL/FEB22", 90, 91))
+        self.assertEqual(self._pyrofex_api.invalidate_market_data(), 1)
+        self.assertEqual(dict(self._pyrofex_api.bids()), {})
@@ -0,0 +1,92 @@
+import datetime as dt
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import src.model.api_wrapper as wrapper
+import src.model.clock as clock
+from src.model.instrument_catalog import InstrumentCatalog
+from src.model.tradeable_check import TradeableCheck
+from src.model.instrument_handler import InstrumentHandler
+
+DETAILED_INSTRUMENTS = {
+    "status": "OK",
+    "instruments": [
+        {
+            "instrumentId": {"marketId": "ROFX", "symbol": symbol},
+            "maturityDate": maturity_date,
+            "contractMultiplier": 100.0,
+        }
+        for symbol, maturity_date in [
+            ("GGAL/FEB22", "20220228"),
+            ("PAMP/FEB22", "20220228"),
+            ("GGAL/ABR22", "20220429"),
+            ("DLR/SPOT", None),
+        ]
+    ],
+}
+
+
+class TestInstrumentCatalog(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._directory.name, "instruments_cache.json")
+        self._api_wrapper = mock.MagicMock()
+        self._api_wrapper.get_detailed_instruments.return_value = DETAILED_INSTRUMENTS
+        patcher = mock.patch.object(
+            wrapper, "APIWrapper", return_value=self._api_wrapper
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self._previous_clock = clock.set_clock(
+            clock.FrozenClock(dt.datetime(2022, 2, 1, 11, 0))
+        )
+
+    def tearDown(self):
+        clock.set_clock(self._previous_clock)
+        self._directory.cleanup()
+
+    def _fetches(self):
+        return self._api_wrapper.get_detailed_instruments.call_count
+
+    def test_handlers_share_a_single_fetch(self):
+        catalog = InstrumentCatalog(self._path)
+        handler = InstrumentHandler(["GGAL", "PAMP"], catalog)
+        tradeable_check = TradeableCheck(["GGAL", "PAMP"], catalog)
+        self.assertEqual(self._fetches(), 1)
+        self.assertEqual(catalog.source(), "api")
+        self.assertEqual(
+            sorted(handler.futures_ticker()), ["GGAL/ABR22", "GGAL/FEB22", "PAMP/FEB22"]
+        )
+        self.assertEqual(tradeable_check.tradeable_maturities(), ["/FEB22"])
+        future = handler.rofex_instruments_by_ticker()["GGAL/FEB22"]
+        self.assertEqual(future.maturity_date, dt.datetime(2022, 2, 28))
+        self.assertEqual(future.future_contract_size, 100.0)
+
+    def test_warm_restart_reads_cache_without_fetching(self):
+        InstrumentCatalog(self._path).instruments()
+        restarted = InstrumentCatalog(self._path)
+        instruments = restarted.instruments()
+        self.assertEqual(self._fetches(), 1)
+        self.assertEqual(restarted.source(), "cache")
+        self.assertEqual(instruments, InstrumentCatalog(None).instruments())
+
+    def test_cache_is_refreshed_when_a_contract_expires(self):
+        InstrumentCatalog(self._path).instruments()
+        clock.clock().set(dt.datetime(2022, 3, 1, 11, 0))
+        catalog = InstrumentCatalog(self._path)
+        catalog.instruments()
+        self.assertEqual(catalog.source(), "api")
+        self.assertEqual(self._fetches(), 2)
+
+    def test_cache_is_refreshed_after_ttl(self):
+        InstrumentCatalog(self._path).instruments()
+        catalog = InstrumentCatalog(self._path, ttl=-1)
+        catalog.instruments()
+        self.assertEqual(catalog.source(), "api")
+        self.assertEqual(self._fetches(), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
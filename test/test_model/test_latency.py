@@ -0,0 +1,50 @@
+import unittest
+from unittest.mock import MagicMock
+
+import src.model.latency as lat
+from src.model.order_dispatcher import OrderDispatcher, OrderLeg
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_within_bucket_precision(self):
+        histogram = lat.LatencyHistogram()
+        for nanoseconds in range(1, 100001):
+            histogram.record(nanoseconds)
+        self.assertEqual(histogram.count(), 100000)
+        self.assertEqual(histogram.max(), 100000)
+        for percentile, expected in ((50, 50000), (99, 99000), (99.9, 99900)):
+            self.assertAlmostEqual(
+                histogram.percentile(percentile), expected, delta=expected / 64
+            )
+        # Los valores chicos se guardan exactos
+        histogram.reset()
+        histogram.record(42)
+        self.assertEqual(histogram.percentile(50), 42)
+
+
+class TestLatencyTracer(unittest.TestCase):
+    def test_dispatcher_records_send_stages_and_dump_resets(self):
+        output = []
+        tracer = lat.LatencyTracer(output=output.append)
+        pyrofex_api = MagicMock()
+        pyrofex_api.place_order.return_value = {"status": "OK"}
+        dispatcher = OrderDispatcher(pyrofex_api, latency_tracer=tracer)
+        decided = lat.timestamp()
+        dispatcher.dispatch([OrderLeg("GGAL/FEB22", "BUY", 1, 115)], decided).results()
+        dispatcher.shutdown()
+        report = tracer.report()
+        self.assertEqual(report[lat.DECISION_TO_SEND][0], 1)
+        self.assertEqual(report[lat.SEND_TO_ACK][0], 1)
+        self.assertEqual(report[lat.RECEIVE_TO_RATES][0], 0)
+        tracer.dump()
+        self.assertIn(lat.SEND_TO_ACK, output[0])
+        self.assertEqual(tracer.report()[lat.SEND_TO_ACK][0], 0)
+
+    def test_missing_start_timestamp_is_not_recorded(self):
+        tracer = lat.LatencyTracer()
+        tracer.record(lat.RECEIVE_TO_RATES, 0)
+        self.assertEqual(tracer.histogram(lat.RECEIVE_TO_RATES).count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+import datetime as dt
+
+import src.model.market_recorder as mrec
+
+
+class TestMarketDataRecorder(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._recorder = mrec.MarketDataRecorder(self._dir.name)
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_records_are_readable_and_rotate_by_day(self):
+        first_day = dt.datetime(2022, 1, 3, 15, 0).timestamp()
+        second_day = dt.datetime(2022, 1, 4, 15, 0).timestamp()
+        self._recorder.start()
+        self._recorder.record("GGAL/FEB22", mrec.BID, 110.5, 10, first_day)
+        self._recorder.record("GGAL", mrec.SPOT, 100.0, 0, first_day + 1)
+        self._recorder.record("GGAL/FEB22", mrec.OFFER, 111.0, 5, second_day)
+        self._recorder.stop()
+
+        first_path = self._recorder.path(dt.date(2022, 1, 3))
+        records = mrec.read_records(first_path)
+        symbols = mrec.read_symbols(mrec.symbols_path(first_path))
+        self.assertEqual(len(records), 2)
+        self.assertEqual(symbols[records[0]["instrument"]], "GGAL/FEB22")
+        self.assertEqual(records[0]["side"], mrec.BID)
+        self.assertEqual(records[0]["price"], 110.5)
+        self.assertEqual(symbols[records[1]["instrument"]], "GGAL")
+
+        second_path = self._recorder.path(dt.date(2022, 1, 4))
+        records = mrec.read_records(second_path)
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["side"], mrec.OFFER)
+        self.assertEqual(os.path.getsize(second_path), mrec.RECORD.size)
+
+
+if __name__ == "__main__":
+    unittest.main()
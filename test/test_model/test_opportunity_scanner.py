@@ -0,0 +1,154 @@
+import itertools
+import random
+import unittest
+from types import MappingProxyType
+from unittest import mock
+
+from src.model.opportunity_scanner import OpportunityScanner, SortedRates
+from src.model.rate_calculator import RatesSnapshot
+
+
+def rates_snapshot(buy_rates, sell_rates, version):
+    return RatesSnapshot(
+        MappingProxyType(
+            {m: MappingProxyType(rates) for m, rates in buy_rates.items()}
+        ),
+        MappingProxyType(
+            {m: MappingProxyType(rates) for m, rates in sell_rates.items()}
+        ),
+        version,
+    )
+
+
+class TestOpportunityScanner(unittest.TestCase):
+    def setUp(self):
+        self._buy_rates = {
+            "FEB22": {"GGAL/FEB22": 0.60, "PAMP/FEB22": 0.55, "YPFD/FEB22": 0.40},
+            "ABR22": {"GGAL/ABR22": 0.45, "PAMP/ABR22": 0.42},
+        }
+        self._sell_rates = {
+            "FEB22": {"GGAL/FEB22": 0.62, "PAMP/FEB22": 0.57, "YPFD/FEB22": 0.41},
+            "ABR22": {"GGAL/ABR22": 0.47, "PAMP/ABR22": 0.30},
+        }
+
+    def test_top_ranks_non_overlapping_pairs_by_maturity(self):
+        scanner = OpportunityScanner(max_opportunities=5)
+        scanner.update(rates_snapshot(self._buy_rates, self._sell_rates, 1))
+        self.assertEqual(
+            [(o.ticker_to_sell, o.ticker_to_buy) for o in scanner.top(cost=0.01)],
+            [("GGAL/FEB22", "YPFD/FEB22"), ("GGAL/ABR22", "PAMP/ABR22")],
+        )
+        # PAMP/FEB22 contra YPFD/FEB22 también rinde, pero YPFD ya se usó
+        self.assertEqual(len(scanner.top(cost=0.01, k=1)), 1)
+        self.assertEqual(scanner.top(cost=0.5), [])
+
+    def test_cross_maturity_pairs(self):
+        scanner = OpportunityScanner(max_opportunities=2, cross_maturity=True)
+        scanner.update(rates_snapshot(self._buy_rates, self._sell_rates, 1))
+        best, second = scanner.top(cost=0.01)
+        self.assertEqual(
+            (best.ticker_to_sell, best.sell_maturity, best.ticker_to_buy),
+            ("GGAL/FEB22", "FEB22", "PAMP/ABR22"),
+        )
+        self.assertEqual(best.buy_maturity, "ABR22")
+        self.assertAlmostEqual(best.spread, 0.30)
+        self.assertEqual(
+            (second.ticker_to_sell, second.ticker_to_buy), ("PAMP/FEB22", "YPFD/FEB22")
+        )
+
+    def test_update_only_applies_changed_maturities(self):
+        scanner = OpportunityScanner()
+        snapshot = rates_snapshot(self._buy_rates, self._sell_rates, 1)
+        self.assertTrue(scanner.update(snapshot))
+        self.assertFalse(scanner.update(snapshot))
+        # Foto nueva copy-on-write: ABR22 es el mismo objeto, FEB22 cambió
+        buy_rates = dict(snapshot.buy_rates)
+        buy_rates["FEB22"] = MappingProxyType({"GGAL/FEB22": 0.30, "PAMP/FEB22": 0.55})
+        self.assertTrue(
+            scanner.update(
+                snapshot._replace(buy_rates=MappingProxyType(buy_rates), version=2)
+            )
+        )
+        self.assertEqual(scanner.best("FEB22")[0], ("PAMP/FEB22", 0.55))
+        self.assertEqual(scanner.best("ABR22")[0], ("GGAL/ABR22", 0.45))
+
+    def test_best_pair_matches_brute_force(self):
+        rnd = random.Random(0)
+        scanner = OpportunityScanner(cross_maturity=True)
+        tickers = [f"T{i}/M{i % 3}" for i in range(30)]
+        for version in range(1, 20):
+            buy_rates, sell_rates = {}, {}
+            for ticker in tickers:
+                maturity = ticker.split("/")[1]
+                rate = rnd.uniform(0.3, 0.6)
+                buy_rates.setdefault(maturity, {})[ticker] = rate
+                sell_rates.setdefault(maturity, {})[ticker] = rate + rnd.uniform(
+                    0, 0.05
+                )
+            scanner.update(rates_snapshot(buy_rates, sell_rates, version))
+            all_buy = {t: r for rates in buy_rates.values() for t, r in rates.items()}
+            all_sell = {t: r for rates in sell_rates.values() for t, r in rates.items()}
+            expected = max(
+                all_buy[s] - all_sell[b]
+                for s, b in itertools.product(tickers, tickers)
+                if s != b
+            )
+            self.assertAlmostEqual(scanner.top(k=1)[0].spread, expected)
+
+    def test_top_matches_greedy_brute_force(self):
+        rnd = random.Random(1)
+        tickers = [f"T{i}/M{i % 3}" for i in range(12)]
+        for cross_maturity in (False, True):
+            scanner = OpportunityScanner(
+                max_opportunities=5, cross_maturity=cross_maturity
+            )
+            for version in range(1, 20):
+                buy_rates, sell_rates = {}, {}
+                for ticker in tickers:
+                    maturity = ticker.split("/")[1]
+                    buy_rates.setdefault(maturity, {})[ticker] = rnd.uniform(0.3, 0.6)
+                    sell_rates.setdefault(maturity, {})[ticker] = rnd.uniform(0.3, 0.6)
+                scanner.update(rates_snapshot(buy_rates, sell_rates, version))
+                all_buy = {
+                    t: r for rates in buy_rates.values() for t, r in rates.items()
+                }
+                all_sell = {
+                    t: r for rates in sell_rates.values() for t, r in rates.items()
+                }
+                # Elige una y otra vez el mejor par de futuros distintos sin usar
+                used, expected = set(), []
+                for _ in range(5):
+                    pairs = [
+                        (all_buy[s] - all_sell[b], s, b)
+                        for s, b in itertools.product(tickers, tickers)
+                        if s != b
+                        and used.isdisjoint((s, b))
+                        and (cross_maturity or s.split("/")[1] == b.split("/")[1])
+                    ]
+                    spread, s, b = max(pairs)
+                    if spread <= 0.02:
+                        break
+                    expected.append((s, b))
+                    used.update((s, b))
+                self.assertEqual(
+                    [
+                        (o.ticker_to_sell, o.ticker_to_buy)
+                        for o in scanner.top(cost=0.02)
+                    ],
+                    expected,
+                )
+
+    def test_top_does_not_walk_the_used_futures(self):
+        # La misma tasa en los dos lados: el mejor par es siempre un futuro contra sí mismo
+        rates = {"FEB22": {f"T{i}/FEB22": 1.0 - i / 1000 for i in range(1000)}}
+        scanner = OpportunityScanner(max_opportunities=5)
+        scanner.update(rates_snapshot(rates, rates, 1))
+        with mock.patch.object(
+            SortedRates, "entry", autospec=True, side_effect=SortedRates.entry
+        ) as entry:
+            self.assertEqual(len(scanner.top(cost=-1)), 5)
+        self.assertLess(entry.call_count, 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pyRofex
+
+from src.model.order_dispatcher import OrderDispatcher, OrderLeg
+
+
+class TestOrderDispatcher(unittest.TestCase):
+    def setUp(self):
+        self._pyrofex_api = MagicMock()
+        self._pyrofex_api.place_order.side_effect = lambda **kwargs: {
+            "order": {"clientId": kwargs["ticker"]}
+        }
+        self._pyrofex_api.next_account.side_effect = ["REM1", "REM2"]
+        self._dispatcher = OrderDispatcher(self._pyrofex_api)
+        self.addCleanup(self._dispatcher.shutdown)
+        self._legs = [
+            OrderLeg("GGAL/FEB22", pyRofex.Side.BUY, 10, 115),
+            OrderLeg("PAMP/FEB22", pyRofex.Side.SELL, 10, 120),
+            OrderLeg("GGAL", pyRofex.Side.BUY, 1000, 100),
+            OrderLeg("PAMP", pyRofex.Side.SELL, 1000, 100),
+        ]
+
+    def test_all_legs_are_sent_in_parallel(self):
+        # Cada pata espera a que las cuatro estén en vuelo, en serie no terminaría
+        in_flight = threading.Barrier(len(self._legs), timeout=5)
+
+        def place_order(**kwargs):
+            in_flight.wait()
+            return {"order": {"clientId": kwargs["ticker"]}}
+
+        self._pyrofex_api.place_order.side_effect = place_order
+        handle = self._dispatcher.dispatch(self._legs)
+        self.assertTrue(handle.all_sent(timeout=5))
+        self.assertTrue(handle.done())
+
+    def test_spot_legs_are_sent_as_limit_ioc(self):
+        results = self._dispatcher.dispatch(self._legs).results(timeout=5)
+        # Los resultados vienen en el orden de las patas
+        self.assertEqual([result.leg for result in results], self._legs)
+        self.assertEqual(
+            [result.response["order"]["clientId"] for result in results],
+            ["GGAL/FEB22", "PAMP/FEB22", "GGAL", "PAMP"],
+        )
+        spot_orders = {
+            call.kwargs["ticker"]: call.kwargs
+            for call in self._pyrofex_api.place_order.call_args_list
+        }
+        self.assertEqual(
+            spot_orders["GGAL"],
+            {
+                "ticker": "GGAL",
+                "side": pyRofex.Side.BUY,
+                "size": 1000,
+                "price": 100,
+                "time_in_force": pyRofex.TimeInForce.ImmediateOrCancel,
+                "order_type": pyRofex.OrderType.LIMIT,
+                "account": "REM1",
+            },
+        )
+        self.assertEqual(spot_orders["PAMP"]["side"], pyRofex.Side.SELL)
+
+    def test_all_legs_of_a_trade_go_through_the_same_account(self):
+        self._dispatcher.dispatch(self._legs).results(timeout=5)
+        self._dispatcher.dispatch(self._legs[:2]).results(timeout=5)
+        self.assertEqual(
+            [
+                call.kwargs["account"]
+                for call in self._pyrofex_api.place_order.call_args_list
+            ],
+            ["REM1"] * 4 + ["REM2"] * 2,
+        )
+
+    def test_a_failed_leg_does_not_stop_the_others(self):
+        def place_order(**kwargs):
+            if kwargs["ticker"] == "PAMP/FEB22":
+                raise ConnectionError("sin conexión")
+            return {"order": {"clientId": kwargs["ticker"]}}
+
+        self._pyrofex_api.place_order.side_effect = place_order
+        handle = self._dispatcher.dispatch(self._legs)
+        results = handle.results(timeout=5)
+        self.assertFalse(handle.all_sent())
+        self.assertEqual(self._pyrofex_api.place_order.call_count, 4)
+        failed = results[1]
+        self.assertIsInstance(failed.error, ConnectionError)
+        self.assertIsNone(failed.response)
+        self.assertGreaterEqual(failed.latency, 0)
+        for result in results[:1] + results[2:]:
+            self.assertIsNone(result.error)
+            self.assertEqual(result.response["order"]["clientId"], result.leg.ticker)
+        self.assertEqual(len(handle.latencies()), 4)
+
+    def test_background_failures_are_logged(self):
+        with patch.object(self._dispatcher, "_logger") as logger:
+            self._dispatcher.run_in_background(
+                MagicMock(side_effect=ValueError("error"))
+            ).result(timeout=5)
+        logger.exception.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+import src.model.order_tracker as ot
+
+
+def order_report(status, cum_qty=0, last_qty=0, last_px=0):
+    return {
+        "type": "or",
+        "orderReport": {
+            "orderId": "1128056",
+            "clOrdId": "test_order_id",
+            "instrumentId": {"marketId": "ROFX", "symbol": "GGAL/FEB22"},
+            "price": 115,
+            "orderQty": 10,
+            "side": "BUY",
+            "cumQty": cum_qty,
+            "lastQty": last_qty,
+            "lastPx": last_px,
+            "leavesQty": 10 - cum_qty,
+            "status": status,
+        },
+    }
+
+
+class TestOrderTracker(unittest.TestCase):
+    def setUp(self):
+        self._order_tracker = ot.OrderTracker()
+
+    def test_order_report_updates_status_and_fills(self):
+        fills = []
+        self._order_tracker.add_fill_listener(lambda order, fill: fills.append(fill))
+        self._order_tracker.on_order_report(order_report("NEW"))
+        self._order_tracker.on_order_report(
+            order_report("PARTIALLY_FILLED", cum_qty=4, last_qty=4, last_px=115)
+        )
+        self._order_tracker.on_order_report(
+            order_report("FILLED", cum_qty=10, last_qty=6, last_px=114)
+        )
+        order = self._order_tracker.order_by_order_id("1128056")
+        self.assertEqual(self._order_tracker.status("test_order_id"), "FILLED")
+        self.assertEqual(
+            [status for status, _ in order.transitions],
+            ["NEW", "PARTIALLY_FILLED", "FILLED"],
+        )
+        self.assertEqual([(f.quantity, f.price) for f in fills], [(4, 115), (6, 114)])
+        self.assertEqual(order.cum_quantity, 10)
+
+    def test_wait_for_state_resolves_when_order_reaches_state(self):
+        final_state = self._order_tracker.wait_for_state("test_order_id")
+        self._order_tracker.on_order_report(order_report("NEW"))
+        self.assertFalse(final_state.done())
+        self._order_tracker.on_order_report(order_report("CANCELLED"))
+        self.assertEqual(final_state.result(timeout=0).status, "CANCELLED")
+        # Si la orden ya está en el estado el Future se resuelve enseguida
+        self.assertTrue(self._order_tracker.wait_for_state("test_order_id").done())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import datetime as dt
+import unittest
+
+import pyRofex
+
+import src.model.market_apis as mapis
+import src.model.position_engine as pe
+from src.model.instrument_handler import FutureContract
+from src.model.order_dispatcher import OrderLeg
+from src.model.order_tracker import OrderTracker
+
+
+class TestPositionEngine(unittest.TestCase):
+    def setUp(self):
+        maturity_date = dt.datetime(2022, 2, 28)
+        self._futures_by_ticker = {
+            "GGAL/FEB22": FutureContract("GGAL/FEB22", "GGAL", maturity_date, 100.0),
+            "PAMP/FEB22": FutureContract("PAMP/FEB22", "PAMP", maturity_date, 100.0),
+        }
+        self._maturity_by_ticker = {"GGAL/FEB22": "FEB22", "PAMP/FEB22": "FEB22"}
+        self._spot_tickers = {"GGAL": "GGAL/SPOT"}
+
+    def engine(self, limits=pe.RiskLimits(None, None, None, None)):
+        return pe.PositionEngine(
+            self._futures_by_ticker,
+            self._maturity_by_ticker,
+            self._spot_tickers,
+            limits=limits,
+        )
+
+    def test_fills_update_positions_notionals_and_realized_pnl(self):
+        engine = self.engine()
+        engine.apply_fill("GGAL/FEB22", "BUY", 2, 110.0)
+        engine.apply_fill("GGAL/FEB22", "BUY", 2, 120.0)
+        self.assertEqual(engine.position("GGAL/FEB22"), ("GGAL/FEB22", 4, 115.0, 0.0))
+        self.assertEqual(engine.underlier_notional("GGAL"), 4 * 100 * 115.0)
+        # Se cierran 3 contratos con ganancia de 5 por acción
+        engine.apply_fill("GGAL/FEB22", "SELL", 3, 120.0)
+        self.assertEqual(engine.position("GGAL/FEB22").quantity, 1)
+        self.assertEqual(engine.realized_pnl(), 3 * 100 * 5.0)
+        # Se da vuelta: queda vendido 1 al precio de la ejecución
+        engine.apply_fill("GGAL/FEB22", "SELL", 2, 118.0)
+        self.assertEqual(
+            engine.position("GGAL/FEB22"), ("GGAL/FEB22", -1, 118.0, 1800.0)
+        )
+        self.assertEqual(engine.underlier_notional("GGAL"), -100 * 118.0)
+        # El spot vendido compensa el nocional neto del subyacente
+        engine.apply_fill("GGAL/SPOT", "BUY", 100, 118.0)
+        self.assertEqual(engine.underlier_notional("GGAL"), 0.0)
+        self.assertEqual(engine.maturity_notional("FEB22"), 100 * 118.0)
+        self.assertEqual(engine.gross_notional(), 2 * 100 * 118.0)
+
+    def test_unrealized_pnl_marks_against_the_book(self):
+        engine = self.engine()
+        engine.apply_fill("GGAL/FEB22", "BUY", 2, 110.0)
+        engine.apply_fill("PAMP/FEB22", "SELL", 1, 130.0)
+        engine.apply_fill("GGAL/SPOT", "SELL", 200, 100.0)
+        book_snapshot = mapis.BookSnapshot(
+            {"GGAL/FEB22": mapis.OrderBook(112, 10)},
+            {"PAMP/FEB22": mapis.OrderBook(125, 10)},
+            0,
+        )
+        self.assertEqual(
+            engine.unrealized_pnl(book_snapshot, {"GGAL": 99.0}),
+            2 * 100 * 2.0 + 100 * 5.0 + 200 * 1.0,
+        )
+
+    def test_fill_listener_of_the_order_tracker(self):
+        engine = self.engine()
+        order_tracker = OrderTracker()
+        order_tracker.add_fill_listener(engine.on_fill)
+        order_tracker.on_order_report(
+            {
+                "orderReport": {
+                    "clOrdId": "1",
+                    "instrumentId": {"symbol": "PAMP/FEB22"},
+                    "side": "SELL",
+                    "cumQty": 3,
+                    "lastQty": 3,
+                    "lastPx": 125,
+                    "status": "FILLED",
+                }
+            }
+        )
+        self.assertEqual(engine.position("PAMP/FEB22").quantity, -3)
+        self.assertEqual(engine.fills(), 1)
+
+    def test_reserve_checks_limits_including_pending_orders(self):
+        engine = self.engine(pe.RiskLimits(5, None, 75000.0, None))
+        legs = [
+            OrderLeg("GGAL/FEB22", pyRofex.Side.BUY, 3, 110.0),
+            OrderLeg("PAMP/FEB22", pyRofex.Side.SELL, 3, 120.0),
+        ]
+        reservation = engine.reserve(legs)
+        # Las patas todavía sin terminar cuentan para el límite de posición
+        with self.assertRaises(pe.LimitBreached) as breached:
+            engine.reserve(legs)
+        self.assertEqual(breached.exception.ticker, "GGAL/FEB22")
+        self.assertEqual(engine.rejections(), 1)
+        engine.release(reservation)
+        engine.apply_fill("GGAL/FEB22", "BUY", 1, 110.0)
+        # Nocional bruto del vencimiento: 4 * 100 * 110 + 3 * 100 * 120 > 75000
+        with self.assertRaises(pe.LimitBreached) as breached:
+            engine.reserve(legs)
+        self.assertEqual(breached.exception.ticker, "FEB22")
+        # Achicar la posición siempre pasa
+        engine.reserve([OrderLeg("GGAL/FEB22", pyRofex.Side.SELL, 1, 110.0)])
+
+    def test_limits_follow_config_reloads(self):
+        class Config:
+            def __init__(self, values):
+                self.values = values
+
+            def config(self):
+                return self.values
+
+            def get(self, key, default=None):
+                return self.values.get(key, default)
+
+        config_service = Config({"MAX_POSITION": 1})
+        engine = pe.PositionEngine(
+            self._futures_by_ticker,
+            self._maturity_by_ticker,
+            config_service=config_service,
+        )
+        leg = OrderLeg("GGAL/FEB22", pyRofex.Side.BUY, 2, 110.0)
+        with self.assertRaises(pe.LimitBreached):
+            engine.reserve([leg])
+        config_service.values = {"MAX_POSITION": 2}
+        engine.reserve([leg])
@@ -1,6 +1,8 @@
 import src.model.rate_calculator as rc
 import src.model.market_apis as mapis
+import src.model.api_wrapper as wrapper
 from src.model.instrument_handler import FutureContract
+from src.model.spot_sources import FakeSpotSource
 
 import unittest
 from unittest.mock import MagicMock, Mock, patch
@@ -20,6 +22,10 @@ class TestRateCalculator(unittest.TestCase):
         }
 
         self._pyrofex_api_mock = MagicMock()
+        # La foto de las puntas se arma con lo que devuelven bids() y asks()
+        self._pyrofex_api_mock.snapshot.side_effect = lambda: mapis.BookSnapshot(
+            self._pyrofex_api_mock.bids(), self._pyrofex_api_mock.asks(), 0
+        )
         self._pyrofex_api_mock.bids.return_value = {
             "GGAL/FEB22": mapis.OrderBook(110, 10),
             "PAMP/FEB22": mapis.OrderBook(120, 10),
@@ -90,6 +96,160 @@ class TestRateCalculator(unittest.TestCase):
         _, min_sell_rate = self._implicit_rate_calculator.min_sell_rate("FEB22")
         self.assertTrue(max_buy_rate < min_sell_rate)
 
+    @freeze_time(NOW_DATE)
+    def test_update_rates_only_recomputes_updated_futures(self):
+        self._implicit_rate_calculator.update_rates()
+        buy_rate_before = self._implicit_rate_calculator.buy_rate()["FEB22"]
+        self._pyrofex_api_mock.bids.return_value = {
+            "GGAL/FEB22": mapis.OrderBook(100, 10),
+            "PAMP/FEB22": mapis.OrderBook(140, 10),
+        }
+        self._pyrofex_api_mock.pop_updated.return_value = {"PAMP/FEB22"}
+        self._yfinance_api_mock.pop_updated.return_value = set()
+        self._implicit_rate_calculator.update_rates()
+        buy_rate_after = self._implicit_rate_calculator.buy_rate()["FEB22"]
+        # GGAL/FEB22 no fue marcado como actualizado, mantiene su tasa
+        self.assertEqual(buy_rate_before["GGAL/FEB22"], buy_rate_after["GGAL/FEB22"])
+        self.assertGreater(buy_rate_after["PAMP/FEB22"], buy_rate_before["PAMP/FEB22"])
+        ticker, _ = self._implicit_rate_calculator.max_buy_rate("FEB22")
+        self.assertEqual(ticker, "PAMP/FEB22")
+
+    @freeze_time(NOW_DATE)
+    def test_rates_snapshot_is_not_modified_by_later_updates(self):
+        self._implicit_rate_calculator.update_rates()
+        snapshot = self._implicit_rate_calculator.rates_snapshot()
+        self.assertEqual(
+            dict(snapshot.buy_rates["FEB22"]),
+            self._implicit_rate_calculator.buy_rate()["FEB22"],
+        )
+        self._pyrofex_api_mock.bids.return_value = {
+            "GGAL/FEB22": mapis.OrderBook(100, 10),
+            "PAMP/FEB22": mapis.OrderBook(140, 10),
+        }
+        self._pyrofex_api_mock.pop_updated.return_value = {"PAMP/FEB22"}
+        self._yfinance_api_mock.pop_updated.return_value = set()
+        self._implicit_rate_calculator.update_rates()
+        new_snapshot = self._implicit_rate_calculator.rates_snapshot()
+        self.assertEqual(new_snapshot.version, snapshot.version + 1)
+        self.assertNotEqual(
+            snapshot.buy_rates["FEB22"]["PAMP/FEB22"],
+            new_snapshot.buy_rates["FEB22"]["PAMP/FEB22"],
+        )
+
+    @freeze_time(NOW_DATE)
+    def test_rates_are_dropped_when_books_are_invalidated(self):
+        self._implicit_rate_calculator.update_rates()
+        # Al reconectar se vacían las puntas y se marcan los futuros que las tenían
+        self._pyrofex_api_mock.bids.return_value = {}
+        self._pyrofex_api_mock.asks.return_value = {}
+        self._pyrofex_api_mock.pop_updated.return_value = {"GGAL/FEB22", "PAMP/FEB22"}
+        self._yfinance_api_mock.pop_updated.return_value = set()
+        self._implicit_rate_calculator.update_rates()
+        self.assertFalse(
+            self._implicit_rate_calculator.maturiry_ready_to_trade("FEB22")
+        )
+        self.assertNotIn(
+            "FEB22", self._implicit_rate_calculator.rates_snapshot().sell_rates
+        )
+
+    def test_expired_contracts_are_retired_on_day_rollover(self):
+        with freeze_time("2022-05-27"):
+            self._implicit_rate_calculator.update_rates()
+            self.assertTrue(
+                self._implicit_rate_calculator.maturiry_ready_to_trade("FEB22")
+            )
+        # El día del vencimiento ya no hay días para calcular la tasa, no se lanza
+        # ExpiredInstrument sino que el contrato se retira
+        with freeze_time("2022-05-28"):
+            self._implicit_rate_calculator.update_rates()
+        self.assertFalse(
+            self._implicit_rate_calculator.maturiry_ready_to_trade("FEB22")
+        )
+        self.assertNotIn(
+            "FEB22", self._implicit_rate_calculator.rates_snapshot().buy_rates
+        )
+        with self.assertRaises(KeyError):
+            self._implicit_rate_calculator.max_buy_rate("FEB22")
+
+
+def market_data(symbol, bid, offer):
+    return {
+        "type": "Md",
+        "instrumentId": {"marketId": "ROFX", "symbol": symbol},
+        "marketData": {
+            "BI": [{"price": bid, "size": 10}],
+            "OF": [{"price": offer, "size": 10}],
+        },
+    }
+
+
+class TestUpdatesDuringARecalculation(unittest.TestCase):
+    """Lo que llega mientras se recalcula queda para la próxima vuelta, no se pierde"""
+
+    calculator_class = rc.ImplicitRateCalculator
+
+    def setUp(self):
+        patcher = patch.object(wrapper, "APIWrapper")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        tradeable_check = MagicMock()
+        tradeable_check.tradeable_rofex_futures_tickers.return_value = ["GGAL/FEB22"]
+        tradeable_check.tradeable_pyrofex_future_underlier_ticker.return_value = {
+            "GGAL": [
+                FutureContract("GGAL/FEB22", "GGAL", dt.datetime(2022, 5, 28), 100.0)
+            ]
+        }
+        tradeable_check.tradeable_ticker_maturity.return_value = {"GGAL/FEB22": "FEB22"}
+        self._pyrofex_api = mapis.PyRofexApi(
+            tradeable_check, subscribe_to_order_report=False
+        )
+        self._spot_source = FakeSpotSource({"GGAL": 100.0})
+        self._pyrofex_api._market_data_handler(market_data("GGAL/FEB22", 110, 115))
+        self._calculator = self.calculator_class(
+            self._pyrofex_api, self._spot_source, tradeable_check
+        )
+
+    def _buy_rate(self):
+        return self._calculator.buy_rate()["FEB22"]["GGAL/FEB22"]
+
+    def _recalculate_with(self, source, method, update):
+        """Recalcula, y update llega justo después de que el calculador lee method"""
+        read = getattr(source, method)
+
+        def read_then_update():
+            value = read()
+            update()
+            return value
+
+        with patch.object(source, method, side_effect=read_then_update):
+            self._calculator.update_rates()
+
+    @freeze_time("2022-01-01")
+    def test_a_spot_update_during_a_recalculation_is_not_lost(self):
+        self._calculator.update_rates()
+        rate = self._buy_rate()
+        self._recalculate_with(
+            self._spot_source,
+            "last_prices",
+            lambda: self._spot_source.push("GGAL", 105.0),
+        )
+        self._calculator.update_rates()
+        self.assertLess(self._buy_rate(), rate)
+
+    @freeze_time("2022-01-01")
+    def test_a_book_update_during_a_recalculation_is_not_lost(self):
+        self._calculator.update_rates()
+        rate = self._buy_rate()
+        self._recalculate_with(
+            self._pyrofex_api,
+            "snapshot",
+            lambda: self._pyrofex_api._market_data_handler(
+                market_data("GGAL/FEB22", 112, 115)
+            ),
+        )
+        self._calculator.update_rates()
+        self.assertGreater(self._buy_rate(), rate)
+
 
 if __name__ == "__main__":
     unittest.main()
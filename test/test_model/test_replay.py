@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+import datetime as dt
+
+import src.model.replay as rp
+from src.model.instrument_handler import FutureContract
+
+
+class TestReplayEngine(unittest.TestCase):
+    def setUp(self):
+        maturity_date = dt.datetime(2022, 5, 28, 0, 0, 0, 0)
+        ggal_future = FutureContract("GGAL/FEB22", "GGAL", maturity_date, 100.0)
+        pamp_future = FutureContract("PAMP/FEB22", "PAMP", maturity_date, 100.0)
+        self._tradeable_check_mock = MagicMock()
+        self._tradeable_check_mock.tradeable_pyrofex_future_underlier_ticker.return_value = {
+            "GGAL": [ggal_future],
+            "PAMP": [pamp_future],
+        }
+        self._tradeable_check_mock.tradeable_ticker_maturity.return_value = {
+            "GGAL/FEB22": "FEB22",
+            "PAMP/FEB22": "FEB22",
+        }
+        self._tradeable_check_mock.tradeable_maturities.return_value = ["FEB22"]
+        self._instrument_handler_mock = MagicMock()
+        self._instrument_handler_mock.rofex_instruments_by_ticker.return_value = {
+            "GGAL/FEB22": ggal_future,
+            "PAMP/FEB22": pamp_future,
+        }
+        self._dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _write_events(self, events):
+        path = os.path.join(self._dir.name, "market_data.jsonl")
+        start = dt.datetime(2022, 1, 1, 11, 0).timestamp()
+        with open(path, "w") as f:
+            for i, (instrument, side, price, size) in enumerate(events):
+                row = {
+                    "timestamp": start + i,
+                    "instrument": instrument,
+                    "side": side,
+                    "price": price,
+                    "size": size,
+                }
+                f.write(json.dumps(row) + "\n")
+        return path
+
+    def test_replay_trades_arbitrage_once_with_simulated_fills(self):
+        path = self._write_events(
+            [
+                ("GGAL", "SPOT", 100, 0),
+                ("PAMP", "SPOT", 100, 0),
+                ("GGAL/FEB22", "BID", 110, 10),
+                ("GGAL/FEB22", "OFFER", 115, 10),
+                ("PAMP/FEB22", "BID", 120, 10),
+                ("PAMP/FEB22", "OFFER", 125, 10),
+            ]
+        )
+        report = rp.ReplayEngine(
+            self._instrument_handler_mock, self._tradeable_check_mock
+        ).run(rp.load_events([path]))
+        self.assertEqual(report.messages, 6)
+        self.assertEqual(report.trades, 1)
+        self.assertEqual(report.orders, 2)
+        self.assertEqual(report.fills, 2)
+        # Se compra GGAL/FEB22 a 115 y se vende PAMP/FEB22 a 120, valuado a precio medio
+        self.assertAlmostEqual(report.pnl, 10 * 100 * (120 - 115 + 112.5 - 122.5))
+
+    def test_rate_engine_and_strategy_share_the_configured_calendar(self):
+        config = {"DAYS_YEAR": 360, "HOLIDAYS": []}
+        engine = rp.ReplayEngine(
+            self._instrument_handler_mock,
+            self._tradeable_check_mock,
+            config_service=config,
+            depth_sizing=True,
+        )
+        clock_service = engine._implicit_rate_calculator._clock_service
+        self.assertIs(engine._strategy._depth_sizer._clock_service, clock_service)
+        self.assertEqual(clock_service.days_in_year(), 360)
+
+    def test_replay_without_arbitrage_does_not_trade(self):
+        path = self._write_events(
+            [
+                ("GGAL", "SPOT", 100, 0),
+                ("PAMP", "SPOT", 100, 0),
+                ("GGAL/FEB22", "BID", 110, 10),
+                ("GGAL/FEB22", "OFFER", 120, 10),
+                ("PAMP/FEB22", "BID", 115, 10),
+                ("PAMP/FEB22", "OFFER", 125, 10),
+            ]
+        )
+        report = rp.ReplayEngine(
+            self._instrument_handler_mock, self._tradeable_check_mock
+        ).run(rp.load_events([path]))
+        self.assertEqual(report.trades, 0)
+        self.assertEqual(report.pnl, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+import json
+import socket
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import pyRofex
+from pyRofex.components.exceptions import ApiException
+
+from src.model.rest_client import (
+    RestClientPool,
+    RofexRestClient,
+    rest_client_pool_from_config,
+)
+
+
+class RofexHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        self.server.logins += 1
+        self._reply({"status": "OK"}, {"X-Auth-Token": self.server.token})
+
+    def do_GET(self):
+        if self.headers.get("X-Auth-Token") != self.server.token:
+            self._reply({"status": "ERROR"}, status=401)
+            return
+        self.server.paths.append(self.path)
+        self._reply({"status": "OK", "order": {"clientId": "1", "proprietary": "PBCP"}})
+
+    def _reply(self, body, headers=None, status=200):
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(content)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestRofexRestClient(unittest.TestCase):
+    def setUp(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), RofexHandler)
+        self._server.daemon_threads = True
+        self._server.lock = threading.Lock()
+        self._server.connections = 0
+        self._server.logins = 0
+        self._server.token = "token"
+        self._server.paths = []
+        threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        ).start()
+        self.addCleanup(self._server.server_close)
+        self.addCleanup(self._server.shutdown)
+        self._client = RofexRestClient(
+            "user",
+            "password",
+            "REM1234",
+            pyRofex.Environment.REMARKET,
+            pool_size=2,
+            base_url=f"http://127.0.0.1:{self._server.server_address[1]}/",
+        )
+        self.addCleanup(self._client.close)
+
+    def test_orders_reuse_the_warmed_up_connections(self):
+        self.assertEqual(self._client.warm_up(), 2)
+        self.assertEqual(self._server.connections, 2)
+        for _ in range(10):
+            response = self._client.send_order(
+                "DLR/MAR23", 1, pyRofex.OrderType.LIMIT, pyRofex.Side.BUY, price=100.5
+            )
+        self.assertEqual(response["order"]["clientId"], "1")
+        self.assertEqual(self._server.connections, 2)
+        self.assertEqual(self._server.logins, 1)
+        self.assertIn("symbol=DLR/MAR23", self._server.paths[-1])
+        self.assertIn("account=REM1234", self._server.paths[-1])
+        self.assertIn("price=100.5", self._server.paths[-1])
+
+    def test_requests_are_counted_from_every_thread(self):
+        self._client.warm_up()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: self._client.get_order_status("1"), range(200)))
+        self.assertEqual(self._client.request_count(), 202)
+
+    def test_detailed_instruments_path(self):
+        self._client.get_detailed_instruments()
+        self.assertEqual(self._server.paths[-1], "/rest/instruments/details")
+
+    def test_an_expired_token_is_renewed_once(self):
+        self._client.warm_up(1)
+        self._server.token = "nuevo"
+        self._client.get_order_status("1")
+        self.assertEqual(self._server.logins, 2)
+        self.assertTrue(self._server.paths[-1].startswith("/rest/order/id?clOrdId=1"))
+
+    def test_a_rejected_login_raises(self):
+        self._client.warm_up(1)
+        with mock.patch.object(self._client, "authenticate"):
+            self._server.token = "nuevo"
+            with self.assertRaises(ApiException):
+                self._client.get_detailed_instruments()
+
+
+class TestRestClientPool(unittest.TestCase):
+    def test_orders_are_spread_and_queries_go_to_the_sending_client(self):
+        clients = [mock.MagicMock(), mock.MagicMock()]
+        for i, client in enumerate(clients):
+            client.send_order.return_value = {"order": {"clientId": f"id{i}"}}
+        pool = RestClientPool(clients)
+        pool.send_order("DLR/MAR23", 1, pyRofex.OrderType.LIMIT, pyRofex.Side.BUY)
+        pool.send_order("DLR/MAR23", 1, pyRofex.OrderType.LIMIT, pyRofex.Side.SELL)
+        self.assertEqual(clients[0].send_order.call_count, 1)
+        self.assertEqual(clients[1].send_order.call_count, 1)
+        pool.get_order_status("id1")
+        clients[1].get_order_status.assert_called_once_with("id1", None)
+        clients[0].get_order_status.assert_not_called()
+
+    def test_orders_with_an_account_go_to_its_client(self):
+        clients = [mock.MagicMock(), mock.MagicMock()]
+        for i, client in enumerate(clients):
+            client.account.return_value = f"REM{i}"
+            client.send_order.return_value = {"order": {"clientId": f"id{i}"}}
+        pool = RestClientPool(clients)
+        account = pool.next_account()
+        for side in (pyRofex.Side.BUY, pyRofex.Side.SELL, pyRofex.Side.BUY):
+            pool.send_order(
+                "DLR/MAR23", 1, pyRofex.OrderType.LIMIT, side, account=account
+            )
+        self.assertEqual(clients[0].send_order.call_count, 3)
+        clients[1].send_order.assert_not_called()
+        self.assertEqual(pool.next_account(), "REM1")
+
+    def test_finished_and_old_orders_are_forgotten(self):
+        client = mock.MagicMock()
+        client.send_order.side_effect = [
+            {"order": {"clientId": f"id{i}"}} for i in range(3)
+        ]
+        client.get_order_status.return_value = {"order": {"status": "FILLED"}}
+        pool = RestClientPool([client], max_orders=2)
+        for _ in range(3):
+            pool.send_order("DLR/MAR23", 1, pyRofex.OrderType.LIMIT, pyRofex.Side.BUY)
+        self.assertEqual(pool.tracked_orders(), 2)
+        pool.get_order_status("id2")
+        self.assertEqual(pool.tracked_orders(), 1)
+
+    def test_from_config_adds_a_client_per_extra_account(self):
+        config = {
+            "USER": "user",
+            "PASS": "password",
+            "ACCOUNT": "REM1",
+            "REST_POOL_SIZE": 3,
+            "REST_ACCOUNTS": [
+                {"USER": "user2", "PASS": "password2", "ACCOUNT": "REM2"}
+            ],
+        }
+        config_service = mock.MagicMock()
+        config_service.__getitem__.side_effect = config.__getitem__
+        config_service.get.side_effect = config.get
+        pool = rest_client_pool_from_config(
+            config_service, pyRofex.Environment.REMARKET, token="token"
+        )
+        self.addCleanup(pool.close)
+        self.assertEqual(pool.accounts(), ["REM1", "REM2"])
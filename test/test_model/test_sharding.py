@@ -0,0 +1,300 @@
+import datetime as dt
+import multiprocessing
+import time
+import unittest
+from types import MappingProxyType
+from unittest import mock
+
+import numpy as np
+from freezegun import freeze_time
+
+import src.model.api_wrapper as wrapper
+import src.model.market_apis as mapis
+from src.model.instrument_catalog import CatalogInstrument, InstrumentCatalog
+from src.model.rate_calculator import ImplicitRateCalculator
+from src.model.sharding import (
+    SharedMarketData,
+    SharedPyRofexApi,
+    SharedSpotSource,
+    ShardedFeed,
+    ShardTradeableCheck,
+    ShardWorker,
+    assign_shards,
+    memory_model_is_tso,
+)
+from src.model.spot_sources import FakeSpotSource
+from src.model.tradeable_check import TradeableCheck
+
+FEB_DATE = dt.datetime(2022, 2, 28)
+APR_DATE = dt.datetime(2022, 4, 29)
+FUTURES = ["GGAL/FEB22", "PAMP/FEB22", "GGAL/ABR22", "PAMP/ABR22"]
+
+
+def book_snapshot(bids, asks):
+    return mapis.BookSnapshot(
+        MappingProxyType({t: mapis.OrderBook(p, 10) for t, p in bids.items()}),
+        MappingProxyType({t: mapis.OrderBook(p, 10) for t, p in asks.items()}),
+        1,
+    )
+
+
+def read_spot_in_child(name, queue):
+    shared_market_data = SharedMarketData(FUTURES, ["GGAL", "PAMP"], name=name)
+    _, _, _, books, _, spots = shared_market_data.read(np.array([0]), np.array([0, 1]))
+    queue.put((books[0, 0, 0, 0], list(spots)))
+    shared_market_data.close()
+
+
+class TestSharding(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(wrapper, "APIWrapper")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        catalog = mock.MagicMock()
+        catalog.instruments.return_value = [
+            CatalogInstrument(symbol, FEB_DATE if "FEB" in symbol else APR_DATE, 100.0)
+            for symbol in FUTURES
+        ]
+        self._feb_shard = ShardTradeableCheck(["GGAL", "PAMP"], ["/FEB22"], catalog)
+        self._shared_market_data = SharedMarketData(FUTURES, ["GGAL", "PAMP"])
+        self.addCleanup(self._shared_market_data.close)
+        self._spot_source = SharedSpotSource()
+        self._pyrofex_api = SharedPyRofexApi(
+            self._shared_market_data, self._spot_source, self._feb_shard
+        )
+
+    def test_shard_tradeable_check_keeps_only_its_maturities(self):
+        self.assertEqual(self._feb_shard.tradeable_maturities(), ["/FEB22"])
+        self.assertEqual(
+            sorted(self._feb_shard.tradeable_rofex_futures_tickers()),
+            ["GGAL/FEB22", "PAMP/FEB22"],
+        )
+
+    def test_assign_shards_balances_futures(self):
+        shards = assign_shards(
+            {"/FEB22": [1, 2, 3], "/ABR22": [1, 2], "/JUN22": [1, 2]}, 2
+        )
+        self.assertEqual(shards, [["/FEB22"], ["/ABR22", "/JUN22"]])
+        self.assertEqual(assign_shards({"/FEB22": [1, 2]}, 4), [["/FEB22"]])
+
+    def test_worker_reads_only_what_changed_in_its_shard(self):
+        self._shared_market_data.publish(
+            book_snapshot({"GGAL/FEB22": 110, "GGAL/ABR22": 120}, {"PAMP/FEB22": 130}),
+            {"GGAL": 100.0, "PAMP": 90.0},
+            {"GGAL/FEB22", "PAMP/FEB22", "GGAL/ABR22"},
+            {"GGAL", "PAMP"},
+        )
+        self._pyrofex_api.refresh()
+        snapshot = self._pyrofex_api.snapshot()
+        self.assertEqual(dict(snapshot.bids), {"GGAL/FEB22": mapis.OrderBook(110, 10)})
+        self.assertEqual(dict(snapshot.asks), {"PAMP/FEB22": mapis.OrderBook(130, 10)})
+        self.assertEqual(self._pyrofex_api.pop_updated(), {"GGAL/FEB22", "PAMP/FEB22"})
+        self.assertEqual(self._spot_source.last_prices(), {"GGAL": 100.0, "PAMP": 90.0})
+
+        # Un cambio en otro shard no cambia la foto de este
+        self._shared_market_data.publish(
+            book_snapshot({"GGAL/ABR22": 121}, {}), {}, {"GGAL/ABR22"}, set()
+        )
+        self.assertIs(self._pyrofex_api.snapshot(), snapshot)
+        self.assertEqual(self._pyrofex_api.pop_updated(), set())
+
+        # Las puntas nuevas del shard se ven desde snapshot(), los spot solo con refresh()
+        self._shared_market_data.publish(
+            book_snapshot({"GGAL/FEB22": 111}, {}),
+            {"GGAL": 101.0},
+            {"GGAL/FEB22"},
+            {"GGAL"},
+        )
+        new_snapshot = self._pyrofex_api.snapshot()
+        self.assertEqual(new_snapshot.sequence, snapshot.sequence + 1)
+        self.assertEqual(new_snapshot.bids["GGAL/FEB22"].price, 111)
+        self.assertEqual(self._spot_source.price("GGAL"), 100.0)
+        self._pyrofex_api.refresh()
+        self.assertEqual(self._spot_source.price("GGAL"), 101.0)
+
+    def test_reader_retries_while_the_feed_is_writing(self):
+        header = self._shared_market_data._header
+        header[0] = 1
+        calls = []
+
+        def finish_writing(_):
+            calls.append(1)
+            header[0] = 2
+
+        with mock.patch("src.model.sharding.time.sleep", side_effect=finish_writing):
+            self._shared_market_data.read(np.array([0]), np.array([0]))
+        self.assertEqual(calls, [1])
+
+    def test_other_processes_read_the_shared_block(self):
+        self._shared_market_data.publish(
+            book_snapshot({"GGAL/FEB22": 110}, {}),
+            {"GGAL": 100.0, "PAMP": 90.0},
+            {"GGAL/FEB22"},
+            {"GGAL", "PAMP"},
+        )
+        context = multiprocessing.get_context("spawn")
+        queue = context.Queue()
+        process = context.Process(
+            target=read_spot_in_child, args=(self._shared_market_data.name(), queue)
+        )
+        process.start()
+        self.assertEqual(queue.get(timeout=30), (110.0, [100.0, 90.0]))
+        process.join(30)
+
+    def test_other_architectures_need_a_lock(self):
+        self.assertTrue(memory_model_is_tso("x86_64"))
+        self.assertFalse(memory_model_is_tso("aarch64"))
+        with mock.patch("platform.machine", return_value="aarch64"):
+            with self.assertRaises(RuntimeError):
+                SharedMarketData(FUTURES, ["GGAL", "PAMP"])
+            shared_market_data = SharedMarketData(
+                FUTURES, ["GGAL", "PAMP"], lock=multiprocessing.Lock()
+            )
+        self.addCleanup(shared_market_data.close)
+        shared_market_data.publish(
+            book_snapshot({"GGAL/FEB22": 110}, {}), {"GGAL": 100.0}, {"GGAL/FEB22"}, {}
+        )
+        _, _, _, books, _, _ = shared_market_data.read(np.array([0]), np.array([0]))
+        self.assertEqual(books[0, 0, 0, 0], 110)
+
+
+def market_data(symbol, bid, offer):
+    return {
+        "type": "Md",
+        "instrumentId": {"marketId": "ROFX", "symbol": symbol},
+        "marketData": {
+            "BI": [{"price": bid, "size": 10}],
+            "OF": [{"price": offer, "size": 10}],
+        },
+    }
+
+
+class TestShardedFeedEndToEnd(unittest.TestCase):
+    """El feed publica, cada worker lee su shard y calcula lo mismo que un solo proceso"""
+
+    def setUp(self):
+        patcher = mock.patch.object(wrapper, "APIWrapper")
+        self._api_wrapper = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        config = {"COST": 0.05, "SEND_SPOT_ORDERS": False}
+        self._config_service = mock.MagicMock()
+        self._config_service.__getitem__.side_effect = config.__getitem__
+        self._config_service.get.side_effect = config.get
+        catalog = InstrumentCatalog(
+            path=None,
+            instruments=[
+                CatalogInstrument(
+                    symbol, FEB_DATE if "FEB" in symbol else APR_DATE, 100.0
+                )
+                for symbol in FUTURES
+            ],
+        )
+        self._tradeable_check = TradeableCheck(["GGAL", "PAMP"], catalog)
+        self._pyrofex_api = mapis.PyRofexApi(self._tradeable_check)
+        self._spot_source = FakeSpotSource({"GGAL": 100.0, "PAMP": 90.0})
+        self._feed = ShardedFeed(
+            self._pyrofex_api,
+            self._spot_source,
+            self._tradeable_check,
+            ["GGAL", "PAMP"],
+            2,
+            ImplicitRateCalculator,
+        )
+        self.addCleanup(self._feed.stop)
+        # Los workers corren en este proceso, sobre la misma memoria compartida
+        self._workers = []
+        for shard in self._feed._shards:
+            worker = ShardWorker(shard, self._config_service)
+            self.addCleanup(worker.close)
+            worker.start()
+            self._workers.append(worker)
+
+    @freeze_time("2022-01-01")
+    def test_workers_compute_the_same_rates_as_a_single_process(self):
+        for ticker, bid, offer in [
+            ("GGAL/FEB22", 110, 115),
+            ("PAMP/FEB22", 99, 104),
+            ("GGAL/ABR22", 118, 125),
+            ("PAMP/ABR22", 106, 113),
+        ]:
+            self._pyrofex_api._market_data_handler(market_data(ticker, bid, offer))
+        self.assertTrue(self._feed.publish())
+        calculator = ImplicitRateCalculator(
+            self._pyrofex_api, self._spot_source, self._tradeable_check
+        )
+        calculator.update_rates()
+        buy_rates, sell_rates = {}, {}
+        for worker in self._workers:
+            self.assertTrue(worker.step())
+            buy_rates.update(worker.rate_calculator().buy_rate())
+            sell_rates.update(worker.rate_calculator().sell_rate())
+        self.assertEqual(buy_rates, calculator.buy_rate())
+        self.assertEqual(sell_rates, calculator.sell_rate())
+        self.assertEqual(sorted(buy_rates), ["/ABR22", "/FEB22"])
+
+    def _workers_by_maturity(self):
+        by_maturity = {
+            tuple(worker._shard.maturities): worker for worker in self._workers
+        }
+        return by_maturity[("/ABR22",)], by_maturity[("/FEB22",)]
+
+    def _send_order(self, worker, client_id, ticker):
+        """El worker manda una orden, como lo haría su Strategy"""
+        self._api_wrapper.send_order.return_value = {"order": {"clientId": client_id}}
+        worker.pyrofex_api().place_order(ticker=ticker, side="BUY", size=2)
+
+    def _report(self, client_id, ticker):
+        self._pyrofex_api._order_report_handler(
+            {
+                "type": "or",
+                "orderReport": {
+                    "clOrdId": client_id,
+                    "instrumentId": {"symbol": ticker},
+                    "side": "BUY",
+                    "orderQty": 2,
+                    "cumQty": 2,
+                    "lastQty": 2,
+                    "lastPx": 118.0,
+                    "status": "FILLED",
+                },
+            }
+        )
+
+    def _wait_for(self, condition):
+        deadline = time.monotonic() + 10
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def test_order_reports_go_to_the_worker_that_sent_the_order(self):
+        abr_worker, feb_worker = self._workers_by_maturity()
+        # Un spot lo operan los dos workers, el reporte va solo al que mandó la orden
+        self._send_order(abr_worker, "1", "GGAL")
+        self._wait_for(
+            lambda: self._feed._read_sent_orders() or "1" in self._feed._shard_by_order
+        )
+        self._report("1", "GGAL")
+        self._wait_for(
+            lambda: abr_worker.position_engine().position("GGAL").quantity == 2
+        )
+        self.assertIsNone(feb_worker.pyrofex_api().order_tracker().order("1"))
+        # La orden terminó, el feed la olvida
+        self.assertNotIn("1", self._feed._shard_by_order)
+
+    def test_a_report_before_the_order_notice_is_counted_once(self):
+        abr_worker, feb_worker = self._workers_by_maturity()
+        # El reporte le gana a la respuesta del envío: va a todos los workers
+        self._report("2", "GGAL")
+        for worker in (abr_worker, feb_worker):
+            self._wait_for(
+                lambda: worker.pyrofex_api().order_tracker().order("2") is not None
+            )
+        self.assertEqual(abr_worker.position_engine().position("GGAL").quantity, 0)
+        self._send_order(feb_worker, "2", "GGAL")
+        self._report("2", "GGAL")
+        self.assertEqual(feb_worker.position_engine().position("GGAL").quantity, 2)
+        self.assertEqual(abr_worker.position_engine().position("GGAL").quantity, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
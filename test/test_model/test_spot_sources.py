@@ -0,0 +1,160 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import src.model.api_wrapper as wrapper
+from src.model.market_apis import PyRofexApi, YfinanceAPI
+from src.model.spot_sources import FakeSpotSource, RofexSpotSource
+
+
+def market_data(symbol, last=None, bids=(), offers=()):
+    return {
+        "type": "Md",
+        "instrumentId": {"marketId": "ROFX", "symbol": symbol},
+        "marketData": {
+            "LA": {"price": last, "size": 10} if last is not None else None,
+            "BI": [{"price": price, "size": 10} for price in bids],
+            "OF": [{"price": price, "size": 10} for price in offers],
+        },
+    }
+
+
+class TestRofexSpotSource(unittest.TestCase):
+    def setUp(self):
+        self._api_wrapper = mock.MagicMock()
+        patcher = mock.patch.object(
+            wrapper, "APIWrapper", return_value=self._api_wrapper
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        tradeable_check = mock.MagicMock()
+        tradeable_check.tradeable_rofex_futures_tickers.return_value = ["GGAL/FEB22"]
+        self._pyrofex_api = PyRofexApi(tradeable_check, subscribe_to_order_report=False)
+        self._spot_source = RofexSpotSource(
+            self._pyrofex_api, {"GGAL": "MERV - XMEV - GGAL - 48hs"}
+        )
+
+    def _subscribed_tickers(self):
+        return [
+            call.kwargs["tickers"]
+            for call in self._api_wrapper.market_data_subscription.call_args_list
+        ]
+
+    def test_spot_is_subscribed_in_the_futures_session(self):
+        self._spot_source.request_market_data()
+        self._pyrofex_api.request_market_data()
+        self.assertEqual(
+            self._subscribed_tickers(),
+            [["GGAL/FEB22"], ["MERV - XMEV - GGAL - 48hs"]],
+        )
+        # Al reconectar se vuelve a suscribir
+        self._pyrofex_api.request_market_data()
+        self.assertEqual(len(self._subscribed_tickers()), 4)
+
+    def test_spot_messages_update_prices_not_futures_book(self):
+        self._spot_source.request_market_data()
+        self._pyrofex_api._market_data_handler(
+            market_data("MERV - XMEV - GGAL - 48hs", bids=[99], offers=[101])
+        )
+        self.assertEqual(self._spot_source.price("GGAL"), 100)
+        self._pyrofex_api._market_data_handler(
+            market_data("MERV - XMEV - GGAL - 48hs", last=98.5, bids=[99], offers=[101])
+        )
+        self.assertEqual(self._spot_source.last_prices(), {"GGAL": 98.5})
+        self.assertEqual(self._spot_source.pop_updated(), {"GGAL"})
+        self.assertGreater(self._spot_source.last_received(), 0)
+        self.assertEqual(dict(self._pyrofex_api.bids()), {})
+        self.assertEqual(self._pyrofex_api.pop_updated(), set())
+
+
+class TestFakeSpotSource(unittest.TestCase):
+    def test_push_marks_changes_in_both_directions(self):
+        spot_source = FakeSpotSource({"GGAL": 100.0, "PAMP": 50.0})
+        spot_source.pop_updated()
+        self.assertEqual(spot_source.push("GGAL", 99.0), {"GGAL": 99.0})
+        self.assertEqual(spot_source.push("PAMP", 50.0), {})
+        self.assertEqual(spot_source.pop_updated(), {"GGAL"})
+        self.assertEqual(spot_source.price("GGAL"), 99.0)
+
+
+class TestYfinanceAPI(unittest.TestCase):
+    def setUp(self):
+        instrument_handler = mock.MagicMock()
+        instrument_handler.reorder_yfinance_tickers = {
+            "GGAL.BA": "GGAL",
+            "PAMP.BA": "PAMP",
+        }
+        tradeable_check = mock.MagicMock()
+        tradeable_check.tradeable_yfinance_tickers.return_value = ["GGAL.BA", "PAMP.BA"]
+        self._yfinance_api = YfinanceAPI(
+            instrument_handler, 0.5, tradeable_check, max_workers=2, max_interval=4.0
+        )
+        self._prices = {"GGAL.BA": 100.0, "PAMP.BA": 50.0}
+        self._yfinance_api._fetch_price = self._fetch_price
+        self._executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(self._executor.shutdown)
+
+    def _fetch_price(self, ticker):
+        price = self._prices[ticker]
+        if isinstance(price, Exception):
+            raise price
+        return price
+
+    def test_poll_publishes_only_changed_tickers_in_both_directions(self):
+        self.assertEqual(self._yfinance_api.poll(self._executor), (2, 0))
+        self._yfinance_api.pop_updated()
+        self._prices["GGAL.BA"] = 99.0
+        self.assertEqual(self._yfinance_api.poll(self._executor), (1, 0))
+        self.assertEqual(self._yfinance_api.pop_updated(), {"GGAL"})
+        self.assertEqual(self._yfinance_api.price("GGAL"), 99.0)
+
+    def test_slow_ticker_does_not_delay_the_others(self):
+        release = threading.Event()
+
+        def fetch_price(ticker):
+            if ticker == "PAMP.BA":
+                release.wait(5)
+            return self._prices[ticker]
+
+        self._yfinance_api._fetch_price = fetch_price
+        polling = threading.Thread(
+            target=self._yfinance_api.poll, args=(self._executor,)
+        )
+        polling.start()
+        for _ in range(200):
+            if self._yfinance_api.price("GGAL"):
+                break
+            time.sleep(0.01)
+        self.assertEqual(self._yfinance_api.price("GGAL"), 100.0)
+        self.assertEqual(self._yfinance_api.price("PAMP"), 0.0)
+        release.set()
+        polling.join()
+        self.assertEqual(self._yfinance_api.price("PAMP"), 50.0)
+
+    def test_errors_are_counted_and_prices_kept(self):
+        self._yfinance_api.poll(self._executor)
+        self._prices["PAMP.BA"] = ConnectionError("timeout")
+        self.assertEqual(self._yfinance_api.poll(self._executor), (0, 1))
+        self.assertEqual(self._yfinance_api.price("PAMP"), 50.0)
+        staleness = self._yfinance_api.staleness()
+        self.assertLess(staleness["GGAL"], staleness["PAMP"])
+        self.assertGreaterEqual(self._yfinance_api.poll_seconds(), 0.0)
+
+    def test_interval_backs_off_when_quiet_or_failing(self):
+        self.assertEqual(self._yfinance_api._next_interval(1, 0), 0.5)
+        for _ in range(YfinanceAPI.QUIET_POLLS):
+            self.assertEqual(self._yfinance_api._next_interval(0, 0), 0.5)
+        self.assertEqual(self._yfinance_api._next_interval(0, 0), 1.0)
+        self.assertEqual(self._yfinance_api._next_interval(0, 0), 2.0)
+        self.assertEqual(self._yfinance_api._next_interval(0, 0), 4.0)
+        self.assertEqual(self._yfinance_api._next_interval(0, 0), 4.0)
+        self.assertEqual(self._yfinance_api._next_interval(1, 0), 0.5)
+        self.assertEqual(self._yfinance_api._next_interval(0, 2), 1.0)
+        self.assertEqual(self._yfinance_api._next_interval(1, 2), 2.0)
+        self.assertEqual(self._yfinance_api._next_interval(1, 0), 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
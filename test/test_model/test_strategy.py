@@ -1,3 +1,4 @@
+import threading
 import unittest
 from unittest.mock import MagicMock, Mock, patch
 from freezegun import freeze_time
@@ -7,6 +8,9 @@ import src.model.strategy as stgy
 from src.model.instrument_handler import FutureContract
 import src.model.rate_calculator as rc
 import src.model.market_apis as mapis
+from src.model.opportunity_scanner import OpportunityScanner
+from src.model.order_dispatcher import OrderDispatcher
+from src.model.position_engine import PositionEngine, RiskLimits
 
 
 class TestStrategy(unittest.TestCase):
@@ -22,6 +26,10 @@ class TestStrategy(unittest.TestCase):
         self._yfinance_api_mock.price.side_effect = lambda ticker: last_prices[ticker]
 
         self._pyrofex_api_mock = MagicMock()
+        # La foto de las puntas se arma con lo que devuelven bids() y asks()
+        self._pyrofex_api_mock.snapshot.side_effect = lambda: mapis.BookSnapshot(
+            self._pyrofex_api_mock.bids(), self._pyrofex_api_mock.asks(), 0
+        )
         self._pyrofex_api_mock.bids.return_value = {
             "GGAL/FEB22": mapis.OrderBook(110, 10),
             "PAMP/FEB22": mapis.OrderBook(120, 10),
@@ -61,6 +69,9 @@ class TestStrategy(unittest.TestCase):
         self._data_update_mock = MagicMock()
         self._data_update_mock.update_boolean.return_value = False
 
+        # Las patas salen en otros hilos, shutdown espera que terminen
+        self._order_dispatcher = OrderDispatcher(self._pyrofex_api_mock)
+        self.addCleanup(self._order_dispatcher.shutdown)
         self._strategy = stgy.Strategy(
             self._instrument_handler_mock,
             self._implicit_rate_calculator,
@@ -68,6 +79,7 @@ class TestStrategy(unittest.TestCase):
             self._yfinance_api_mock,
             self._data_update_mock,
             self._tradeable_check_mock,
+            order_dispatcher=self._order_dispatcher,
         )
 
     @freeze_time(NOW_DATE)
@@ -88,12 +100,16 @@ class TestStrategy(unittest.TestCase):
     def test_trader_when_arb_exist(self):
         self._implicit_rate_calculator.update_rates()
         self._strategy.start_trades()
+        self._order_dispatcher.shutdown()
         # Testea si se mandan 2 ordenes
         self.assertEqual(self._pyrofex_api_mock.place_order.call_count, 2)
-        (
-            buy_order_args,
-            sell_order_args,
-        ) = self._pyrofex_api_mock.place_order.call_args_list
+        # Las patas se mandan en paralelo, el orden de las llamadas no está garantizado
+        order_args = {
+            call.kwargs["ticker"]: call
+            for call in self._pyrofex_api_mock.place_order.call_args_list
+        }
+        buy_order_args = order_args["GGAL/FEB22"]
+        sell_order_args = order_args["PAMP/FEB22"]
 
         self.assertEqual(sell_order_args.kwargs["ticker"], "PAMP/FEB22")
         self.assertEqual(sell_order_args.kwargs["side"], pyRofex.Side.SELL)
@@ -115,6 +131,104 @@ class TestStrategy(unittest.TestCase):
         )
         self.assertEqual(buy_order_args.kwargs["order_type"], pyRofex.OrderType.LIMIT)
 
+    @freeze_time(NOW_DATE)
+    def test_trader_skips_when_book_changed_after_rates(self):
+        self._implicit_rate_calculator.update_rates()
+        # Llegó una foto nueva de las puntas despues de calcular las tasas
+        self._pyrofex_api_mock.snapshot.side_effect = lambda: mapis.BookSnapshot(
+            self._pyrofex_api_mock.bids(), self._pyrofex_api_mock.asks(), 1
+        )
+        self._strategy.start_trades()
+        self.assertEqual(self._pyrofex_api_mock.place_order.call_count, 0)
+
+    @freeze_time(NOW_DATE)
+    def test_ranked_trades_from_the_opportunity_scanner(self):
+        strategy = stgy.Strategy(
+            self._instrument_handler_mock,
+            self._implicit_rate_calculator,
+            self._pyrofex_api_mock,
+            self._yfinance_api_mock,
+            self._data_update_mock,
+            self._tradeable_check_mock,
+            opportunity_scanner=OpportunityScanner(max_opportunities=3),
+            order_dispatcher=self._order_dispatcher,
+        )
+        self._implicit_rate_calculator.update_rates()
+        strategy.start_trades()
+        self._order_dispatcher.shutdown()
+        # GGAL/FEB22 y PAMP/FEB22 ya se usaron en la mejor oportunidad, no hay otra
+        self.assertEqual(
+            sorted(
+                call.kwargs["ticker"]
+                for call in self._pyrofex_api_mock.place_order.call_args_list
+            ),
+            ["GGAL/FEB22", "PAMP/FEB22"],
+        )
+
+    @freeze_time(NOW_DATE)
+    def test_trader_skips_when_risk_limit_is_breached(self):
+        position_engine = PositionEngine(
+            self._instrument_handler_mock.rofex_instruments_by_ticker(),
+            self._tradeable_check_mock.tradeable_ticker_maturity(),
+            limits=RiskLimits(5, None, None, None),
+        )
+        strategy = stgy.Strategy(
+            self._instrument_handler_mock,
+            self._implicit_rate_calculator,
+            self._pyrofex_api_mock,
+            self._yfinance_api_mock,
+            self._data_update_mock,
+            self._tradeable_check_mock,
+            position_engine=position_engine,
+        )
+        self._implicit_rate_calculator.update_rates()
+        # El arbitraje es de 10 contratos por pata y el límite es de 5
+        strategy.start_trades()
+        self.assertEqual(self._pyrofex_api_mock.place_order.call_count, 0)
+        self.assertEqual(position_engine.rejections(), 1)
+
+    @freeze_time(NOW_DATE)
+    def test_reservation_is_released_when_dispatch_fails(self):
+        position_engine = MagicMock()
+        strategy = stgy.Strategy(
+            self._instrument_handler_mock,
+            self._implicit_rate_calculator,
+            self._pyrofex_api_mock,
+            self._yfinance_api_mock,
+            self._data_update_mock,
+            self._tradeable_check_mock,
+            position_engine=position_engine,
+            order_dispatcher=self._order_dispatcher,
+        )
+        self._implicit_rate_calculator.update_rates()
+        with patch.object(
+            self._order_dispatcher, "dispatch", side_effect=RuntimeError("caído")
+        ):
+            with self.assertRaises(RuntimeError):
+                strategy.start_trades()
+        position_engine.release.assert_called_once_with(
+            position_engine.reserve.return_value
+        )
+
+    @freeze_time(NOW_DATE)
+    def test_trading_thread_does_not_wait_for_the_legs(self):
+        sent = threading.Event()
+        self._pyrofex_api_mock.place_order.side_effect = lambda **kwargs: (
+            sent.wait(5),
+            {"order": {"clientId": "test_order_id"}},
+        )[1]
+        self._implicit_rate_calculator.update_rates()
+        with patch.object(self._strategy._logger, "trade") as trade_log:
+            self._strategy.start_trades()
+            # Las patas siguen sin respuesta y el trade todavía no se registró
+            trade_log.assert_not_called()
+            sent.set()
+            self._order_dispatcher.shutdown()
+        trade = trade_log.call_args.args[0]
+        self.assertEqual(
+            [leg["status"] for leg in trade["legs"]], ["UNITTEST", "UNITTEST"]
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
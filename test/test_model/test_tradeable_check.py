@@ -0,0 +1,66 @@
+import datetime as dt
+import unittest
+from unittest.mock import MagicMock
+
+from src.model.instrument_catalog import CatalogInstrument
+from src.model.tradeable_check import TradeableCheck
+
+MATURITY_DATE = dt.datetime(2022, 2, 28)
+
+
+class TestTradeableCheck(unittest.TestCase):
+    def setUp(self):
+        catalog = MagicMock()
+        catalog.instruments.return_value = [
+            CatalogInstrument(symbol, MATURITY_DATE, 100.0)
+            for symbol in [
+                "GGAL/FEB22",
+                "YPFD/FEB22",
+                "YPF/FEB22",
+                "PAMP/ABR22",
+                "MERV - XMEV - GGAL - 48hs",
+            ]
+        ]
+        self._tradeable_check = TradeableCheck(["GGAL", "YPF", "YPFD", "PAMP"], catalog)
+
+    def test_symbols_are_matched_to_the_longest_ticker(self):
+        by_underlier = self._tradeable_check.rofex_instruments_by_underlier()
+        self.assertEqual(
+            {u: [f.ticker for f in futures] for u, futures in by_underlier.items()},
+            {
+                "GGAL": ["GGAL/FEB22"],
+                "YPFD": ["YPFD/FEB22"],
+                "YPF": ["YPF/FEB22"],
+                "PAMP": ["PAMP/ABR22"],
+            },
+        )
+
+    def test_tradeable_indices(self):
+        # ABR22 tiene un solo subyacente, no es tradeable
+        self.assertEqual(self._tradeable_check.tradeable_maturities(), ["/FEB22"])
+        self.assertEqual(
+            sorted(self._tradeable_check.tradeable_rofex_futures_tickers()),
+            ["GGAL/FEB22", "YPF/FEB22", "YPFD/FEB22"],
+        )
+        self.assertTrue(self._tradeable_check.is_tradeable("YPFD/FEB22"))
+        self.assertFalse(self._tradeable_check.is_tradeable("PAMP/ABR22"))
+        self.assertEqual(
+            self._tradeable_check.tradeable_pyrofex_future_underlier_ticker()["PAMP"],
+            (),
+        )
+        self.assertEqual(
+            self._tradeable_check.tradeable_yfinance_tickers(),
+            ["GGAL.BA", "YPF.BA", "YPFD.BA"],
+        )
+
+    def test_indices_are_shared_read_only(self):
+        ticker_maturity = self._tradeable_check.tradeable_ticker_maturity()
+        self.assertIs(
+            ticker_maturity, self._tradeable_check.tradeable_ticker_maturity()
+        )
+        with self.assertRaises(TypeError):
+            ticker_maturity["GGAL/MAR22"] = "/MAR22"
+
+
+if __name__ == "__main__":
+    unittest.main()
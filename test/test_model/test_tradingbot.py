@@ -0,0 +1,140 @@
+import datetime as dt
+import tempfile
+import unittest
+from unittest import mock
+
+import pyRofex
+from freezegun import freeze_time
+
+import src.model.api_wrapper as wrapper
+import src.model.instrument_handler as ih
+import src.model.tradingbot as tb
+from src.model.array_rate_calculator import ArrayImplicitRateCalculator
+from src.model.instrument_catalog import CatalogInstrument, InstrumentCatalog
+from src.model.opportunity_scanner import OpportunityScanner
+from src.model.spot_sources import RofexSpotSource, spot_ticker
+
+FEB_DATE = dt.datetime(2022, 2, 28)
+APR_DATE = dt.datetime(2022, 4, 29)
+FUTURES = ["GGAL/FEB22", "PAMP/FEB22", "GGAL/ABR22", "PAMP/ABR22"]
+
+
+def market_data(symbol, bid, offer):
+    return {
+        "type": "Md",
+        "instrumentId": {"marketId": "ROFX", "symbol": symbol},
+        "marketData": {
+            "BI": [{"price": bid, "size": 10}],
+            "OF": [{"price": offer, "size": 10}],
+            "LA": {"price": (bid + offer) / 2, "size": 1},
+        },
+    }
+
+
+class TestTradingBot(unittest.TestCase):
+    """Arma el bot completo con pyRofex y el catálogo simulados, para probar el cableado"""
+
+    def setUp(self):
+        patcher = mock.patch.object(wrapper, "APIWrapper")
+        self._api_wrapper = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        catalog = InstrumentCatalog(
+            path=None,
+            instruments=[
+                CatalogInstrument(
+                    symbol, FEB_DATE if "FEB" in symbol else APR_DATE, 100.0
+                )
+                for symbol in FUTURES
+            ],
+        )
+        patcher = mock.patch.object(ih, "get_instrument_catalog", return_value=catalog)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # El logger es global, el del bot se reemplaza para no cambiarle el nivel
+        patcher = mock.patch.object(tb, "get_logger")
+        self._logger = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self._config = {
+            "COST": 0.05,
+            "RECORDER_DIR": directory.name,
+            "TOP_OPPORTUNITIES": 3,
+        }
+        self._config_service = mock.MagicMock()
+        self._config_service.__getitem__.side_effect = self._config.__getitem__
+        self._config_service.get.side_effect = self._config.get
+
+    def _trading_bot(self, **kwargs):
+        bot = tb.TradingBot(
+            ["GGAL", "PAMP"], 1, config_service=self._config_service, **kwargs
+        )
+        self.addCleanup(bot._strategy._order_dispatcher.shutdown)
+        return bot
+
+    def test_the_components_share_the_same_services(self):
+        bot = self._trading_bot(rate_engine="array")
+        self.assertIsInstance(
+            bot._implicit_rate_calculator, ArrayImplicitRateCalculator
+        )
+        self.assertIsInstance(bot._spot_source, RofexSpotSource)
+        self.assertIsInstance(bot._strategy._opportunity_scanner, OpportunityScanner)
+        self.assertIs(bot._strategy._position_engine, bot._position_engine)
+        self.assertIs(
+            bot._strategy._implicit_rate_calculator, bot._implicit_rate_calculator
+        )
+        self.assertIs(bot._strategy._latency_tracer, bot._latency_tracer)
+        self.assertIs(bot._pyrofex_api._recorder, bot._market_recorder)
+        self.assertIs(bot._spot_source._recorder, bot._market_recorder)
+        self.assertIsNotNone(bot._pyrofex_api.ingestion())
+        self.assertIsNone(bot._sharded_feed)
+
+    def test_workers_get_a_sharded_feed(self):
+        self._config["WORKERS"] = 2
+        bot = self._trading_bot()
+        self.addCleanup(bot._sharded_feed.stop)
+        self.assertEqual(len(bot._sharded_feed._shards), 2)
+
+    @freeze_time("2022-01-01")
+    def test_market_data_goes_through_to_the_orders(self):
+        bot = self._trading_bot()
+        bot._pyrofex_api.order_execution_status = mock.MagicMock(return_value="FILLED")
+        bot._spot_source.request_market_data()
+        for underlier in ("GGAL", "PAMP"):
+            bot._pyrofex_api._market_data_handler(
+                market_data(spot_ticker(underlier, self._config_service), 99, 101)
+            )
+        # Colocar en GGAL/FEB22 rinde más que tomar en PAMP/FEB22
+        for ticker, bid, offer in [
+            ("GGAL/FEB22", 110, 111),
+            ("PAMP/FEB22", 100, 101),
+        ]:
+            bot._pyrofex_api._market_data_handler(market_data(ticker, bid, offer))
+        # Una vuelta del loop de trading
+        self.assertTrue(bot._data_update.wait_for_update(0))
+        bot._data_update.give_last_update()
+        bot._implicit_rate_calculator.update_rates()
+        self.assertTrue(bot._implicit_rate_calculator.ready())
+        bot._strategy.start_trades()
+        bot._strategy._order_dispatcher.shutdown()
+        self.assertEqual(
+            sorted(
+                (call.kwargs["ticker"], call.kwargs["side"])
+                for call in self._api_wrapper.send_order.call_args_list
+            ),
+            [("GGAL/FEB22", pyRofex.Side.SELL), ("PAMP/FEB22", pyRofex.Side.BUY)],
+        )
+        # Bid y offer de cada futuro y el precio de cada spot
+        self.assertEqual(bot._market_recorder._queue.qsize(), 6)
+
+    def test_end_logs_the_conflation_counters(self):
+        bot = self._trading_bot()
+        bot._pyrofex_api._market_data_handler(market_data("GGAL/FEB22", 110, 111))
+        bot._end()
+        self._logger.info.assert_any_call(
+            "Conflación de market data: %s", bot._pyrofex_api.ingestion().report()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import threading
+import time
+import unittest
+
+import src.model.market_apis as mapis
+from src.model.update_data import DataUpdate
+
+
+class TestDataUpdate(unittest.TestCase):
+    def setUp(self):
+        self._yfinance_api = mapis.ApiData()
+        self._pyrofex_api = mapis.ApiData()
+        self._data_update = DataUpdate(self._yfinance_api, self._pyrofex_api)
+
+    def test_wait_for_update_returns_false_on_timeout(self):
+        self.assertFalse(self._data_update.wait_for_update(timeout=0.01))
+        self.assertEqual(self._data_update.wake_ups(), 1)
+        self.assertEqual(self._data_update.evaluations(), 0)
+
+    def test_wait_for_update_wakes_up_when_api_updates(self):
+        updater = threading.Timer(0.05, self._pyrofex_api._update_last_update_api)
+        updater.start()
+        start = time.time()
+        self.assertTrue(self._data_update.wait_for_update(timeout=5.0))
+        self.assertLess(time.time() - start, 5.0)
+        self._data_update.give_last_update()
+        self.assertFalse(self._data_update.update_boolean())
+        self.assertEqual(self._data_update.evaluations(), 1)
+        updater.join()
+
+
+if __name__ == "__main__":
+    unittest.main()